@@ -0,0 +1,235 @@
+"""
+Autopilot file - contains Autopilot, a planner that drives the car by scoring
+many candidate left/right action sequences against predicted obstacle positions
+"""
+import time
+import numpy as np
+from obstacle_array import obstacle_arrays
+
+# Most candidates * obstacles * frames scored in one batch (larger arrays
+# fall out of the CPU cache and cost more per candidate)
+BATCH_CELLS = 1 << 17
+
+def candidate_sequences(horizon, switch_step=3, two_switch_step=6):
+    """
+    Build candidate action sequences, simplest first
+    Every sequence is made of constant pieces (-1 left, 0 stay, +1 right):
+    one action, one action then another, or three pieces
+    Returns: int8 array of shape (candidates, horizon)
+    """
+    directions = (0, -1, 1)
+    sequences = []
+    seen = set()
+
+    def add(pieces):
+        sequence = np.zeros(horizon, dtype=np.int8)
+        start = 0
+        for action, length in pieces:
+            sequence[start:start + length] = action
+            start += length
+        key = sequence.tobytes()
+        if key not in seen:
+            seen.add(key)
+            sequences.append(sequence)
+
+    for first in directions:
+        add([(first, horizon)])
+    for switch in range(switch_step, horizon, switch_step):
+        for first in directions:
+            for second in directions:
+                add([(first, switch), (second, horizon - switch)])
+    for switch1 in range(two_switch_step, horizon, two_switch_step):
+        for switch2 in range(switch1 + two_switch_step, horizon, two_switch_step):
+            for first in directions:
+                for second in directions:
+                    for third in directions:
+                        add([(first, switch1), (second, switch2 - switch1), (third, horizon - switch2)])
+    return np.array(sequences)
+
+def piece_tables(sequences):
+    """
+    Describe action sequences as pieces of constant action, so car positions
+    can be computed for any frame without stepping through the earlier ones
+    Returns: (piece, offset, actions, lengths)
+             piece, offset: piece index and frames into the piece (1 on its first
+                            frame) for every frame, shape (candidates, horizon)
+             actions, lengths: action and length of every piece, shape
+                               (candidates, pieces) with zero-length padding
+    """
+    count, horizon = sequences.shape
+    frames = np.arange(horizon)
+    change = np.ones((count, horizon), dtype=bool)
+    change[:, 1:] = sequences[:, 1:] != sequences[:, :-1]
+    piece = np.cumsum(change, axis=1) - 1
+    piece_start = np.maximum.accumulate(np.where(change, frames, 0), axis=1)
+
+    pieces = int(piece[:, -1].max()) + 1
+    actions = np.zeros((count, pieces))
+    lengths = np.zeros((count, pieces))
+    for index in range(pieces):
+        in_piece = piece == index
+        lengths[:, index] = np.count_nonzero(in_piece, axis=1)
+        actions[:, index] = sequences[np.arange(count), np.argmax(in_piece, axis=1)]
+    return piece, frames - piece_start + 1, actions, lengths
+
+class Autopilot:
+    def __init__(self, horizon=90, budget_ms=2.0, max_candidates=None, batch_size=256, margin=0.05):
+        """
+        Create a planner
+        horizon: frames each candidate plans ahead (90 frames covers the screen)
+        budget_ms: time allowed per frame; candidates are scored in batches,
+                   simplest first, each batch only as large as the time left
+                   allows (None scores every candidate each frame, which gives
+                   the same actions on every machine)
+        max_candidates: number of candidates to keep (all when None)
+        margin: extra clearance kept around obstacles
+        """
+        self.horizon = horizon
+        self.budget = budget_ms / 1000 if budget_ms is not None else None
+        self.batch_size = batch_size
+        self.margin = margin
+        self.candidates = candidate_sequences(horizon)
+        if max_candidates is not None:
+            self.candidates = self.candidates[:max_candidates]
+        self.tables = piece_tables(self.candidates)
+        self.plan = np.zeros(horizon, dtype=np.int8)  # best sequence of the last frame
+
+        # Statistics of the last frame
+        self.last_evaluated = 0
+        self.last_time = 0.0
+
+    def __call__(self, simulation):
+        """
+        Controller interface (same as headless controllers)
+        Returns: (left, right) actions for this frame
+        """
+        action = self.next_action(simulation)
+        return action < 0, action > 0
+
+    def next_action(self, simulation):
+        """
+        Plan and return the first action of the best sequence (-1, 0 or +1)
+        """
+        start = time.perf_counter()
+        car = simulation.car
+
+        # A new game starts without a plan (keeps games independent of earlier ones)
+        if simulation.frame == 0:
+            self.plan[:] = 0
+        x, y, width, height, speed = obstacle_arrays(simulation.obstacle_manager)
+
+        # Nearby traffic is predicted the same way (vehicles keep their speed)
+        traffic = simulation.traffic
+        if traffic is not None:
+            reach = car.height + traffic.vehicle_length + self.horizon * traffic.player_speed
+            vehicles = traffic.vehicle_arrays(car, reach)
+            x, y, width, height, speed = (np.concatenate(pair) for pair in
+                                          zip((x, y, width, height, speed), vehicles))
+
+        # Only obstacles that reach the car's rows within the horizon matter;
+        # each one moves in a straight line, so its first and last positions bound it
+        reach = (height + car.height) / 2 + self.margin
+        first_y = y - speed
+        last_y = y - speed * self.horizon
+        near = (np.minimum(first_y, last_y) < car.y + reach) & (np.maximum(first_y, last_y) > car.y - reach)
+        x, y, width, height, speed = x[near], y[near], width[near], height[near], speed[near]
+
+        # Frames (1 to horizon) in which each obstacle overlaps the car's rows;
+        # obstacles fall at a constant speed, so y after t frames is y - speed * t
+        steps = np.arange(1, self.horizon + 1)
+        future_y = y[:, None] - speed[:, None] * steps[None, :]
+        rows = np.abs(future_y - car.y) < (height[:, None] + car.height) / 2 + self.margin
+        active = rows.any(axis=1)
+
+        # Only those frames can have collisions, so positions are only needed there
+        frames = np.flatnonzero(rows.any(axis=0))
+        danger = (x[active], (width[active] + car.width) / 2 + self.margin, rows[active][:, frames], frames)
+
+        # Last frame's plan moved on by one frame is scored first (and kept
+        # unscored when predicting the obstacles already used up the budget)
+        warm = np.empty_like(self.plan)
+        warm[:-1] = self.plan[1:]
+        warm[-1] = self.plan[-1]
+        best = warm
+        evaluated = 0
+        overhead = 0.0
+        if self.budget is None or time.perf_counter() - start < self.budget:
+            now = time.perf_counter()
+            best_cost = self._score(warm[None, :], piece_tables(warm[None, :]), car, danger)[0]
+            overhead = time.perf_counter() - now  # one candidate: mostly the fixed cost of a call
+            evaluated = 1
+
+        # Then the candidates in batches, until they run out or the time does;
+        # scoring time grows with candidates * obstacles * frames, so with a
+        # budget a small first batch measures this frame's time per candidate
+        # and every later batch is cut to what still fits
+        batch_size = max(min(self.batch_size, BATCH_CELLS // max(len(danger[0]) * len(frames), 1)), 1)
+        candidate_time = None
+        first = 0
+        while evaluated and first < len(self.candidates):
+            size = batch_size
+            now = time.perf_counter()
+            if self.budget is not None:
+                left = self.budget - (now - start) - overhead
+                if candidate_time is None:
+                    size = max(batch_size // 8, 1)
+                elif candidate_time > 0:
+                    size = min(size, int(left / candidate_time))
+                if left <= 0 or size < 1:
+                    break
+
+            part = slice(first, first + size)
+            batch = self.candidates[part]
+            costs = self._score(batch, [table[part] for table in self.tables], car, danger)
+            index = int(np.argmin(costs))
+            if costs[index] < best_cost:
+                best_cost = costs[index]
+                best = batch[index]
+            evaluated += len(batch)
+            first += len(batch)
+            candidate_time = max(time.perf_counter() - now - overhead, 0.0) / len(batch)
+
+        self.plan = best.copy()
+        self.last_evaluated = evaluated
+        self.last_time = time.perf_counter() - start
+        return int(self.plan[0])
+
+    def _positions(self, batch, tables, car, columns):
+        """
+        Car x after the given frames of each candidate (same movement and limits
+        as Car.update): within a piece the car moves one way, so clipping the
+        straight-line position gives the same result as clipping every frame
+        Returns: array of shape (candidates, len(columns))
+        """
+        piece, offset, actions, lengths = tables
+
+        # Car x at the start of each piece
+        start_x = np.empty(actions.shape)
+        x = np.full(len(batch), float(car.x))
+        for index in range(actions.shape[1]):
+            start_x[:, index] = x
+            x = np.clip(x + actions[:, index] * lengths[:, index] * car.speed, -4, 4)
+
+        piece = piece[:, columns]
+        moved = (np.take_along_axis(start_x, piece, axis=1) +
+                 batch[:, columns] * offset[:, columns] * car.speed)
+        return np.clip(moved, -4, 4)
+
+    def _score(self, batch, tables, car, danger):
+        """
+        Cost of each candidate sequence (lower is better): surviving longer
+        matters most, then ending near the middle of the road, then moving less
+        danger: (obstacle x, overlap half widths, row overlap per frame, frames)
+        Returns: array of costs, one per candidate
+        """
+        obstacle_x, half_width, rows, frames = danger
+        positions = self._positions(batch, tables, car, np.append(frames, self.horizon - 1))
+
+        # Frames where the car overlaps an obstacle: (candidates, obstacles, frames)
+        hits = ((np.abs(positions[:, None, :-1] - obstacle_x[None, :, None]) < half_width[None, :, None]) &
+                rows[None, :, :]).any(axis=1)
+        crashed = hits.any(axis=1)
+        survived = np.where(crashed, frames[hits.argmax(axis=1)] if len(frames) else 0, self.horizon)
+
+        moves = np.count_nonzero(batch, axis=1)
+        return -survived * 1000.0 + np.abs(positions[:, -1]) * 10.0 + moves * 0.01
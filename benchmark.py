@@ -0,0 +1,298 @@
+"""
+Benchmark file - measures simulation hot paths, full frames and startup time
+Results can be saved as a baseline and compared against later runs
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from car import Car
+from road import Road
+from obstacle import Obstacle, ObstacleManager
+from headless import dodge_controller, make_obstacle_manager
+from simulation import Simulation
+from traffic import TrafficManager
+
+OBSTACLE_COUNTS = (10, 100, 1000, 10000, 100000)
+BACKENDS = ("list", "indexed", "array")
+
+def time_call(function, repeat):
+    """
+    Run function `repeat` times
+    Returns: average time per call in microseconds
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def time_for(function, min_time=0.2):
+    """
+    Run function repeatedly for at least `min_time` seconds
+    Returns: average time per call in microseconds
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / calls * 1e6
+
+def populate(manager, count, density=2.0, seed=0):
+    """
+    Fill manager with `count` obstacles on the road at a constant density
+    density: obstacles per unit of road length, so the road grows with count
+    """
+    rng = random.Random(seed)
+    length = count / density
+    for _ in range(count):
+        x = rng.uniform(-manager.road_width/2 + 0.5, manager.road_width/2 - 0.5)
+        y = rng.uniform(-6, -6 + length)
+        manager.add_obstacle(Obstacle(x, y))
+
+def make_cars(count, seed=1):
+    """
+    Create `count` cars spread across the road near the bottom of the screen
+    """
+    rng = random.Random(seed)
+    return [Car(x=rng.uniform(-4, 4), y=-3) for _ in range(count)]
+
+def bench_spatial_index(obstacle_counts=(100, 1000, 10000, 100000), car_counts=(1, 4, 16)):
+    """
+    Compare collision and score queries with and without the spatial index
+    Returns: list of result rows (dicts)
+    """
+    rows = []
+    for obstacle_count in obstacle_counts:
+        for car_count in car_counts:
+            cars = make_cars(car_count)
+            row = {"obstacles": obstacle_count, "cars": car_count}
+
+            for name, spatial_index in (("linear", False), ("indexed", True)):
+                manager = ObstacleManager(spatial_index=spatial_index)
+                populate(manager, obstacle_count)
+                repeat = max(3, 20000 // obstacle_count) if not spatial_index else 2000
+
+                def check_collisions():
+                    for car in cars:
+                        manager.check_collision(car)
+
+                def check_scores():
+                    for car in cars:
+                        manager.check_score(car)
+
+                # First score pass marks everything already below the cars
+                check_scores()
+                row[name + "_collision_us"] = time_call(check_collisions, repeat)
+                row[name + "_score_us"] = time_call(check_scores, repeat)
+            rows.append(row)
+    return rows
+
+def make_screen_manager(backend, count, seed=0):
+    """
+    Create an obstacle manager with `count` obstacles spread over the screen
+    Obstacles barely move and nothing spawns, so the count stays fixed while timing
+    """
+    manager = make_obstacle_manager(backend)
+    manager.spawn_interval = 10**9
+    rng = random.Random(seed)
+    for _ in range(count):
+        obstacle = Obstacle(rng.uniform(-2.5, 2.5), rng.uniform(-5, 6))
+        obstacle.speed = 1e-6
+        manager.add_obstacle(obstacle)
+    return manager
+
+def bench_micro(obstacle_counts=OBSTACLE_COUNTS, backends=BACKENDS):
+    """
+    Time ObstacleManager.update, check_collision, check_score, Road.update,
+    TrafficManager.update and Simulation snapshots
+    Returns: dict of metric name -> microseconds per call
+    """
+    metrics = {}
+    car = Car(x=4)  # beside all obstacles, so collision checks scan everything
+    for backend in backends:
+        for count in obstacle_counts:
+            manager = make_screen_manager(backend, count)
+            manager.check_score(car)  # score obstacles already below the car once
+            prefix = f"micro.{backend}"
+            metrics[f"{prefix}.update.{count}"] = time_for(manager.update)
+            metrics[f"{prefix}.check_collision.{count}"] = time_for(lambda: manager.check_collision(car))
+            metrics[f"{prefix}.check_score.{count}"] = time_for(lambda: manager.check_score(car))
+
+    metrics["micro.road.update"] = time_for(Road().update)
+
+    # Traffic model (one vehicle per 10 units of lane, after it settles)
+    for count in obstacle_counts:
+        traffic = TrafficManager(count, lanes=3, seed=0)
+        for _ in range(60):
+            traffic.update(car)
+        metrics[f"micro.traffic.update.{count}"] = time_for(lambda: traffic.update(car))
+
+    # Snapshot and rollback of a game in progress (used by lookahead search)
+    simulation = Simulation(seed=0)
+    for _ in range(600):
+        simulation.step(*dodge_controller(simulation))
+    state = simulation.get_state()
+    metrics["micro.simulation.get_state"] = time_for(simulation.get_state)
+    metrics["micro.simulation.set_state"] = time_for(lambda: simulation.set_state(state))
+    return metrics
+
+def bench_e2e(frames=600, gl="egl"):
+    """
+    Run the full update + render loop with software OpenGL
+    gl: "egl" renders offscreen with Mesa (no display needed), "window" opens a
+        normal pygame window (run under Xvfb on machines without a display)
+    Returns: dict of metric name -> value
+    """
+    start = time.perf_counter()
+    if gl == "egl":
+        # Must be imported before OpenGL, so only import it here
+        from offscreen import OffscreenGameWindow
+        game = OffscreenGameWindow(800, 600, "uncapped")
+    else:
+        from main import GameWindow
+        game = GameWindow(800, 600, "uncapped")
+    init_time = time.perf_counter() - start
+
+    simulation = game.simulation
+    game.start_game()
+    game.render()  # first frame compiles display lists and text textures
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        if simulation.game_over:
+            game.start_game()
+        left, right = dodge_controller(simulation)
+        simulation.step(left, right)
+        game.render()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "e2e.fps": frames / elapsed,
+        "e2e.frame_ms": elapsed / frames * 1000,
+        "startup.window_init_ms": init_time * 1000,
+    }
+
+def bench_startup(repeat=5):
+    """
+    Time fresh Python processes importing the simulation and the game
+    Returns: dict of metric name -> median milliseconds
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    metrics = {}
+    for name, code in (("python", "pass"), ("import_simulation", "import simulation"),
+                       ("import_main", "import main")):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=here, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append((time.perf_counter() - start) * 1000)
+        metrics[f"startup.{name}_ms"] = statistics.median(times)
+    return metrics
+
+def spatial_metrics(rows):
+    """
+    Turn bench_spatial_index rows into metrics
+    """
+    metrics = {}
+    for row in rows:
+        for column, value in row.items():
+            if column.endswith("_us"):
+                metrics[f"spatial.{column}.{row['obstacles']}x{row['cars']}"] = value
+    return metrics
+
+def higher_is_better(name):
+    """
+    Whether a bigger value of a metric is an improvement
+    """
+    return name.endswith("fps")
+
+def compare(metrics, baseline, threshold):
+    """
+    Find metrics that got worse than the baseline by more than `threshold`
+    threshold: allowed relative change (0.1 = 10%)
+    Returns: list of (name, baseline value, new value, relative change)
+    """
+    regressions = []
+    for name, value in metrics.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = (value - old) / old
+        if higher_is_better(name):
+            change = -change
+        if change > threshold:
+            regressions.append((name, old, value, change))
+    return regressions
+
+def print_rows(rows):
+    """
+    Print result rows as a table
+    """
+    columns = list(rows[0])
+    print("  ".join(f"{column:>20}" for column in columns))
+    for row in rows:
+        print("  ".join(f"{row[column]:>20.1f}" if isinstance(row[column], float)
+                        else f"{row[column]:>20}" for column in columns))
+
+def main():
+    """
+    Run benchmarks, print their results and optionally save or compare a baseline
+    """
+    parser = argparse.ArgumentParser(description="Benchmark simulation, rendering and startup")
+    parser.add_argument("--suites", default="micro,e2e,startup",
+                        help="comma separated suites: micro, spatial, e2e, startup")
+    parser.add_argument("--max-obstacles", type=int, default=100000,
+                        help="largest obstacle count to measure")
+    parser.add_argument("--frames", type=int, default=600, help="frames in the end-to-end run")
+    parser.add_argument("--gl", choices=["egl", "window"], default="egl",
+                        help="OpenGL context for the end-to-end run")
+    parser.add_argument("--save", metavar="PATH", help="save results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare results with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    suites = args.suites.split(",")
+    counts = [count for count in OBSTACLE_COUNTS if count <= args.max_obstacles]
+    metrics = {}
+
+    if "micro" in suites:
+        metrics.update(bench_micro(counts))
+    if "spatial" in suites:
+        rows = bench_spatial_index([count for count in counts if count >= 100])
+        print("Spatial index (time per query batch, microseconds)")
+        print_rows(rows)
+        metrics.update(spatial_metrics(rows))
+    if "e2e" in suites:
+        metrics.update(bench_e2e(args.frames, args.gl))
+    if "startup" in suites:
+        metrics.update(bench_startup())
+
+    for name, value in metrics.items():
+        print(f"{name:>40}: {value:12.3f}")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"python": sys.version.split()[0], "metrics": metrics}, file, indent=2)
+        print(f"Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["metrics"]
+        regressions = compare(metrics, baseline, args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
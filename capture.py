@@ -0,0 +1,180 @@
+"""
+Capture file - contains FrameCapture, which records rendered frames to a PNG
+sequence or a raw RGBA video stream without stalling the render loop
+"""
+import ctypes
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+from OpenGL.GL import (
+    GL_COLOR_ATTACHMENT0, GL_COLOR_BUFFER_BIT, GL_DRAW_FRAMEBUFFER, GL_FRAMEBUFFER,
+    GL_FRAMEBUFFER_COMPLETE, GL_NEAREST, GL_PIXEL_PACK_BUFFER, GL_READ_FRAMEBUFFER,
+    GL_READ_ONLY, GL_RENDERBUFFER, GL_RGBA, GL_RGBA8, GL_STREAM_READ, GL_UNSIGNED_BYTE,
+    glBindBuffer, glBindFramebuffer, glBindRenderbuffer, glBlitFramebuffer, glBufferData,
+    glCheckFramebufferStatus, glDeleteBuffers, glDeleteFramebuffers, glDeleteRenderbuffers,
+    glFramebufferRenderbuffer, glGenBuffers, glGenFramebuffers, glGenRenderbuffers,
+    glMapBuffer, glPixelStorei, glRenderbufferStorage, glUnmapBuffer, GL_PACK_ALIGNMENT,
+)
+# The raw binding accepts a byte offset into the bound pixel buffer
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as glReadPixelsToBuffer
+
+CAPTURE_FORMATS = ["png", "raw"]
+
+def encode_png(pixels, width, height, level=1):
+    """
+    Encode top-down RGBA rows as a PNG file
+    level: zlib compression level (1 is fast and still much smaller than raw)
+    Returns: bytes
+    """
+    # Every row starts with filter type 0 (none)
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 4)
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data +
+                struct.pack(">I", zlib.crc32(kind + data)))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)  # 8-bit RGBA
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+            chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) + chunk(b"IEND", b""))
+
+class FrameCapture:
+    def __init__(self, width, height, path, capture_format="png", queue_size=8, present=True):
+        """
+        Create capture resources (needs a current OpenGL context)
+        path: directory for a PNG sequence, or file for a raw RGBA stream
+        capture_format: "png" or "raw"
+        queue_size: frames waiting for the writer thread; when the queue is full
+                    the render loop waits instead of using more memory
+        present: copy each frame to the window (False when there is no window to show)
+        """
+        self.width = width
+        self.height = height
+        self.path = path
+        self.capture_format = capture_format
+        self.frame_size = width * height * 4
+        self.present = present
+
+        # Offscreen framebuffer the game renders into
+        self.framebuffer = glGenFramebuffers(1)
+        self.renderbuffer = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.renderbuffer)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.renderbuffer)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("Capture framebuffer is not complete")
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+        # Two pixel buffers: frame N is read into one while frame N-1 is copied
+        # out of the other, so the copy never waits for the GPU
+        self.pixel_buffers = list(glGenBuffers(2))
+        for pixel_buffer in self.pixel_buffers:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pixel_buffer)
+            glBufferData(GL_PIXEL_PACK_BUFFER, self.frame_size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.current = 0  # pixel buffer the next frame is read into
+        self.pending = [None, None]  # frame number waiting in each pixel buffer
+
+        # Writer thread (zlib and file writes release the GIL)
+        if capture_format == "png":
+            os.makedirs(path, exist_ok=True)
+            self.stream = None
+        else:
+            self.stream = open(path, "wb")
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.writer = threading.Thread(target=self._write_frames, daemon=True)
+        self.writer.start()
+
+        # Statistics
+        self.frames_captured = 0
+        self.frames_written = 0
+        self.wait_time = 0.0  # seconds the render loop waited for the writer
+
+    def begin_frame(self):
+        """
+        Send the following drawing to the capture framebuffer
+        """
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+
+    def end_frame(self):
+        """
+        Start reading the frame back, hand the previous frame to the writer and
+        copy the frame to the window (when presenting)
+        """
+        # Queue an asynchronous read of this frame into the current pixel buffer
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.framebuffer)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pixel_buffers[self.current])
+        glReadPixelsToBuffer(0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE,
+                             ctypes.c_void_p(0))
+        self.pending[self.current] = self.frames_captured
+        self.frames_captured += 1
+
+        # The other buffer holds the previous frame, which is ready by now
+        self.current = 1 - self.current
+        self._collect(self.current)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+        # Show the frame in the window too (the copy is not free with software OpenGL)
+        if self.present:
+            glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+            glBlitFramebuffer(0, 0, self.width, self.height, 0, 0, self.width, self.height,
+                              GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def _collect(self, index):
+        """
+        Copy the frame waiting in a pixel buffer into the writer queue
+        """
+        frame = self.pending[index]
+        if frame is None:
+            return
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.pixel_buffers[index])
+        address = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        data = ctypes.string_at(address, self.frame_size)
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        self.pending[index] = None
+
+        # Blocks while the writer is behind (backpressure)
+        start = time.perf_counter()
+        self.queue.put((frame, data))
+        self.wait_time += time.perf_counter() - start
+
+    def _write_frames(self):
+        """
+        Writer thread: encode and save frames until the None sentinel arrives
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            frame, data = item
+
+            # OpenGL rows start at the bottom; files expect the top row first
+            pixels = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width * 4)[::-1]
+            if self.stream is not None:
+                self.stream.write(pixels.tobytes())
+            else:
+                with open(os.path.join(self.path, f"frame_{frame:06d}.png"), "wb") as file:
+                    file.write(encode_png(pixels, self.width, self.height))
+            self.frames_written += 1
+
+    def close(self):
+        """
+        Save the last frame, wait for the writer and free the OpenGL objects
+        """
+        self._collect(1 - self.current)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        self.queue.put(None)
+        self.writer.join()
+        if self.stream is not None:
+            self.stream.close()
+
+        glDeleteBuffers(2, self.pixel_buffers)
+        glDeleteRenderbuffers(1, [self.renderbuffer])
+        glDeleteFramebuffers(1, [self.framebuffer])
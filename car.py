@@ -2,7 +2,6 @@
 Car file - contains Car class for drawing and updating car position
 """
 import math
-from OpenGL.GL import *
 
 class Car:
     def __init__(self, x=0, y=-3, width=1.5, height=0.8):
@@ -13,21 +12,38 @@ class Car:
         """
         self.x = x
         self.y = y
+        self.previous_x = x  # position before the last update (for render interpolation)
         self.width = width
         self.height = height
         self.speed = 0.1  # car movement speed
         self.wheel_radius = 0.2  # wheel radius
+        self.wheel_segments = 20  # segments of a wheel circle (fewer at lower quality levels)
         
-    def update(self, keys):
+        # Movement during the last update (for swept collision checks, see sweep.py)
+        self.sweep_start = x  # x when the update started
+        self.sweep_velocity = 0  # x change per frame before reaching the screen edge
+        
+    def update(self, left=False, right=False, frames=1):
         """
-        Update car position based on pressed keys
+        Update car position based on the requested actions
+        left, right: True when the car should move in that direction
+        frames: number of frames to move at once (coarse simulation steps)
         """
-        import pygame
+        self.sweep_start = self.x
+        self.sweep_velocity = (self.speed if right else 0) - (self.speed if left else 0)
+        if frames > 1:
+            # Straight line clipped at the screen edges (the same positions as
+            # moving one frame at a time); previous_x is one frame before the end
+            self.previous_x = min(max(self.x + self.sweep_velocity * (frames - 1), -4), 4)
+            self.x = min(max(self.x + self.sweep_velocity * frames, -4), 4)
+            return
+        
+        self.previous_x = self.x
         
-        # Move right and left using keyboard arrows
-        if keys[pygame.K_LEFT]:
+        # Move right and left (actions come from keyboard arrows or a controller)
+        if left:
             self.x -= self.speed
-        if keys[pygame.K_RIGHT]:
+        if right:
             self.x += self.speed
             
         # Prevent car from going outside screen boundaries
@@ -36,11 +52,31 @@ class Car:
         if self.x > 4:
             self.x = 4
     
+    def get_state(self):
+        """
+        Snapshot of the car state that changes while playing
+        Returns: (x, previous_x)
+        """
+        return self.x, self.previous_x
+    
+    def set_state(self, state):
+        """
+        Restore a snapshot from get_state
+        """
+        self.x, self.previous_x = state
+    
     def draw(self):
         """
         Draw the car using OpenGL
         """
-        # Save current matrix state
+        # Import OpenGL here so the simulation can run without it
+        from OpenGL.GL import (glPushMatrix, glPopMatrix, glTranslatef, glVertex2f,
+                               GL_QUADS, GL_TEXTURE_2D)
+        from gl_state import render_state
+        
+        # Save current matrix state (matrix calls are not allowed inside glBegin)
+        render_state.disable(GL_TEXTURE_2D)
+        render_state.flush()
         glPushMatrix()
         
         # Move coordinate system to car position
@@ -48,22 +84,22 @@ class Car:
         glTranslatef(self.x, self.y, 0)
         
         # Draw car body (blue rectangle)
-        glColor3f(0.2, 0.4, 0.8)  # blue color for car
-        glBegin(GL_QUADS)  # start drawing quadrilateral
+        render_state.color3(0.2, 0.4, 0.8)  # blue color for car
+        render_state.begin(GL_QUADS)  # start drawing quadrilateral
         glVertex2f(-self.width/2, -self.height/2)  # bottom left point
         glVertex2f(self.width/2, -self.height/2)   # bottom right point
         glVertex2f(self.width/2, self.height/2)    # top right point
         glVertex2f(-self.width/2, self.height/2)   # top left point
-        glEnd()  # end drawing polygon
+        render_state.end()  # end drawing polygon
         
         # Draw car window (small white rectangle)
-        glColor3f(0.8, 0.9, 1.0)  # bluish white color for window
-        glBegin(GL_QUADS)
+        render_state.color3(0.8, 0.9, 1.0)  # bluish white color for window
+        render_state.begin(GL_QUADS)
         glVertex2f(-self.width/3, -self.height/4)
         glVertex2f(self.width/3, -self.height/4)
         glVertex2f(self.width/3, self.height/4)
         glVertex2f(-self.width/3, self.height/4)
-        glEnd()
+        render_state.end()
         
         # Draw left wheel
         self._draw_wheel(-self.width/2.5, -self.height/2 - 0.1)
@@ -72,28 +108,33 @@ class Car:
         self._draw_wheel(self.width/2.5, -self.height/2 - 0.1)
         
         # Restore previous matrix state
+        render_state.flush()
         glPopMatrix()
     
     def _draw_wheel(self, x, y):
         """
         Draw a single wheel at the specified position
         """
-        glColor3f(0.1, 0.1, 0.1)  # black color for wheel
-        glBegin(GL_TRIANGLE_FAN)  # use triangles to draw circle
+        from OpenGL.GL import glVertex2f, GL_TRIANGLE_FAN, GL_LINE_LOOP
+        from gl_state import render_state
+        
+        render_state.color3(0.1, 0.1, 0.1)  # black color for wheel
+        render_state.begin(GL_TRIANGLE_FAN)  # use triangles to draw circle
         glVertex2f(x, y)  # center point
         
         # Draw circle using points around the circumference
-        for i in range(21):  # 20 triangles + center point = circle
-            angle = 2 * math.pi * i / 20
+        segments = self.wheel_segments
+        for i in range(segments + 1):  # one triangle per segment + center point = circle
+            angle = 2 * math.pi * i / segments
             glVertex2f(x + self.wheel_radius * math.cos(angle), 
                       y + self.wheel_radius * math.sin(angle))
-        glEnd()
+        render_state.end()
         
         # Add wheel rim
-        glColor3f(0.3, 0.3, 0.3)  # gray color for rim
-        glBegin(GL_LINE_LOOP)
-        for i in range(20):
-            angle = 2 * math.pi * i / 20
+        render_state.color3(0.3, 0.3, 0.3)  # gray color for rim
+        render_state.begin(GL_LINE_LOOP)
+        for i in range(segments):
+            angle = 2 * math.pi * i / segments
             glVertex2f(x + self.wheel_radius * math.cos(angle), 
                       y + self.wheel_radius * math.sin(angle))
-        glEnd() 
\ No newline at end of file
+        render_state.end() 
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Frame profiler file - measures how long each phase of a frame takes
+"""
+import csv
+import json
+import time
+
+class RingBuffer:
+    def __init__(self, capacity):
+        """
+        Create a fixed-size buffer that keeps the last `capacity` values
+        """
+        self.values = [0.0] * capacity
+        self.capacity = capacity
+        self.count = 0  # total values ever added
+        self.total = 0.0  # sum of all values ever added
+        self.maximum = 0.0  # largest value ever added
+
+    def append(self, value):
+        """
+        Add a value, overwriting the oldest one when full
+        """
+        self.values[self.count % self.capacity] = value
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def recent(self):
+        """
+        Values currently in the buffer, oldest first
+        """
+        if self.count <= self.capacity:
+            return self.values[:self.count]
+        start = self.count % self.capacity
+        return self.values[start:] + self.values[:start]
+
+    def percentiles(self, percents):
+        """
+        Percentiles of the values currently in the buffer (nearest rank)
+        Returns: list with one value per percent (0.0 when empty)
+        """
+        values = sorted(self.recent())
+        if not values:
+            return [0.0 for _ in percents]
+        return [values[min(len(values) - 1, int(len(values) * percent / 100))]
+                for percent in percents]
+
+class FrameProfiler:
+    # Frame phases in display order (sub-phases are named "phase.part")
+    PHASES = [
+        "frame", "events",
+        "update", "update.car", "update.road", "update.obstacles", "update.traffic", "update.collision", "update.score",
+        "render", "render.road", "render.buildings", "render.obstacles", "render.traffic", "render.car", "render.text",
+        "flip",
+    ]
+
+    def __init__(self, enabled=False, capacity=600):
+        """
+        Create a frame profiler
+        enabled: record timings (when False, begin/end return immediately)
+        capacity: number of recent samples kept per phase for percentiles
+        Times are CPU-side milliseconds; OpenGL work that the driver runs
+        later shows up in the phase that waits for it (usually flip)
+        """
+        self.enabled = enabled
+        self.capacity = capacity
+        self.samples = {name: RingBuffer(capacity) for name in self.PHASES}
+        self.starts = {}
+
+    def begin(self, name):
+        """
+        Mark the start of a phase
+        """
+        if not self.enabled:
+            return
+        self.starts[name] = time.perf_counter()
+
+    def end(self, name):
+        """
+        Mark the end of a phase and record its duration
+        """
+        if not self.enabled:
+            return
+        start = self.starts.pop(name, None)
+        if start is None:
+            return
+        buffer = self.samples.get(name)
+        if buffer is None:
+            buffer = self.samples[name] = RingBuffer(self.capacity)
+        buffer.append((time.perf_counter() - start) * 1000)
+
+    def summary(self):
+        """
+        Statistics per phase: session count, mean and max, and p50/p95/p99
+        of the recent samples (all in milliseconds)
+        Returns: dict of phase name -> dict of statistics
+        """
+        result = {}
+        for name, buffer in self.samples.items():
+            if buffer.count == 0:
+                continue
+            p50, p95, p99 = buffer.percentiles([50, 95, 99])
+            result[name] = {
+                "count": buffer.count,
+                "mean_ms": buffer.total / buffer.count,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "max_ms": buffer.maximum,
+            }
+        return result
+
+    def overlay_lines(self):
+        """
+        Text lines for the on-screen overlay
+        """
+        lines = []
+        for name, stats in self.summary().items():
+            lines.append(f"{name}: {stats['p50_ms']:.3f} / {stats['p95_ms']:.3f} / "
+                         f"{stats['p99_ms']:.3f} ms")
+        return lines
+
+    def export(self, path):
+        """
+        Write the summary and recent samples to a .json file, or the summary to a .csv file
+        """
+        summary = self.summary()
+        if path.endswith(".json"):
+            data = {name: dict(stats, recent_ms=self.samples[name].recent())
+                    for name, stats in summary.items()}
+            with open(path, "w") as file:
+                json.dump(data, file, indent=2)
+            return
+
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["phase", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+            for name, stats in summary.items():
+                writer.writerow([name, stats["count"], stats["mean_ms"], stats["p50_ms"],
+                                 stats["p95_ms"], stats["p99_ms"], stats["max_ms"]])
@@ -0,0 +1,201 @@
+"""
+GL state file - contains RenderState, which remembers the current OpenGL state
+and skips calls that would not change it
+"""
+from OpenGL.GL import (glBegin, glEnd, glColor3f, glColor4f, glLineWidth, glBindTexture,
+                       glEnable, glDisable, glEnableClientState, glDisableClientState,
+                       GL_QUADS, GL_TRIANGLES, GL_LINES, GL_POINTS, GL_TEXTURE_2D)
+
+# Primitives made of independent pieces, so two glBegin blocks of the same type
+# can be merged into one (strips, loops and fans can not)
+MERGEABLE_PRIMITIVES = {GL_QUADS, GL_TRIANGLES, GL_LINES, GL_POINTS}
+
+class RenderState:
+    def __init__(self):
+        """
+        Create a state tracker that knows nothing about the current state yet
+        """
+        self.invalidate()
+        self.primitive = None  # primitive of the open glBegin block (None when closed)
+        self.color_in_block = False  # color changed since the block was opened
+
+        # Counters for the current frame and the last finished frame
+        self.issued = 0  # calls sent to OpenGL
+        self.avoided = 0  # calls skipped because they changed nothing
+        self.last_issued = 0
+        self.last_avoided = 0
+
+    def invalidate(self):
+        """
+        Forget the remembered state (after display lists or other code that
+        changes OpenGL state without this tracker), so the next calls are sent
+        """
+        self.color = None
+        self.width = None
+        self.texture = None
+        self.enabled = {}  # capability -> True/False
+        self.client_enabled = {}  # client array -> True/False
+
+    def reset_color(self):
+        """
+        Forget the current color (vertex color arrays leave it undefined)
+        """
+        self.color = None
+
+    def reset_texture(self, texture_id):
+        """
+        Forget a texture binding after the texture was deleted (OpenGL binds 0)
+        """
+        if self.texture == texture_id:
+            self.texture = None
+
+    def flush(self):
+        """
+        Close the open glBegin block
+        Call before any OpenGL call that is not allowed between glBegin and glEnd
+        (matrix changes, display lists, vertex arrays, ...)
+        """
+        if self.primitive is not None:
+            glEnd()
+            self.issued += 1
+            self.primitive = None
+
+            # A color set after the last vertex of a block can be lost when the
+            # block is compiled into a display list (seen with Mesa), so set it again
+            if self.color_in_block:
+                glColor4f(*self.color)
+                self.issued += 1
+                self.color_in_block = False
+
+    def begin(self, primitive):
+        """
+        Start drawing a primitive; continues the open block when it has the
+        same (mergeable) type instead of calling glEnd and glBegin again
+        """
+        if self.primitive == primitive and primitive in MERGEABLE_PRIMITIVES:
+            self.avoided += 2
+            return
+        self.flush()
+        glBegin(primitive)
+        self.issued += 1
+        self.primitive = primitive
+        self.color_in_block = False
+
+    def end(self):
+        """
+        Finish a primitive; mergeable blocks stay open until something else
+        needs them closed
+        """
+        if self.primitive is not None and self.primitive not in MERGEABLE_PRIMITIVES:
+            self.flush()
+
+    def color3(self, red, green, blue):
+        """
+        Set the current color (allowed inside glBegin blocks)
+        """
+        color = (red, green, blue, 1.0)
+        if color == self.color:
+            self.avoided += 1
+            return
+        glColor3f(red, green, blue)
+        self.issued += 1
+        self.color = color
+        self.color_in_block = self.primitive is not None
+
+    def color4(self, red, green, blue, alpha):
+        """
+        Set the current color with transparency
+        """
+        color = (red, green, blue, alpha)
+        if color == self.color:
+            self.avoided += 1
+            return
+        glColor4f(red, green, blue, alpha)
+        self.issued += 1
+        self.color = color
+        self.color_in_block = self.primitive is not None
+
+    def line_width(self, width):
+        """
+        Set the line width
+        """
+        if width == self.width:
+            self.avoided += 1
+            return
+        self.flush()
+        glLineWidth(width)
+        self.issued += 1
+        self.width = width
+
+    def bind_texture(self, texture_id):
+        """
+        Bind a 2D texture
+        """
+        if texture_id == self.texture:
+            self.avoided += 1
+            return
+        self.flush()
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        self.issued += 1
+        self.texture = texture_id
+
+    def enable(self, capability):
+        """
+        glEnable a capability (GL_TEXTURE_2D, GL_BLEND, ...)
+        """
+        if self.enabled.get(capability) is True:
+            self.avoided += 1
+            return
+        self.flush()
+        glEnable(capability)
+        self.issued += 1
+        self.enabled[capability] = True
+
+    def disable(self, capability):
+        """
+        glDisable a capability
+        """
+        if self.enabled.get(capability) is False:
+            self.avoided += 1
+            return
+        self.flush()
+        glDisable(capability)
+        self.issued += 1
+        self.enabled[capability] = False
+
+    def enable_client(self, array):
+        """
+        glEnableClientState a vertex array (GL_VERTEX_ARRAY, GL_COLOR_ARRAY, ...)
+        """
+        if self.client_enabled.get(array) is True:
+            self.avoided += 1
+            return
+        self.flush()
+        glEnableClientState(array)
+        self.issued += 1
+        self.client_enabled[array] = True
+
+    def disable_client(self, array):
+        """
+        glDisableClientState a vertex array
+        """
+        if self.client_enabled.get(array) is False:
+            self.avoided += 1
+            return
+        self.flush()
+        glDisableClientState(array)
+        self.issued += 1
+        self.client_enabled[array] = False
+
+    def end_frame(self):
+        """
+        Close the open block and keep this frame's counters as the last frame's
+        """
+        self.flush()
+        self.last_issued = self.issued
+        self.last_avoided = self.avoided
+        self.issued = 0
+        self.avoided = 0
+
+# Shared tracker used by all drawing code (there is one OpenGL context)
+render_state = RenderState()
@@ -0,0 +1,262 @@
+"""
+Headless runner file - runs the simulation without a window as fast as possible
+"""
+import argparse
+import random
+import sys
+import time
+from obstacle import ObstacleManager
+from simulation import Simulation
+
+def idle_controller(simulation):
+    """
+    Controller that never moves the car
+    Returns: (left, right) actions
+    """
+    return False, False
+
+def dodge_controller(simulation):
+    """
+    Simple controller that moves away from the closest obstacle ahead of the car
+    Returns: (left, right) actions
+    """
+    car = simulation.car
+    car_bottom = car.y - car.height/2
+
+    # Find the closest obstacle that is still above the car
+    closest = None
+    for obstacle in simulation.obstacle_manager.obstacles:
+        if obstacle.y + obstacle.height/2 < car_bottom:
+            continue
+        if closest is None or obstacle.y < closest.y:
+            closest = obstacle
+
+    if closest is None:
+        return False, False
+
+    # Only react when the obstacle is in the car's lane
+    if abs(closest.x - car.x) > (closest.width + car.width)/2:
+        return False, False
+
+    # Move away from the obstacle
+    if closest.x >= car.x:
+        return True, False
+    return False, True
+
+# Planner shared by autopilot_controller (created on first use)
+_autopilot = None
+
+def autopilot_controller(simulation):
+    """
+    Planner from autopilot.py with a fixed amount of work per frame, so every
+    machine and worker count gives the same games (NumPy is imported on first use)
+    Returns: (left, right) actions
+    """
+    global _autopilot
+    if _autopilot is None:
+        from autopilot import Autopilot
+        _autopilot = Autopilot(budget_ms=None)
+    return _autopilot(simulation)
+
+CONTROLLERS = {
+    "idle": idle_controller,
+    "dodge": dodge_controller,
+    "autopilot": autopilot_controller,
+}
+
+BACKENDS = ("list", "indexed", "array")
+
+# Spawn intervals the checks cycle through (short ones keep many obstacles alive)
+CHECK_SPAWN_INTERVALS = (120, 30, 10, 3)
+
+def check_controller(seed):
+    """
+    Controller for the consistency checks: dodges most of the time and moves
+    at random otherwise, so games end at many different frames
+    Returns: function taking the simulation and returning (left, right)
+    """
+    rng = random.Random(seed)
+
+    def controller(simulation):
+        if rng.random() < 0.7:
+            return dodge_controller(simulation)
+        return rng.random() < 0.5, rng.random() < 0.5
+    return controller
+
+def check_backends(seeds=range(20), max_frames=5000):
+    """
+    Play the same seeded games with every obstacle backend and compare them
+    (the backends must give identical games)
+    Returns: (number of games that ended, list of mismatches as
+             (seed, dict of backend -> (score, frames, game over)))
+    """
+    ended = 0
+    mismatches = []
+    for seed in seeds:
+        outcomes = {}
+        for backend in BACKENDS:
+            simulation = Simulation(make_obstacle_manager(backend), seed)
+            simulation.configure(spawn_interval=CHECK_SPAWN_INTERVALS[seed % len(CHECK_SPAWN_INTERVALS)])
+            controller = check_controller(seed)
+            while not simulation.game_over and simulation.frame < max_frames:
+                simulation.step(*controller(simulation))
+            outcomes[backend] = (simulation.score, simulation.frame, simulation.game_over)
+        ended += outcomes["list"][2]
+        if len(set(outcomes.values())) > 1:
+            mismatches.append((seed, outcomes))
+    return ended, mismatches
+
+def check_swept(seeds=range(20), max_frames=5000, frames_per_step=(2, 4, 8)):
+    """
+    Play the same seeded games in coarse swept steps and one frame at a time,
+    holding the same actions for the same frames, and compare them (swept
+    checks must end every game on the same frame with the same score)
+    Returns: (number of games compared, list of mismatches as
+             (backend, frames per step, seed, single-frame outcome, swept outcome))
+    """
+    mismatches = []
+    games = 0
+    for backend in BACKENDS:
+        for step_frames in frames_per_step:
+            for seed in seeds:
+                outcomes = []
+                for swept in (False, True):
+                    simulation = Simulation(make_obstacle_manager(backend), seed)
+                    simulation.configure(spawn_interval=CHECK_SPAWN_INTERVALS[seed % len(CHECK_SPAWN_INTERVALS)])
+                    controller = check_controller(seed)
+                    while not simulation.game_over and simulation.frame < max_frames:
+                        left, right = controller(simulation)
+                        frames = min(step_frames, max_frames - simulation.frame)
+                        if swept:
+                            simulation.step(left, right, frames)
+                            continue
+                        for _ in range(frames):
+                            simulation.step(left, right)
+                            if simulation.game_over:
+                                break
+                    outcomes.append((simulation.score, simulation.frame, simulation.game_over))
+                games += 1
+                if outcomes[0] != outcomes[1]:
+                    mismatches.append((backend, step_frames, seed, outcomes[0], outcomes[1]))
+    return games, mismatches
+
+def make_obstacle_manager(backend):
+    """
+    Create obstacle manager for a storage backend name ("list", "indexed" or "array")
+    """
+    if backend == "array":
+        # NumPy is only needed for the array backend
+        from obstacle_array import ObstacleArrayManager
+        return ObstacleArrayManager()
+    return ObstacleManager(spatial_index=(backend == "indexed"))
+
+def run_episode(controller, max_frames=36000, backend="list", seed=None, traffic=0, lanes=2,
+                frames_per_step=1, telemetry=None, config=None):
+    """
+    Run one game until game over or until max_frames steps
+    controller: function taking the simulation and returning (left, right)
+    backend: obstacle storage backend ("list", "indexed" or "array")
+    seed: seed for obstacle placement (None uses the global random module)
+    traffic: number of AI vehicles sharing the road (0 for none)
+    lanes: number of traffic lanes
+    frames_per_step: frames the controller's actions are held for (coarse steps
+                     are checked with swept collisions, so results match
+                     single steps holding the same actions)
+    telemetry: TelemetryRecorder that records every frame (None for no trace);
+               steps then run a frame at a time so each frame gets its own row
+    config: dict of game parameters for Simulation.configure (None keeps the defaults)
+    Returns: (score, frames survived)
+    """
+    traffic_manager = None
+    if traffic:
+        # NumPy is only needed with traffic
+        from traffic import TrafficManager
+        traffic_manager = TrafficManager(traffic, lanes)
+    simulation = Simulation(make_obstacle_manager(backend), seed, traffic_manager)
+    if config:
+        simulation.configure(**config)
+
+    while not simulation.game_over and simulation.frame < max_frames:
+        left, right = controller(simulation)
+        frames = min(frames_per_step, max_frames - simulation.frame)
+        if telemetry is None:
+            simulation.step(left, right, frames)
+            continue
+        # Hold the actions over single frames (the same result as one swept
+        # step, see check_swept) so spawns and points are recorded per frame
+        for _ in range(frames):
+            points = simulation.step(left, right)
+            telemetry.record(simulation, points)
+            if simulation.game_over:
+                break
+
+    return simulation.score, simulation.frame
+
+def main():
+    """
+    Run several headless episodes and print their results
+    """
+    parser = argparse.ArgumentParser(description="Run the car simulation without a window")
+    parser.add_argument("--episodes", type=int, default=10, help="number of games to run")
+    parser.add_argument("--max-frames", type=int, default=36000, help="frame limit per game")
+    parser.add_argument("--controller", choices=sorted(CONTROLLERS), default="dodge",
+                        help="controller that drives the car")
+    parser.add_argument("--backend", choices=BACKENDS, default="list",
+                        help="obstacle storage backend")
+    parser.add_argument("--traffic", type=int, default=0, metavar="VEHICLES",
+                        help="number of AI vehicles sharing the road")
+    parser.add_argument("--lanes", type=int, default=2, help="number of traffic lanes")
+    parser.add_argument("--frames-per-step", type=int, default=1, metavar="FRAMES",
+                        help="frames each controller decision is held for")
+    parser.add_argument("--telemetry", metavar="DIR",
+                        help="record a per-frame telemetry trace of every episode into DIR")
+    parser.add_argument("--check-backends", action="store_true",
+                        help="check that every backend plays the same seeded games, then quit")
+    parser.add_argument("--check-swept", action="store_true",
+                        help="check that coarse swept steps play the same seeded games as "
+                             "single frames, then quit")
+    args = parser.parse_args()
+
+    if args.check_swept:
+        games, mismatches = check_swept(range(args.episodes), args.max_frames)
+        for backend, step_frames, seed, single, swept in mismatches:
+            print(f"{backend}, {step_frames} frames per step, seed {seed}: single frames "
+                  f"(score, frames, game over) {single}, swept {swept}")
+        print(f"Swept steps: {games - len(mismatches)} of {games} games identical to single frames")
+        sys.exit(1 if mismatches else 0)
+
+    if args.check_backends:
+        seeds = range(args.episodes)
+        ended, mismatches = check_backends(seeds, args.max_frames)
+        for seed, outcomes in mismatches:
+            print(f"Seed {seed}: " + ", ".join(f"{backend} score {score}, frames {frames}, "
+                                               f"game over {game_over}"
+                                               for backend, (score, frames, game_over) in outcomes.items()))
+        print(f"Backends {', '.join(BACKENDS)}: {len(seeds) - len(mismatches)} of {len(seeds)} "
+              f"games identical ({ended} ended by a collision)")
+        sys.exit(1 if mismatches else 0)
+
+    controller = CONTROLLERS[args.controller]
+    telemetry = None
+    if args.telemetry:
+        from telemetry import TelemetryRecorder
+        telemetry = TelemetryRecorder(args.telemetry)
+    total_frames = 0
+    start = time.perf_counter()
+
+    for episode in range(args.episodes):
+        score, frames = run_episode(controller, args.max_frames, args.backend,
+                                    traffic=args.traffic, lanes=args.lanes,
+                                    frames_per_step=args.frames_per_step, telemetry=telemetry)
+        total_frames += frames
+        print(f"Episode {episode + 1}: score {score}, frames {frames}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Ran {total_frames} frames in {elapsed:.2f}s "
+          f"({total_frames / max(elapsed, 1e-9):.0f} steps/sec)")
+    if telemetry is not None:
+        telemetry.close()
+        print(f"Telemetry trace of {telemetry.frames} frames written to {telemetry.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+"""
+Job service file - a local server that runs simulation jobs for other tools
+Clients connect over a Unix socket (or a localhost TCP port) and send one
+JSON object per line. The service queues the jobs with asyncio and runs them
+on a pool of worker processes that start once and stay warm (modules
+imported, planner built, one short game played), so a job costs only its
+own simulation instead of a fresh Python start. Each result is sent back as
+soon as it is ready, and identical jobs that are queued or running at the
+same time run only once.
+
+Requests ("id" is any value and comes back with the answer):
+    {"id": 1, "op": "run", "seed": 7, "controller": "dodge", "max_frames": 36000,
+     "backend": "list", "config": {"spawn_interval": 90, "obstacle_speed": 0.2}}
+    {"id": 2, "op": "stats"}
+Answers:
+    {"id": 1, "seed": 7, "score": 12, "frames": 3400, "wall_time": 0.41, "shared": false}
+    {"id": 2, "queued": 0, "running": 1, "jobs_per_second": 8.5, ...}
+    {"id": 3, "error": "unknown controller 'fast'"}
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import stat
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from headless import BACKENDS, CONTROLLERS
+from parallel import run_seeded_episode, summarize, EpisodeResult
+from simulation import DEFAULT_CONFIG
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "car_road_jobs.sock")
+THROUGHPUT_WINDOW = 10.0  # seconds of finished jobs the throughput is measured over
+
+def warm_worker(ready):
+    """
+    Start of a worker process: import everything a job can use and play a
+    short game with every controller, so the first real job runs as fast as
+    the others (the autopilot planner is built here and reused)
+    ready: queue that gets the process id when the worker is warm
+    """
+    for controller in sorted(CONTROLLERS):
+        run_seeded_episode(0, controller, 60)
+    run_seeded_episode(0, "dodge", 60, "array")
+    ready.put(os.getpid())
+
+def start_worker():
+    """
+    Empty task; submitting one while no worker is idle starts a worker process
+    """
+
+def parse_job(request):
+    """
+    Check a run request and fill in the defaults
+    Returns: job tuple (seed, controller, max_frames, backend, config items),
+             equal for requests that give the same game
+    Raises: ValueError for a request that can not run
+    """
+    seed = request.get("seed")
+    if not isinstance(seed, int) or isinstance(seed, bool):
+        raise ValueError("seed must be an integer")
+    controller = request.get("controller", "dodge")
+    if controller not in CONTROLLERS:
+        raise ValueError(f"unknown controller {controller!r}")
+    max_frames = request.get("max_frames", 36000)
+    if not isinstance(max_frames, int) or max_frames < 1:
+        raise ValueError("max_frames must be a positive integer")
+    backend = request.get("backend", "list")
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}")
+
+    # Every parameter is filled in, so leaving one out and giving its
+    # default value are the same job
+    config = dict(DEFAULT_CONFIG)
+    for name, value in (request.get("config") or {}).items():
+        if name not in DEFAULT_CONFIG:
+            raise ValueError(f"unknown config parameter {name!r}")
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+            raise ValueError(f"{name} must be a positive number")
+        config[name] = value
+    if config["spawn_interval"] != int(config["spawn_interval"]):
+        raise ValueError("spawn_interval must be a whole number of frames")
+    config["spawn_interval"] = int(config["spawn_interval"])
+    if config["road_width"] <= 1:
+        raise ValueError("road_width must be more than 1")
+    return seed, controller, max_frames, backend, tuple(sorted(config.items()))
+
+class JobService:
+    def __init__(self, workers=None):
+        """
+        Create a service with `workers` worker processes (None uses every core)
+        Call start() from the event loop before serving clients
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        self.queue = asyncio.Queue()  # (job, future) waiting for a worker
+        self.inflight = {}  # job -> future of its result, while queued or running
+        self.dispatchers = []
+        self.running = 0
+        self.restart_lock = asyncio.Lock()  # one pool rebuild at a time
+
+        # Statistics
+        self.started = time.perf_counter()
+        self.submitted = 0
+        self.shared = 0  # requests answered by an identical job already in flight
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0  # pools rebuilt after a worker process died
+        self.total_frames = 0
+        self.recent = deque()  # (finish time, frames) of jobs in the throughput window
+
+    async def start(self):
+        """
+        Start the worker processes and wait until every one is warm
+        Returns: number of worker processes
+        """
+        pids = await self._start_pool()
+
+        # One dispatcher per worker, so jobs wait in the asyncio queue (where
+        # they are counted) rather than inside the pool
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        return len(set(pids))
+
+    async def _start_pool(self):
+        """
+        Create the worker pool and wait until every worker is warm
+        Returns: process ids of the workers
+        Raises: BrokenProcessPool when a worker dies while warming up
+        """
+        # Spawned workers start clean and only import what the jobs need
+        context = multiprocessing.get_context("spawn")
+        ready = context.SimpleQueue()
+        executor = self.executor = ProcessPoolExecutor(self.workers, context, initializer=warm_worker,
+                                                       initargs=(ready,))
+        for _ in range(self.workers):
+            executor.submit(start_worker)
+        pids = []
+        while True:
+            while not ready.empty():
+                pids.append(ready.get())
+            if len(pids) == self.workers:
+                return pids
+            # Submitting raises once a worker has died and broken the pool,
+            # so a dead worker can not leave this waiting forever
+            executor.submit(start_worker)
+            await asyncio.sleep(0.05)
+
+    async def _restart_pool(self, broken):
+        """
+        Replace a pool that broke because a worker process died (killed, out
+        of memory) with a new warm one; dispatchers that saw the same pool
+        break wait for the first one's rebuild
+        """
+        async with self.restart_lock:
+            if self.executor is not broken:
+                return  # already replaced
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.restarts += 1
+            await self._start_pool()
+
+    def submit(self, job):
+        """
+        Queue a job, or join an identical job that is queued or running
+        Returns: (future of its EpisodeResult, whether the job was already in flight)
+        """
+        self.submitted += 1
+        future = self.inflight.get(job)
+        if future is not None:
+            self.shared += 1
+            return future, True
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[job] = future
+        self.queue.put_nowait((job, future))
+        return future, False
+
+    async def _dispatch(self):
+        """
+        Run queued jobs one at a time on the pool
+        """
+        while True:
+            job, future = await self.queue.get()
+            self.running += 1
+            try:
+                result = await self._run(job)
+            except Exception as error:
+                self.failed += 1
+                future.set_exception(error)
+            else:
+                self.completed += 1
+                self.total_frames += result.frames
+                self.recent.append((time.perf_counter(), result.frames))
+                future.set_result(result)
+            finally:
+                self.running -= 1
+                del self.inflight[job]
+
+    async def _run(self, job):
+        """
+        Run one job on the pool; when a worker dies the pool is rebuilt and
+        the job runs once more (a job that breaks the new pool too fails)
+        Returns: EpisodeResult
+        """
+        seed, controller, max_frames, backend, config = job
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self.executor
+            try:
+                return await loop.run_in_executor(executor, run_seeded_episode, seed,
+                                                  controller, max_frames, backend, dict(config))
+            except BrokenProcessPool:
+                await self._restart_pool(executor)
+                if attempt:
+                    raise
+
+    def stats(self):
+        """
+        Queue depth, work in progress and throughput
+        Returns: dict of statistics
+        """
+        now = time.perf_counter()
+        recent = self.recent
+        while recent and recent[0][0] < now - THROUGHPUT_WINDOW:
+            recent.popleft()
+        window = max(min(THROUGHPUT_WINDOW, now - self.started), 1e-9)
+        return {
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "running": self.running,
+            "submitted": self.submitted,
+            "shared": self.shared,
+            "completed": self.completed,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "jobs_per_second": len(recent) / window,
+            "frames_per_second": sum(frames for _, frames in recent) / window,
+            "total_frames": self.total_frames,
+            "uptime": now - self.started,
+        }
+
+    async def handle_client(self, reader, writer):
+        """
+        Serve one connection: answer every request line, each as soon as it
+        is ready (answers can come back in a different order than requests)
+        """
+        answers = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self.answer(line, writer))
+                answers.add(task)
+                task.add_done_callback(answers.discard)
+
+            # The client closed its sending side; finish what it asked for
+            if answers:
+                await asyncio.gather(*answers)
+        except ConnectionError:
+            pass  # the client is gone
+        finally:
+            writer.close()
+
+    async def answer(self, line, writer):
+        """
+        Handle one request line and send its answer
+        """
+        reply = {"id": None}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+            reply["id"] = request.get("id")
+            op = request.get("op", "run")
+            if op == "run":
+                future, shared = self.submit(parse_job(request))
+                reply.update((await future)._asdict())
+                reply["shared"] = shared
+            elif op == "stats":
+                reply.update(self.stats())
+            else:
+                raise ValueError(f"unknown op {op!r}")
+        except Exception as error:
+            reply["error"] = str(error)
+
+        if writer.is_closing():
+            return
+        writer.write((json.dumps(reply) + "\n").encode())
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client is gone
+
+    def close(self):
+        """
+        Stop the dispatchers and the worker processes
+        """
+        for task in self.dispatchers:
+            task.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+async def serve(socket_path=DEFAULT_SOCKET, port=None, workers=None):
+    """
+    Run the service until it is interrupted
+    port: listen on this localhost TCP port instead of the Unix socket
+    """
+    service = JobService(workers)
+    start = time.perf_counter()
+    started = await service.start()
+    print(f"{started} workers ready in {time.perf_counter() - start:.2f}s")
+
+    if port is None:
+        # A socket file left by a service that did not shut down cleanly
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.remove(socket_path)
+        server = await asyncio.start_unix_server(service.handle_client, path=socket_path)
+        print(f"Listening on {socket_path}")
+    else:
+        server = await asyncio.start_server(service.handle_client, "127.0.0.1", port)
+        print(f"Listening on 127.0.0.1:{port}")
+
+    # Stop cleanly on SIGTERM too (sent by service managers and kill)
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        service.close()
+        if port is None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+async def connect(socket_path=DEFAULT_SOCKET, port=None):
+    """
+    Open a connection to a running service
+    Returns: (reader, writer) streams
+    """
+    if port is None:
+        return await asyncio.open_unix_connection(socket_path)
+    return await asyncio.open_connection("127.0.0.1", port)
+
+async def request(requests, socket_path=DEFAULT_SOCKET, port=None):
+    """
+    Send requests over one connection and receive the answers as they come
+    Yields: answer dicts, in the order they finish
+    """
+    reader, writer = await connect(socket_path, port)
+    try:
+        for message in requests:
+            writer.write((json.dumps(message) + "\n").encode())
+        await writer.drain()
+        for _ in range(len(requests)):
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("the service closed the connection")
+            yield json.loads(line)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def run_jobs(args):
+    """
+    Client: submit seeded episodes and print their results as they stream in
+    """
+    config = {name: value for name, value in (("spawn_interval", args.spawn_interval),
+                                              ("obstacle_speed", args.obstacle_speed),
+                                              ("car_speed", args.car_speed),
+                                              ("road_width", args.road_width))
+              if value is not None}
+    seeds = range(args.first_seed, args.first_seed + args.episodes)
+    requests = [{"id": seed, "op": "run", "seed": seed, "controller": args.controller,
+                 "max_frames": args.max_frames, "backend": args.backend, "config": config}
+                for seed in seeds]
+
+    results = []
+    start = time.perf_counter()
+    async for answer in request(requests, args.socket, args.port):
+        if "error" in answer:
+            print(f"Seed {answer['id']}: {answer['error']}")
+            continue
+        results.append(EpisodeResult(answer["seed"], answer["score"], answer["frames"],
+                                     answer["wall_time"]))
+        shared = " (shared)" if answer["shared"] else ""
+        print(f"Seed {answer['seed']}: score {answer['score']}, frames {answer['frames']}, "
+              f"{answer['wall_time']:.2f}s{shared}")
+
+    if results:
+        print("=== Summary ===")
+        for name, value in summarize(results).items():
+            print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+    print(f"Wall time: {time.perf_counter() - start:.2f}s")
+
+async def print_stats(args):
+    """
+    Client: print the statistics of a running service
+    """
+    async for answer in request([{"op": "stats"}], args.socket, args.port):
+        for name, value in answer.items():
+            if name != "id":
+                print(f"{name:>18}: {value:.2f}" if isinstance(value, float) else f"{name:>18}: {value}")
+
+def main():
+    """
+    Start the job service, or submit jobs to it and print service statistics
+    """
+    parser = argparse.ArgumentParser(description="Local service running simulation jobs on warm workers")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket of the service")
+    parser.add_argument("--port", type=int, default=None,
+                        help="use this localhost TCP port instead of the Unix socket")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_command = commands.add_parser("serve", help="start the service")
+    serve_command.add_argument("--workers", type=int, default=None,
+                               help="number of worker processes (default: every core)")
+
+    run = commands.add_parser("run", help="submit seeded episodes and print the results")
+    run.add_argument("--episodes", type=int, default=10, help="number of episodes")
+    run.add_argument("--first-seed", type=int, default=0, help="seed of the first episode")
+    run.add_argument("--max-frames", type=int, default=36000, help="frame limit per episode")
+    run.add_argument("--controller", choices=sorted(CONTROLLERS), default="dodge",
+                     help="controller that drives the car")
+    run.add_argument("--backend", choices=BACKENDS, default="list", help="obstacle storage backend")
+    run.add_argument("--spawn-interval", type=int, default=None, metavar="FRAMES",
+                     help=f"frames between obstacle spawns (default {DEFAULT_CONFIG['spawn_interval']})")
+    run.add_argument("--obstacle-speed", type=float, default=None,
+                     help=f"obstacle distance per frame (default {DEFAULT_CONFIG['obstacle_speed']})")
+    run.add_argument("--car-speed", type=float, default=None,
+                     help=f"car distance per frame (default {DEFAULT_CONFIG['car_speed']})")
+    run.add_argument("--road-width", type=float, default=None,
+                     help=f"road width (default {DEFAULT_CONFIG['road_width']})")
+
+    commands.add_parser("stats", help="print queue depth and throughput of the service")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args.socket, args.port, args.workers))
+        elif args.command == "run":
+            asyncio.run(run_jobs(args))
+        else:
+            asyncio.run(print_stats(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
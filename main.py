@@ -2,46 +2,196 @@
 Main project file - Car Road Simulation
 Simple simulation of a car moving on a straight road with obstacles
 """
+import argparse
+import os
 import pygame
+import random
+import subprocess
 import sys
+import time
 from OpenGL.GL import *
 from OpenGL.GLU import *
-from car import Car
-from road import Road
-from obstacle import ObstacleManager
+from simulation import Simulation
+from sprite_batch import SpriteBatch
 from text_renderer import TextRenderer
+from frame_profiler import FrameProfiler
+from gl_state import render_state
+from quality import QUALITY_LEVELS, QualityGovernor, LowResolutionTarget
+from replay import ReplayPlayer, ReplayWriter, read_replay
+
+# The simulation always advances in fixed steps of 1/60 second
+# (all movement constants are per step), whatever the render rate is
+SIMULATION_RATE = 60
+# Most simulation steps run before one render; a slower machine drops time
+# instead of falling further and further behind
+MAX_CATCH_UP_STEPS = 5
+# Render modes: "capped" (60 FPS), "uncapped" (as fast as possible), "vsync"
+RENDER_MODES = ["capped", "uncapped", "vsync"]
 
 class GameWindow:
-    def __init__(self, width=800, height=600):
+    # Whether frames are shown on screen (subclasses without a window set False)
+    visible = True
+    
+    def __init__(self, width=800, height=600, render_mode="capped", profile=False,
+                 profile_output=None, record_path=None, replay_path=None,
+                 capture_path=None, capture_format="png", autopilot=False, traffic=0, lanes=2,
+                 scenery_seed=None, telemetry_path=None, quality="auto"):
         """
         Create game window and initialize Pygame and OpenGL
+        render_mode: one of RENDER_MODES
+        profile: record frame phase timings from the start (F3 shows them)
+        profile_output: .csv or .json file for frame timings on exit (turns on profile)
+        record_path: log file to record every game into (see replay.py)
+        replay_path: log file to play back in real time instead of reading the keyboard
+        capture_path: save every rendered frame (directory of PNGs, or raw RGBA file)
+        capture_format: "png" or "raw"
+        autopilot: let the planner from autopilot.py drive and restart games (demo mode)
+        traffic: number of AI vehicles sharing the road (see traffic.py), 0 for none
+        lanes: number of traffic lanes
+        scenery_seed: stream procedural scenery made from this seed (see world.py)
+                      instead of the fixed trees and buildings
+        telemetry_path: directory to record a per-frame telemetry trace into (see telemetry.py)
+        quality: rendering quality level (0 is full quality, see quality.py), or
+                 "auto" to lower and raise it from measured frame times
         """
         self.width = width
         self.height = height
+        self.render_mode = render_mode
+        self.time_step = 1.0 / SIMULATION_RATE
         
-        # Initialize Pygame
-        pygame.init()
+        # Time of every startup phase in milliseconds (see --profile-startup)
+        self.startup_phases = []
+        self.startup_mark = time.perf_counter()
         
-        # Setup Pygame window with OpenGL support
-        self.screen = pygame.display.set_mode((width, height), pygame.DOUBLEBUF | pygame.OPENGL)
-        pygame.display.set_caption("Car Road Simulation - Avoid the Obstacles!")
+        # Create window with OpenGL context
+        self.create_window()
+        self.mark_startup("window")
         
         # Setup OpenGL
         self.setup_opengl()
+        self.mark_startup("opengl")
         
-        # Create game objects
-        self.car = Car()
-        self.road = Road()
-        self.obstacle_manager = ObstacleManager()
-        self.text_renderer = TextRenderer()
+        # Create game objects (the simulation owns car, road, obstacles and score)
+        traffic_manager = None
+        if traffic:
+            from traffic import TrafficManager
+            traffic_manager = TrafficManager(traffic, lanes)
+        self.simulation = Simulation(traffic=traffic_manager)
+        if scenery_seed is not None:
+            from world import World
+            self.simulation.road.scenery = World(scenery_seed)
+        self.mark_startup("simulation")
+        
+        # Fonts load in the background while the menu is shown (captured
+        # frames load them first, so every frame has its text)
+        self.text_renderer = TextRenderer(background=not capture_path)
+        self.mark_startup("text")
+        self.sprite_batch = SpriteBatch()  # draws obstacles and car in a few calls
+        self.mark_startup("sprites")
+        
+        # Rendering quality (the governor lowers it when frames take longer than 1/60 s)
+        self.quality_governor = QualityGovernor() if quality == "auto" else None
+        self.low_resolution = None  # framebuffer of the lowest level
+        self.render_end = 0.0  # perf_counter time the last frame was drawn, before flip
+        self.apply_quality(0 if quality == "auto" else int(quality))
         
         # Game state
         self.game_state = "menu"  # "menu", "playing", "game_over"
-        self.score = 0
         self.game_over_timer = 0
         
+        # Frame timing (only recorded while enabled)
+        profile = profile or bool(profile_output)
+        self.profile = profile  # timing stays on while the overlay is hidden
+        self.profiler = FrameProfiler(enabled=profile)
+        self.simulation.profiler = self.profiler if profile else None
+        self.show_profiler_overlay = False
+        self.profile_output = profile_output
+        self.overlay_lines = []
+        self.overlay_refresh = 0
+        
+        # Frame capture (renders into an offscreen framebuffer, see capture.py)
+        self.capture = None
+        if capture_path:
+            from capture import FrameCapture
+            self.capture = FrameCapture(width, height, capture_path, capture_format,
+                                        present=self.visible)
+        
+        # Autopilot (planning time is limited to 2 ms per step)
+        self.autopilot = None
+        if autopilot:
+            from autopilot import Autopilot
+            self.autopilot = Autopilot(budget_ms=2.0)
+        
+        # Input recording and replay
+        self.recorder = ReplayWriter(record_path) if record_path else None
+        
+        # Per-frame telemetry trace (NumPy is only needed when recording one)
+        self.telemetry = None
+        if telemetry_path:
+            from telemetry import TelemetryRecorder
+            self.telemetry = TelemetryRecorder(telemetry_path)
+        self.replay_player = None
+        self.replay_finished = False
+        if replay_path:
+            _, games = read_replay(replay_path)
+            self.replay_player = ReplayPlayer(games)
+        if self.replay_player is not None or self.autopilot is not None:
+            self.start_game()
+        
         # Setup clock for frame rate control
         self.clock = pygame.time.Clock()
+        self.mark_startup("options")
+        
+    def apply_quality(self, level):
+        """
+        Switch rendering to a quality level (see QUALITY_LEVELS)
+        """
+        self.quality_level = level
+        self.quality = settings = QUALITY_LEVELS[level]
+        
+        # The road rebuilds its display lists when building windows change
+        road = self.simulation.road
+        road.building_windows = settings.building_windows
+        road.show_trees = settings.trees
+        
+        if settings.line_smooth:
+            render_state.enable(GL_LINE_SMOOTH)
+        else:
+            render_state.disable(GL_LINE_SMOOTH)
+        
+        # Render into a smaller framebuffer that is scaled up to the window
+        if self.low_resolution is not None and self.low_resolution.scale != settings.resolution_scale:
+            self.low_resolution.delete()
+            self.low_resolution = None
+        if settings.resolution_scale < 1 and self.low_resolution is None:
+            self.low_resolution = LowResolutionTarget(self.width, self.height, settings.resolution_scale)
+        
+    def mark_startup(self, phase):
+        """
+        Record the time taken by a startup phase (since the previous mark)
+        """
+        now = time.perf_counter()
+        self.startup_phases.append((phase, (now - self.startup_mark) * 1000))
+        self.startup_mark = now
+        
+    def create_window(self):
+        """
+        Initialize Pygame and open a window with an OpenGL context
+        """
+        # Initialize only the display (pygame.init would also open the audio
+        # and joystick devices, which the game does not use)
+        pygame.display.init()
+        
+        # Setup Pygame window with OpenGL support (synced to the display in vsync mode)
+        self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.OPENGL,
+                                              vsync=1 if self.render_mode == "vsync" else 0)
+        pygame.display.set_caption("Car Road Simulation - Avoid the Obstacles!")
+        
+    def swap_buffers(self):
+        """
+        Show the rendered frame
+        """
+        pygame.display.flip()
         
     def setup_opengl(self):
         """
@@ -63,11 +213,11 @@ class GameWindow:
         glLoadIdentity()
         
         # Enable color blending for transparency
-        glEnable(GL_BLEND)
+        render_state.enable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
         
         # Enable line smoothing
-        glEnable(GL_LINE_SMOOTH)
+        render_state.enable(GL_LINE_SMOOTH)
         glHint(GL_LINE_SMOOTH_HINT, GL_NICEST)
         
     def handle_events(self):
@@ -84,16 +234,46 @@ class GameWindow:
                     self.start_game()
                 elif event.key == pygame.K_r and self.game_state == "game_over":
                     self.restart_game()
+                elif event.key == pygame.K_F3:
+                    self.toggle_profiler_overlay()
         return True
     
+    def toggle_profiler_overlay(self):
+        """
+        Show or hide the frame timing overlay (timing is recorded while it is
+        shown, and always with --profile)
+        """
+        self.show_profiler_overlay = not self.show_profiler_overlay
+        if self.show_profiler_overlay:
+            self.profiler.enabled = True
+            self.simulation.profiler = self.profiler
+            self.overlay_refresh = 0
+        elif not self.profile:
+            self.profiler.enabled = False
+            self.profiler.starts.clear()  # phases still open this frame
+            self.simulation.profiler = None
+    
     def start_game(self):
         """
         Start a new game
         """
+        # Every game gets its own seed so it can be recorded and replayed
+        if self.replay_player is not None:
+            seed = self.replay_player.next_game()
+            if seed is None:
+                self.replay_finished = True
+                return
+        else:
+            seed = random.randrange(2**63)
+        
+        # A game restarted before it ended is saved as it was
+        if self.recorder is not None:
+            self.recorder.end_game(self.simulation)
+        
         self.game_state = "playing"
-        self.score = 0
-        self.car = Car()
-        self.obstacle_manager.reset()
+        self.simulation.reset(seed)
+        if self.recorder is not None:
+            self.recorder.start_game(seed)
         
     def restart_game(self):
         """
@@ -106,35 +286,62 @@ class GameWindow:
         Update game state
         """
         if self.game_state == "playing":
-            # Get pressed keys state
-            keys = pygame.key.get_pressed()
+            self.profiler.begin("update")
             
-            # Update car
-            self.car.update(keys)
+            simulation = self.simulation
+            if self.replay_player is not None:
+                # Recorded actions instead of the keyboard
+                left, right = self.replay_player.actions(simulation.frame)
+            elif self.autopilot is not None:
+                left, right = self.autopilot(simulation)
+            else:
+                # Get pressed keys state and turn it into car actions
+                keys = pygame.key.get_pressed()
+                left, right = keys[pygame.K_LEFT], keys[pygame.K_RIGHT]
             
-            # Update road
-            self.road.update()
+            # Advance the simulation by one frame
+            points = simulation.step(left, right)
+            if self.recorder is not None:
+                self.recorder.record(left, right, simulation)
+            if self.telemetry is not None:
+                self.telemetry.record(simulation, points)
+            if self.replay_player is not None:
+                self.replay_player.verify(simulation)
             
-            # Update obstacles
-            self.obstacle_manager.update()
-            
-            # Check for collision
-            if self.obstacle_manager.check_collision(self.car):
+            # Check for collision (a replay also ends where the recording stopped)
+            if simulation.game_over or (self.replay_player is not None and
+                                        self.replay_player.game_finished(simulation)):
                 self.game_state = "game_over"
                 self.game_over_timer = 0
+                if self.recorder is not None:
+                    self.recorder.end_game(simulation)
+                if self.replay_player is not None:
+                    self.replay_player.verify_end(simulation)
             
-            # Check for score
-            points = self.obstacle_manager.check_score(self.car)
-            self.score += points
+            self.profiler.end("update")
             
         elif self.game_state == "game_over":
             # Update game over timer
             self.game_over_timer += 1
+            
+            # Replays and the autopilot continue with the next game after two seconds
+            if ((self.replay_player is not None or self.autopilot is not None) and
+                    self.game_over_timer >= 120):
+                self.start_game()
     
-    def render(self):
+    def render(self, alpha=1.0):
         """
         Render current frame
+        alpha: how far (0 to 1) the frame is between the previous and the
+               current simulation step, used to interpolate moving objects
         """
+        profiler = self.profiler
+        profiler.begin("render")
+        if self.capture is not None:
+            self.capture.begin_frame()
+        if self.low_resolution is not None:
+            self.low_resolution.begin_frame()
+        
         # Clear screen
         # glClear: clear color buffer
         glClear(GL_COLOR_BUFFER_BIT)
@@ -142,51 +349,105 @@ class GameWindow:
         # Load identity matrix (reset transformations)
         glLoadIdentity()
         
+        simulation = self.simulation
+        
+        # Only interpolate while the game is moving
+        if self.game_state != "playing":
+            alpha = 1.0
+        
+        # Draw road and background
+        profiler.begin("render.road")
+        simulation.road.draw(alpha)
+        profiler.end("render.road")
+        
+        # Draw buildings
+        profiler.begin("render.buildings")
+        simulation.road.draw_buildings(alpha)
+        profiler.end("render.buildings")
+        
+        # Draw obstacles (not on the menu)
+        profiler.begin("render.obstacles")
+        if self.game_state != "menu":
+            self.sprite_batch.draw_obstacles(simulation.obstacle_manager, alpha)
+        profiler.end("render.obstacles")
+        
+        # Draw traffic (not on the menu)
+        profiler.begin("render.traffic")
+        if self.game_state != "menu" and simulation.traffic is not None:
+            simulation.traffic.draw(simulation.car, alpha)
+        profiler.end("render.traffic")
+        
+        # Draw car (a new game has a new car, so set its detail every frame)
+        profiler.begin("render.car")
+        simulation.car.wheel_segments = self.quality.wheel_segments
+        self.sprite_batch.draw_car(simulation.car, alpha)
+        profiler.end("render.car")
+        
+        profiler.begin("render.text")
         if self.game_state == "menu":
-            # Draw road background
-            self.road.draw()
-            self.road.draw_buildings()
-            
-            # Draw car
-            self.car.draw()
-            
             # Draw menu text
             self.text_renderer.render_instructions()
-            
         elif self.game_state == "playing":
-            # Draw road and background
-            self.road.draw()
-            
-            # Draw buildings (optional)
-            self.road.draw_buildings()
-            
-            # Draw obstacles
-            self.obstacle_manager.draw()
-            
-            # Draw car
-            self.car.draw()
-            
             # Draw score
-            self.text_renderer.render_score(self.score)
-            
+            self.text_renderer.render_score(simulation.score)
         elif self.game_state == "game_over":
-            # Draw road and background
-            self.road.draw()
-            
-            # Draw buildings (optional)
-            self.road.draw_buildings()
-            
-            # Draw obstacles
-            self.obstacle_manager.draw()
-            
-            # Draw car
-            self.car.draw()
-            
             # Draw game over screen
-            self.text_renderer.render_game_over(self.score)
+            self.text_renderer.render_game_over(simulation.score)
         
-        # Display frame on screen
-        pygame.display.flip()
+        # Show the quality level when it is not full quality (left out until
+        # the fonts are loaded, like the instructions, so the menu does not wait)
+        fonts_ready = not self.text_renderer.fonts_loading()
+        if self.quality_level > 0 and fonts_ready:
+            self.text_renderer.render_text_atlas(f"Quality {self.quality_level}: {self.quality.name}",
+                                                 -9.5, -5.7, (1.0, 1.0, 1.0))
+        
+        # Draw frame timing overlay
+        if self.show_profiler_overlay and fonts_ready:
+            self.render_profiler_overlay()
+        profiler.end("render.text")
+        
+        # Close the last glBegin block and count this frame's state calls
+        render_state.end_frame()
+        
+        # Scale a low resolution frame up to the window (or the capture framebuffer)
+        if self.low_resolution is not None:
+            self.low_resolution.end_frame(self.capture.framebuffer if self.capture is not None else 0)
+        profiler.end("render")
+        
+        # Read the frame back for capture (finishes a frame later, without waiting)
+        if self.capture is not None:
+            self.capture.end_frame()
+        
+        # Display frame on screen (flip waits for the display with vsync)
+        self.render_end = time.perf_counter()
+        profiler.begin("flip")
+        self.swap_buffers()
+        profiler.end("flip")
+    
+    def render_profiler_overlay(self):
+        """
+        Draw frame phase timings (p50 / p95 / p99) in the top-right corner
+        """
+        # Percentiles are recomputed twice a second, not every frame
+        if self.overlay_refresh <= 0:
+            self.overlay_lines = self.profiler.overlay_lines()
+            self.overlay_refresh = 30
+        self.overlay_refresh -= 1
+        
+        lines = self.overlay_lines + [f"gl state calls: {render_state.last_issued} sent / "
+                                      f"{render_state.last_avoided} skipped"]
+        governor = self.quality_governor
+        if governor is not None:
+            lines.append(f"quality {self.quality_level} ({self.quality.name}), auto: "
+                         f"{governor.last_average:.1f} ms average, {governor.changes} changes")
+        else:
+            lines.append(f"quality {self.quality_level} ({self.quality.name}), fixed")
+        scenery = self.simulation.road.scenery
+        if scenery is not None:
+            lines.append(f"scenery: {len(scenery.chunks)} chunks cached, {scenery.chunks_generated} built, "
+                         f"{scenery.chunks_missed} late, {scenery.lists_evicted} lists evicted")
+        for i, line in enumerate(lines):
+            self.text_renderer.render_text_atlas(line, 3, 5.3 - i * 0.3, (1.0, 1.0, 1.0))
     
     def run(self):
         """
@@ -198,34 +459,205 @@ class GameWindow:
         print("- LEFT/RIGHT arrow keys: Move car")
         print("- SPACE: Start game")
         print("- R: Restart after game over")
+        print("- F3: Show frame timings")
         print("- ESC: Quit game")
         print("==============================================")
         
         running = True
+        previous_time = time.perf_counter()
+        accumulator = 0.0  # real time not yet simulated
         while running:
+            frame_start = time.perf_counter()
+            self.profiler.begin("frame")
+            
             # Handle events
-            running = self.handle_events()
+            self.profiler.begin("events")
+            running = self.handle_events() and not self.replay_finished
+            self.profiler.end("events")
             
-            # Update game state
-            self.update()
+            # Update game state in fixed steps for the real time that passed
+            now = time.perf_counter()
+            accumulator += now - previous_time
+            previous_time = now
             
-            # Render frame
-            self.render()
+            steps = 0
+            while accumulator >= self.time_step and steps < MAX_CATCH_UP_STEPS:
+                self.update()
+                accumulator -= self.time_step
+                steps += 1
             
-            # Control frame rate (60 FPS)
-            self.clock.tick(60)
+            # Too far behind: drop the backlog instead of spiraling
+            if steps == MAX_CATCH_UP_STEPS:
+                accumulator = min(accumulator, self.time_step)
+            
+            # Render frame between the last two simulation steps
+            self.render(accumulator / self.time_step)
+            
+            # Pick the quality level from the time the frame's work took
+            # (events, updates and drawing), without flip, which waits for the
+            # display in vsync mode, and without the wait for the frame rate limit
+            if self.quality_governor is not None:
+                level = self.quality_governor.update((self.render_end - frame_start) * 1000)
+                if level != self.quality_level:
+                    self.apply_quality(level)
+                    print(f"Quality level {level}: {self.quality.name}")
+            
+            # Control frame rate (60 FPS in capped mode)
+            if self.render_mode == "capped":
+                self.clock.tick(60)
+            else:
+                self.clock.tick()
+            self.profiler.end("frame")
+        
+        # Write the last captured frames
+        if self.capture is not None:
+            self.capture.close()
+            print(f"Captured {self.capture.frames_written} frames to {self.capture.path}")
+        
+        # Finish the recording (a game still being played is saved as it is)
+        if self.recorder is not None:
+            self.recorder.close(self.simulation)
+        
+        # Write the last telemetry frames
+        if self.telemetry is not None:
+            self.telemetry.close()
+            print(f"Telemetry trace of {self.telemetry.frames} frames written to {self.telemetry.path}")
+        
+        # Stop the scenery prefetch thread
+        if self.simulation.road.scenery is not None:
+            self.simulation.road.scenery.close()
+        
+        # Save frame timings
+        if self.profile_output:
+            self.profiler.export(self.profile_output)
+            print(f"Frame timings written to {self.profile_output}")
         
         # Quit Pygame
         pygame.quit()
         sys.exit()
 
+def import_times(module="main"):
+    """
+    Time the imports of a module in a fresh interpreter (python -X importtime)
+    Returns: (list of (imported module, milliseconds) for every module it
+             imports directly, total milliseconds)
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=here, check=True, capture_output=True, text=True)
+    
+    # Lines are "import time: self | cumulative | name", where the name is
+    # indented two spaces per level and modules are listed after their imports
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative) / 1000))
+    
+    # Direct imports are the depth 1 entries just before the module itself
+    total = 0.0
+    imports = []
+    for index, (name, depth, milliseconds) in enumerate(entries):
+        if name == module and depth == 0:
+            total = milliseconds
+            for child, child_depth, child_milliseconds in reversed(entries[:index]):
+                if child_depth == 0:
+                    break
+                if child_depth == 1:
+                    imports.append((child, child_milliseconds))
+            imports.reverse()
+            break
+    return imports, total
+    
+def profile_startup(window_class=GameWindow):
+    """
+    Print the time spent importing every module main imports, in every
+    GameWindow startup phase, on the first frames and loading fonts
+    window_class: GameWindow or a subclass (offscreen.OffscreenGameWindow
+                  profiles without a display)
+    """
+    imports, total = import_times()
+    print("Imports (fresh interpreter)")
+    for name, milliseconds in sorted(imports, key=lambda item: -item[1]):
+        print(f"{name:>24}: {milliseconds:8.1f} ms")
+    print(f"{'import main':>24}: {total:8.1f} ms")
+    
+    start = time.perf_counter()
+    game = window_class(800, 600, "uncapped")
+    print("GameWindow startup")
+    for phase, milliseconds in game.startup_phases:
+        print(f"{phase:>24}: {milliseconds:8.1f} ms")
+    
+    # First frame (menu without text while the fonts load), then the menu text
+    mark = time.perf_counter()
+    game.render()
+    game.swap_buffers()
+    first_frame = time.perf_counter()
+    game.text_renderer._get_font("normal")
+    fonts_ready = time.perf_counter()
+    game.render()
+    game.swap_buffers()
+    text_frame = time.perf_counter()
+    print(f"{'first frame':>24}: {(first_frame - mark) * 1000:8.1f} ms")
+    print(f"{'wait for fonts':>24}: {(fonts_ready - first_frame) * 1000:8.1f} ms")
+    print(f"{'first frame with text':>24}: {(text_frame - fonts_ready) * 1000:8.1f} ms")
+    print(f"{'window to first frame':>24}: {(first_frame - start) * 1000:8.1f} ms")
+    pygame.quit()
+    
 def main():
     """
     Main function to run the game
     """
+    parser = argparse.ArgumentParser(description="Car Road Simulation")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="capped",
+                        help="frame rate limit for rendering (the simulation always runs at 60 steps/sec)")
+    parser.add_argument("--profile", action="store_true",
+                        help="record frame phase timings from the start")
+    parser.add_argument("--profile-output", metavar="PATH",
+                        help="write frame timings to a .csv or .json file on exit")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the seed and key presses of every game into a replay log")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="play back a replay log in real time, checking it matches")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="save every rendered frame (PNG directory or raw RGBA file)")
+    parser.add_argument("--capture-format", choices=["png", "raw"], default="png",
+                        help="png: numbered PNG files, raw: one RGBA stream (top row first)")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="let the planner drive (restarts games by itself, for demos)")
+    parser.add_argument("--traffic", type=int, default=0, metavar="VEHICLES",
+                        help="add AI vehicles driving on a ring road (collide with them, score by passing them)")
+    parser.add_argument("--lanes", type=int, default=2, help="number of traffic lanes")
+    parser.add_argument("--scenery-seed", type=int, default=None, metavar="SEED",
+                        help="stream endless procedural scenery made from this seed")
+    parser.add_argument("--telemetry", metavar="DIR",
+                        help="record a per-frame telemetry trace (memory-mapped columns) into DIR")
+    parser.add_argument("--quality", choices=["auto"] + [str(level) for level in range(len(QUALITY_LEVELS))],
+                        default="auto",
+                        help=f"rendering quality level, 0 (full) to {len(QUALITY_LEVELS) - 1} "
+                             "(half resolution), or auto to follow the frame time")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print import and startup phase times, then quit")
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        profile_startup()
+        return
+    
+    # Replay logs do not store traffic settings
+    if args.traffic and (args.record or args.replay):
+        parser.error("--traffic can not be combined with --record or --replay")
+    
     try:
         # Create and run game
-        game = GameWindow(800, 600)
+        game = GameWindow(800, 600, args.render_mode, args.profile, args.profile_output,
+                          args.record, args.replay, args.capture, args.capture_format,
+                          args.autopilot, args.traffic, args.lanes, args.scenery_seed,
+                          args.telemetry, args.quality)
         game.run()
     except Exception as e:
         print(f"Error running game: {e}")
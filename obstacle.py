@@ -3,15 +3,25 @@ Obstacle file - contains Obstacle class for managing obstacles in the game
 """
 import random
 import math
-from OpenGL.GL import *
+from spatial_index import SpatialHash
+from sweep import CAR_LIMIT, overlap_times, first_contact, passing_frame
 
 class Obstacle:
+    # Fixed fields instead of a per-object __dict__ (smaller, faster attribute access)
+    __slots__ = ("x", "y", "width", "height", "speed", "scored")
+    
     def __init__(self, x, y, width=0.8, height=0.8):
         """
         Create an obstacle object
         x, y: obstacle position in 3D space
         width, height: obstacle width and height
         """
+        self.reset(x, y, width, height)
+        
+    def reset(self, x, y, width=0.8, height=0.8):
+        """
+        Set every field as for a new obstacle (lets ObstacleManager reuse objects)
+        """
         self.x = x
         self.y = y
         self.width = width
@@ -29,42 +39,50 @@ class Obstacle:
         """
         Draw the obstacle using OpenGL
         """
-        # Save current matrix state
+        # Import OpenGL here so the simulation can run without it
+        from OpenGL.GL import (glPushMatrix, glPopMatrix, glTranslatef, glVertex2f,
+                               GL_QUADS, GL_LINE_LOOP, GL_LINES, GL_TEXTURE_2D)
+        from gl_state import render_state
+        
+        # Save current matrix state (matrix calls are not allowed inside glBegin)
+        render_state.disable(GL_TEXTURE_2D)
+        render_state.flush()
         glPushMatrix()
         
         # Move coordinate system to obstacle position
         glTranslatef(self.x, self.y, 0)
         
         # Draw obstacle main body (red rectangle)
-        glColor3f(0.8, 0.2, 0.2)  # red color for obstacle
-        glBegin(GL_QUADS)
+        render_state.color3(0.8, 0.2, 0.2)  # red color for obstacle
+        render_state.begin(GL_QUADS)
         glVertex2f(-self.width/2, -self.height/2)  # bottom left
         glVertex2f(self.width/2, -self.height/2)   # bottom right
         glVertex2f(self.width/2, self.height/2)    # top right
         glVertex2f(-self.width/2, self.height/2)   # top left
-        glEnd()
+        render_state.end()
         
         # Draw obstacle border (black outline)
-        glColor3f(0.0, 0.0, 0.0)  # black color for border
-        glLineWidth(2)
-        glBegin(GL_LINE_LOOP)
+        render_state.color3(0.0, 0.0, 0.0)  # black color for border
+        render_state.line_width(2)
+        render_state.begin(GL_LINE_LOOP)
         glVertex2f(-self.width/2, -self.height/2)
         glVertex2f(self.width/2, -self.height/2)
         glVertex2f(self.width/2, self.height/2)
         glVertex2f(-self.width/2, self.height/2)
-        glEnd()
+        render_state.end()
         
         # Draw warning stripes on obstacle
-        glColor3f(1.0, 1.0, 0.0)  # yellow color for stripes
-        glLineWidth(1)
+        render_state.color3(1.0, 1.0, 0.0)  # yellow color for stripes
+        render_state.line_width(1)
         for i in range(3):
             stripe_y = -self.height/2 + (i + 1) * self.height/4
-            glBegin(GL_LINES)
+            render_state.begin(GL_LINES)
             glVertex2f(-self.width/2 + 0.1, stripe_y)
             glVertex2f(self.width/2 - 0.1, stripe_y)
-            glEnd()
+            render_state.end()
         
         # Restore previous matrix state
+        render_state.flush()
         glPopMatrix()
     
     def is_off_screen(self):
@@ -85,33 +103,96 @@ class Obstacle:
         return left, right, top, bottom
 
 class ObstacleManager:
-    def __init__(self):
+    def __init__(self, spatial_index=False, rng=None, pool_capacity=64):
         """
         Create obstacle manager to handle multiple obstacles
+        spatial_index: keep obstacles in a spatial hash so collision and score
+                       checks only look at obstacles near the car
+        rng: random.Random used to place obstacles (the global random module by default)
+        pool_capacity: most off-screen obstacles kept for reuse by new spawns
         """
+        self.rng = rng if rng is not None else random
         self.obstacles = []
         self.spawn_timer = 0
         self.spawn_interval = 120  # spawn obstacle every 2 seconds (120 frames at 60 FPS)
+        self.spawn_count = 0  # obstacles spawned since creation (for telemetry)
         self.road_width = 6  # same as road width
         
-    def update(self):
+        # Off-screen obstacles waiting to be reused, so steady-state frames
+        # create no new objects (the game has at most ~11 alive at once)
+        self.pool = []
+        self.pool_capacity = pool_capacity
+        
+        # Broad phase indexes: all obstacles, and obstacles not scored yet
+        self.index = SpatialHash() if spatial_index else None
+        self.score_index = SpatialHash() if spatial_index else None
+        self.obstacle_speed = Obstacle(0, 0).speed  # speed of new obstacles
+        self.max_speed = self.obstacle_speed  # fastest obstacle added (bounds swept queries)
+        
+        # Obstacles removed by the last update before they were scored,
+        # as (x, y, width, height, speed), for the swept checks
+        self.leaving = []
+        
+    def update(self, frames=1):
         """
         Update all obstacles and spawn new ones
+        frames: number of frames to advance at once (coarse steps, checked with
+                sweep_collision and sweep_score); obstacles spawn on the same
+                frames and end at the same places as when updating frame by frame
         """
-        # Update spawn timer
-        self.spawn_timer += 1
-        
-        # Spawn new obstacle if it's time
-        if self.spawn_timer >= self.spawn_interval:
-            self.spawn_obstacle()
-            self.spawn_timer = 0
-        
-        # Update all obstacles
-        for obstacle in self.obstacles:
-            obstacle.update()
+        self.leaving.clear()
+        for frame in range(1, frames + 1):
+            # Update spawn timer
+            self.spawn_timer += 1
+            
+            # Spawn new obstacle if it's time
+            if self.spawn_timer >= self.spawn_interval:
+                self.spawn_obstacle()
+                self.spawn_timer = 0
+                
+                # Start it higher by the frames that passed before it appeared,
+                # so the move below puts it where frame by frame updates would
+                if frame > 1:
+                    obstacle = self.obstacles[-1]
+                    obstacle.y += obstacle.speed * (frame - 1)
         
-        # Remove obstacles that are off screen
-        self.obstacles = [obs for obs in self.obstacles if not obs.is_off_screen()]
+        # Update all obstacles and remove those that are off screen, compacting
+        # the list in place (keeps the order, no new list every frame)
+        obstacles = self.obstacles
+        index = self.index
+        score_index = self.score_index
+        kept = 0
+        for obstacle in obstacles:
+            # Move downward (same as Obstacle.update for a single frame)
+            obstacle.y -= obstacle.speed * frames
+            if obstacle.is_off_screen():
+                if not obstacle.scored:
+                    self.leaving.append((obstacle.x, obstacle.y, obstacle.width,
+                                         obstacle.height, obstacle.speed))
+                self._recycle(obstacle)
+                continue
+            
+            # Move obstacle inside the spatial indexes (both use the same cells)
+            if index is not None:
+                cell_range = index.cell_range(*obstacle.get_bounds())
+                index.move_to_cells(obstacle, cell_range)
+                if not obstacle.scored:
+                    score_index.move_to_cells(obstacle, cell_range)
+            
+            obstacles[kept] = obstacle
+            kept += 1
+        del obstacles[kept:]
+    
+    def _recycle(self, obstacle):
+        """
+        Take an obstacle out of the indexes and keep it for reuse
+        """
+        if self.index is not None:
+            self.index.remove(obstacle)
+            if obstacle in self.score_index.item_cells:
+                self.score_index.remove(obstacle)
+        if len(self.pool) < self.pool_capacity:
+            self.pool.append(obstacle)
     
     def spawn_obstacle(self):
         """
@@ -120,14 +201,65 @@ class ObstacleManager:
         # Random x position within road bounds
         road_left = -self.road_width/2 + 0.5
         road_right = self.road_width/2 - 0.5
-        x = random.uniform(road_left, road_right)
+        x = self.rng.uniform(road_left, road_right)
         
         # Start from top of screen
         y = 6
         
-        # Create new obstacle
-        obstacle = Obstacle(x, y)
+        # Reuse an old obstacle if there is one, else create a new one
+        if self.pool:
+            obstacle = self.pool.pop()
+            obstacle.reset(x, y)
+        else:
+            obstacle = Obstacle(x, y)
+        obstacle.speed = self.obstacle_speed
+        self.add_obstacle(obstacle)
+        self.spawn_count += 1
+    
+    def __len__(self):
+        """
+        Number of live obstacles
+        """
+        return len(self.obstacles)
+    
+    def add_obstacle(self, obstacle):
+        """
+        Add an obstacle to the road
+        """
         self.obstacles.append(obstacle)
+        if obstacle.speed > self.max_speed:
+            self.max_speed = obstacle.speed
+        
+        if self.index is not None:
+            bounds = obstacle.get_bounds()
+            self.index.insert(obstacle, *bounds)
+            if not obstacle.scored:
+                self.score_index.insert(obstacle, *bounds)
+    
+    def get_state(self):
+        """
+        Snapshot of the obstacles and spawn timer (plain tuples, so snapshots
+        are cheap and can be shared and restored any number of times)
+        Returns: (spawn_timer, tuple of (x, y, width, height, speed, scored))
+        """
+        return self.spawn_timer, tuple([(obstacle.x, obstacle.y, obstacle.width, obstacle.height,
+                                         obstacle.speed, obstacle.scored)
+                                        for obstacle in self.obstacles])
+    
+    def set_state(self, state):
+        """
+        Restore a snapshot from get_state (obstacle objects come from the pool)
+        """
+        spawn_timer, records = state
+        self.reset()
+        self.spawn_timer = spawn_timer
+        pool = self.pool
+        for x, y, width, height, speed, scored in records:
+            obstacle = pool.pop() if pool else Obstacle(x, y)
+            obstacle.reset(x, y, width, height)
+            obstacle.speed = speed
+            obstacle.scored = scored
+            self.add_obstacle(obstacle)
     
     def draw(self):
         """
@@ -147,13 +279,19 @@ class ObstacleManager:
         car_top = car.y + car.height/2
         car_bottom = car.y - car.height/2
         
-        for obstacle in self.obstacles:
-            # Get obstacle bounds
-            obs_left, obs_right, obs_top, obs_bottom = obstacle.get_bounds()
-            
-            # Check if rectangles overlap
-            if (car_left < obs_right and car_right > obs_left and
-                car_top > obs_bottom and car_bottom < obs_top):
+        # Only obstacles in the car's grid cells can overlap it
+        if self.index is not None:
+            candidates = self.index.query(car_left, car_right, car_top, car_bottom)
+        else:
+            candidates = self.obstacles
+        
+        for obstacle in candidates:
+            # Check if rectangles overlap (obstacle bounds as in get_bounds,
+            # computed inline to avoid a tuple per obstacle)
+            half_width = obstacle.width/2
+            half_height = obstacle.height/2
+            if (car_left < obstacle.x + half_width and car_right > obstacle.x - half_width and
+                car_top > obstacle.y - half_height and car_bottom < obstacle.y + half_height):
                 return True
         
         return False
@@ -164,19 +302,113 @@ class ObstacleManager:
         Returns: number of points scored
         """
         points = 0
+        car_bottom = car.y - car.height/2
         
-        for obstacle in self.obstacles:
+        # Only unscored obstacles reaching below the car can score
+        if self.score_index is not None:
+            candidates = self.score_index.query(-math.inf, math.inf, car_bottom, -math.inf)
+        else:
+            candidates = self.obstacles
+        
+        for obstacle in candidates:
             # If obstacle is below the car and hasn't been scored yet
-            if (obstacle.y + obstacle.height/2 < car.y - car.height/2 and 
+            if (obstacle.y + obstacle.height/2 < car_bottom and 
                 not obstacle.scored):
                 obstacle.scored = True
                 points += 1
+                if self.score_index is not None:
+                    self.score_index.remove(obstacle)
         
         return points
     
+    def sweep_collision(self, car, frames, continuous=False):
+        """
+        Swept collision check for an update of `frames` frames (the car moved
+        with Car.update(..., frames) and obstacles with update(frames))
+        Finds the exact times each obstacle overlaps the car during the step
+        continuous: also count contacts between frame ends (see sweep.first_contact)
+        Returns: first frame of the step (1 to frames) with a collision, 0 when none
+        """
+        half_car_width = car.width/2
+        half_car_height = car.height/2
+        
+        # Only obstacles that ended the step at most `travel` below the car can
+        # have touched it (they all move down)
+        if self.index is not None:
+            travel = self.max_speed * frames
+            left = min(car.sweep_start, car.x) - half_car_width
+            right = max(car.sweep_start, car.x) + half_car_width
+            candidates = self.index.query(left, right, car.y + half_car_height,
+                                          car.y - half_car_height - travel)
+        else:
+            candidates = self.obstacles
+        records = [(obstacle.x, obstacle.y, obstacle.width, obstacle.height, obstacle.speed)
+                   for obstacle in candidates]
+        
+        first = 0
+        for x, y, width, height, speed in records + self.leaving:
+            # Times the car overlaps the obstacle sideways
+            reach_x = half_car_width + width/2
+            x_enter, x_leave = overlap_times(car.sweep_start, car.sweep_velocity,
+                                             x - reach_x, x + reach_x, CAR_LIMIT)
+            if x_leave <= x_enter:
+                continue
+            
+            # Times the obstacle overlaps the car's rows (it started the step higher)
+            reach_y = half_car_height + height/2
+            y_enter, y_leave = overlap_times(y + speed * frames, -speed,
+                                             car.y - reach_y, car.y + reach_y)
+            frame = first_contact(max(x_enter, y_enter), min(x_leave, y_leave),
+                                  frames, continuous)
+            if frame and (first == 0 or frame < first):
+                first = frame
+                if first == 1:
+                    break
+        return first
+    
+    def sweep_score(self, car, frames, until=None):
+        """
+        Swept score check for an update of `frames` frames: obstacles passed
+        during the step score, even those already removed by update
+        until: only count obstacles passed by this frame of the step (the
+               collision frame, as the game stops there)
+        Returns: number of points scored
+        """
+        if until is None:
+            until = frames
+        points = 0
+        car_bottom = car.y - car.height/2
+        
+        # Obstacles still on screen (only unscored ones below the car can score)
+        if self.score_index is not None:
+            candidates = self.score_index.query(-math.inf, math.inf, car_bottom, -math.inf)
+        else:
+            candidates = self.obstacles
+        for obstacle in candidates:
+            top = obstacle.y + obstacle.height/2
+            if (top < car_bottom and not obstacle.scored and
+                    passing_frame(top, obstacle.speed, car_bottom, frames) <= until):
+                obstacle.scored = True
+                points += 1
+                if self.score_index is not None:
+                    self.score_index.remove(obstacle)
+        
+        # Obstacles that went below the screen during the step
+        for x, y, width, height, speed in self.leaving:
+            if passing_frame(y + height/2, speed, car_bottom, frames) <= until:
+                points += 1
+        return points
+    
     def reset(self):
         """
         Reset obstacle manager (clear all obstacles)
         """
-        self.obstacles = []
-        self.spawn_timer = 0 
\ No newline at end of file
+        for obstacle in self.obstacles:
+            if len(self.pool) < self.pool_capacity:
+                self.pool.append(obstacle)
+        self.obstacles.clear()
+        self.leaving.clear()
+        self.spawn_timer = 0
+        if self.index is not None:
+            self.index.clear()
+            self.score_index.clear() 
\ No newline at end of file
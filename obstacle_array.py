@@ -0,0 +1,336 @@
+"""
+Obstacle array file - contains ObstacleArrayManager, an ObstacleManager that
+stores obstacles in NumPy arrays instead of a list of Obstacle objects
+"""
+import random
+import numpy as np
+from obstacle import Obstacle
+from sweep import CAR_LIMIT
+
+def obstacle_arrays(obstacle_manager):
+    """
+    Obstacle positions, sizes and speeds as arrays, from either obstacle manager
+    Returns: (x, y, width, height, speed)
+    """
+    count = getattr(obstacle_manager, "count", None)
+    if count is not None:
+        # ObstacleArrayManager already stores arrays
+        return (obstacle_manager.x[:count], obstacle_manager.y[:count],
+                obstacle_manager.width[:count], obstacle_manager.height[:count],
+                obstacle_manager.speed[:count])
+
+    rects = np.array([(obstacle.x, obstacle.y, obstacle.width, obstacle.height, obstacle.speed)
+                      for obstacle in obstacle_manager.obstacles]).reshape(-1, 5)
+    return rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3], rects[:, 4]
+
+def overlap_times_array(start, velocity, low, high):
+    """
+    sweep.overlap_times for many points moving without limits
+    Returns: (enter, leave) arrays
+    """
+    start, velocity, low, high = np.broadcast_arrays(start, velocity, low, high)
+
+    # Mirror points moving down so they move up
+    down = velocity < 0
+    start = np.where(down, -start, start)
+    low, high = np.where(down, -high, low), np.where(down, -low, high)
+    velocity = np.abs(velocity)
+
+    moving = velocity > 0
+    inside = (low < start) & (start < high)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        enter = np.where(moving, (low - start) / velocity, np.where(inside, -np.inf, np.inf))
+        leave = np.where(moving, (high - start) / velocity, np.where(inside, np.inf, -np.inf))
+    return enter, leave
+
+class ObstacleArrayManager:
+    def __init__(self, capacity=64, rng=None):
+        """
+        Create obstacle manager with one array per obstacle field
+        capacity: initial number of obstacles the arrays can hold (grows when needed)
+        rng: random.Random used to place obstacles (the global random module by default)
+        """
+        self.rng = rng if rng is not None else random
+        # Default obstacle size and speed come from the Obstacle class
+        template = Obstacle(0, 0)
+        self.obstacle_width = template.width
+        self.obstacle_height = template.height
+        self.obstacle_speed = template.speed
+
+        self.count = 0  # number of live obstacles (the first `count` entries)
+        self._allocate(capacity)
+
+        self.spawn_timer = 0
+        self.spawn_interval = 120  # spawn obstacle every 2 seconds (120 frames at 60 FPS)
+        self.spawn_count = 0  # obstacles spawned since creation (for telemetry)
+        self.road_width = 6  # same as road width
+
+        # Obstacles removed by the last update before they were scored (for the
+        # swept checks): arrays of x, y, width, height, speed
+        self.leaving = tuple(np.zeros(0) for _ in range(5))
+
+    def _allocate(self, capacity):
+        """
+        Create arrays with room for `capacity` obstacles, keeping live entries
+        """
+        old = getattr(self, "x", None)
+        fields = {
+            "x": np.zeros(capacity),
+            "y": np.zeros(capacity),
+            "width": np.zeros(capacity),
+            "height": np.zeros(capacity),
+            "speed": np.zeros(capacity),
+            "scored": np.zeros(capacity, dtype=bool),
+        }
+        for name, array in fields.items():
+            if old is not None:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def update(self, frames=1):
+        """
+        Update all obstacles and spawn new ones
+        frames: number of frames to advance at once (see ObstacleManager.update)
+        """
+        if len(self.leaving[0]):
+            self.leaving = tuple(np.zeros(0) for _ in range(5))
+        for frame in range(1, frames + 1):
+            # Update spawn timer
+            self.spawn_timer += 1
+
+            # Spawn new obstacle if it's time
+            if self.spawn_timer >= self.spawn_interval:
+                self.spawn_obstacle()
+                self.spawn_timer = 0
+
+                # Start it higher by the frames that passed before it appeared
+                if frame > 1:
+                    self.y[self.count - 1] += self.speed[self.count - 1] * (frame - 1)
+
+        n = self.count
+        if n == 0:
+            return
+
+        # Move all obstacles downward in one pass
+        if frames == 1:
+            self.y[:n] -= self.speed[:n]
+        else:
+            self.y[:n] -= self.speed[:n] * frames
+
+        # Remove obstacles that are off screen (keeping the order of the others)
+        keep = ~(self.y[:n] < -6)
+        if not keep.all():
+            leaving = ~keep & ~self.scored[:n]
+            if leaving.any():
+                self.leaving = tuple(array[:n][leaving] for array in
+                                     (self.x, self.y, self.width, self.height, self.speed))
+            kept = int(keep.sum())
+            for array in (self.x, self.y, self.width, self.height, self.speed, self.scored):
+                array[:kept] = array[:n][keep]
+            self.count = kept
+
+    def spawn_obstacle(self):
+        """
+        Spawn a new obstacle at random position on the road
+        """
+        # Random x position within road bounds
+        road_left = -self.road_width/2 + 0.5
+        road_right = self.road_width/2 - 0.5
+        x = self.rng.uniform(road_left, road_right)
+
+        # Start from top of screen
+        self._append(x, 6, self.obstacle_width, self.obstacle_height,
+                     self.obstacle_speed, False)
+        self.spawn_count += 1
+
+    def __len__(self):
+        """
+        Number of live obstacles
+        """
+        return self.count
+
+    def add_obstacle(self, obstacle):
+        """
+        Add an obstacle to the road (copied from an Obstacle object)
+        """
+        self._append(obstacle.x, obstacle.y, obstacle.width, obstacle.height,
+                     obstacle.speed, obstacle.scored)
+
+    def _append(self, x, y, width, height, speed, scored):
+        """
+        Store one obstacle after the live ones
+        """
+        # Grow arrays if they are full
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.width[i] = width
+        self.height[i] = height
+        self.speed[i] = speed
+        self.scored[i] = scored
+        self.count += 1
+
+    @property
+    def obstacles(self):
+        """
+        Live obstacles as Obstacle objects (a copy, for drawing and inspection)
+        """
+        obstacles = []
+        for i in range(self.count):
+            obstacle = Obstacle(float(self.x[i]), float(self.y[i]),
+                                float(self.width[i]), float(self.height[i]))
+            obstacle.speed = float(self.speed[i])
+            obstacle.scored = bool(self.scored[i])
+            obstacles.append(obstacle)
+        return obstacles
+
+    def draw(self):
+        """
+        Draw all obstacles
+        """
+        for obstacle in self.obstacles:
+            obstacle.draw()
+
+    def check_collision(self, car):
+        """
+        Check collision between car and any obstacle
+        Returns: True if collision detected, False otherwise
+        """
+        n = self.count
+
+        # Get car bounds
+        car_left = car.x - car.width/2
+        car_right = car.x + car.width/2
+        car_top = car.y + car.height/2
+        car_bottom = car.y - car.height/2
+
+        # Get obstacle bounds
+        obs_left = self.x[:n] - self.width[:n]/2
+        obs_right = self.x[:n] + self.width[:n]/2
+        obs_top = self.y[:n] + self.height[:n]/2
+        obs_bottom = self.y[:n] - self.height[:n]/2
+
+        # Check if rectangles overlap
+        overlap = ((car_left < obs_right) & (car_right > obs_left) &
+                   (car_top > obs_bottom) & (car_bottom < obs_top))
+        return bool(overlap.any())
+
+    def check_score(self, car):
+        """
+        Check if car has passed any obstacles and award points
+        Returns: number of points scored
+        """
+        n = self.count
+
+        # Obstacles below the car that haven't been scored yet
+        passed = ((self.y[:n] + self.height[:n]/2 < car.y - car.height/2) &
+                  ~self.scored[:n])
+        self.scored[:n] |= passed
+        return int(passed.sum())
+
+    def sweep_collision(self, car, frames, continuous=False):
+        """
+        Swept collision check (see ObstacleManager.sweep_collision)
+        Returns: first frame of the step (1 to frames) with a collision, 0 when none
+        """
+        n = self.count
+        x, y, width, height, speed = (np.concatenate([array[:n], leaving]) for array, leaving in
+                                      zip((self.x, self.y, self.width, self.height, self.speed),
+                                          self.leaving))
+        if len(x) == 0:
+            return 0
+
+        # Times the car overlaps each obstacle sideways
+        reach_x = car.width/2 + width/2
+        if car.sweep_velocity == 0:
+            x_enter, x_leave = overlap_times_array(car.sweep_start, 0.0, x - reach_x, x + reach_x)
+        else:
+            x_enter, x_leave = self._car_overlap_times(car, x - reach_x, x + reach_x)
+
+        # Times each obstacle overlaps the car's rows (it started the step higher)
+        reach_y = car.height/2 + height/2
+        y_enter, y_leave = overlap_times_array(y + speed * frames, -speed,
+                                               car.y - reach_y, car.y + reach_y)
+        enter = np.maximum(x_enter, y_enter)
+        leave = np.minimum(x_leave, y_leave)
+
+        # First frame touched by each contact (sweep.first_contact for arrays)
+        frame = np.floor(np.clip(enter, 0.0, frames)) + 1
+        if continuous:
+            hit = (enter < frames) & (leave > np.maximum(enter, 0.0))
+        else:
+            hit = (enter < frames) & (leave > frame)
+        if not hit.any():
+            return 0
+        return int(frame[hit].min())
+
+    @staticmethod
+    def _car_overlap_times(car, low, high):
+        """
+        sweep.overlap_times for the moving car (stopping at the screen edges)
+        against many x ranges
+        Returns: (enter, leave) arrays
+        """
+        start, velocity = car.sweep_start, car.sweep_velocity
+        if velocity < 0:
+            start, velocity, low, high = -start, -velocity, -high, -low
+        enter = np.where(CAR_LIMIT > low, (low - start) / velocity, np.inf)
+        leave = np.where(high <= CAR_LIMIT, (high - start) / velocity, np.inf)
+        return enter, leave
+
+    def sweep_score(self, car, frames, until=None):
+        """
+        Swept score check (see ObstacleManager.sweep_score)
+        Returns: number of points scored
+        """
+        if until is None:
+            until = frames
+        n = self.count
+        car_bottom = car.y - car.height/2
+
+        def passed_by(top, speed):
+            # sweep.passing_frame for arrays
+            with np.errstate(divide="ignore", invalid="ignore"):
+                frame = np.where(speed > 0, np.floor(frames - (car_bottom - top) / speed) + 1, 1)
+            return (top < car_bottom) & (np.maximum(frame, 1) <= until)
+
+        passed = passed_by(self.y[:n] + self.height[:n]/2, self.speed[:n]) & ~self.scored[:n]
+        self.scored[:n] |= passed
+        _, leaving_y, _, leaving_height, leaving_speed = self.leaving
+        return int(passed.sum()) + int(passed_by(leaving_y + leaving_height/2, leaving_speed).sum())
+
+    def get_state(self):
+        """
+        Snapshot of the obstacles and spawn timer (one array copy of the live rows)
+        Returns: (spawn_timer, array of shape (count, 6))
+        """
+        n = self.count
+        records = np.empty((n, 6))
+        for column, array in enumerate((self.x, self.y, self.width, self.height, self.speed, self.scored)):
+            records[:, column] = array[:n]
+        return self.spawn_timer, records
+
+    def set_state(self, state):
+        """
+        Restore a snapshot from get_state
+        """
+        spawn_timer, records = state
+        n = len(records)
+        if n > self.capacity:
+            self._allocate(max(n, self.capacity * 2))
+        for column, array in enumerate((self.x, self.y, self.width, self.height, self.speed, self.scored)):
+            array[:n] = records[:, column]
+        self.count = n
+        self.spawn_timer = spawn_timer
+
+    def reset(self):
+        """
+        Reset obstacle manager (clear all obstacles)
+        """
+        self.count = 0
+        self.spawn_timer = 0
+        self.leaving = tuple(np.zeros(0) for _ in range(5))
@@ -0,0 +1,61 @@
+"""
+Offscreen file - runs GameWindow without a display, using a Mesa EGL context
+(software rendering with llvmpipe, no GPU or X server needed)
+Import this module before anything else imports OpenGL
+"""
+import ctypes
+import os
+
+# PyOpenGL picks its platform on first import, and Mesa needs no display server
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+from OpenGL import EGL
+from OpenGL.GL import glFinish
+from main import GameWindow
+
+def create_egl_context(width, height):
+    """
+    Create an OpenGL (compatibility profile) context with a pbuffer surface
+    Returns: (display, surface, context) EGL handles
+    """
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+        raise RuntimeError("Could not initialize EGL")
+
+    # RGBA8 pbuffer that can render desktop OpenGL
+    attributes = [
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8, EGL.EGL_ALPHA_SIZE, 8,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_NONE,
+    ]
+    config = EGL.EGLConfig()
+    count = EGL.EGLint()
+    if not EGL.eglChooseConfig(display, (EGL.EGLint * len(attributes))(*attributes),
+                               ctypes.pointer(config), 1, ctypes.pointer(count)) or not count.value:
+        raise RuntimeError("No EGL config for desktop OpenGL")
+
+    size = [EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE]
+    surface = EGL.eglCreatePbufferSurface(display, config, (EGL.EGLint * len(size))(*size))
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    if not EGL.eglMakeCurrent(display, surface, surface, context):
+        raise RuntimeError("Could not make EGL context current")
+    return display, surface, context
+
+class OffscreenGameWindow(GameWindow):
+    visible = False
+
+    def create_window(self):
+        """
+        Create an offscreen EGL context instead of a pygame window
+        """
+        self.egl = create_egl_context(self.width, self.height)
+
+    def swap_buffers(self):
+        """
+        Wait for rendering to finish (there is no window to show it in)
+        """
+        glFinish()
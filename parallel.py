@@ -0,0 +1,105 @@
+"""
+Parallel runner file - runs many seeded episodes on a pool of worker processes
+"""
+import argparse
+import statistics
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from headless import BACKENDS, CONTROLLERS, run_episode
+
+# Result of one episode (wall_time is the only field that depends on the machine)
+EpisodeResult = namedtuple("EpisodeResult", ["seed", "score", "frames", "wall_time"])
+
+def run_seeded_episode(seed, controller="dodge", max_frames=36000, backend="list", config=None):
+    """
+    Run one episode with its own seed
+    controller: name of a controller in headless.CONTROLLERS
+    config: dict of game parameters (see simulation.DEFAULT_CONFIG)
+    Returns: EpisodeResult
+    """
+    start = time.perf_counter()
+    score, frames = run_episode(CONTROLLERS[controller], max_frames, backend, seed, config=config)
+    return EpisodeResult(seed, score, frames, time.perf_counter() - start)
+
+def iter_episodes(seeds, controller="dodge", max_frames=36000, backend="list", workers=None,
+                  config=None):
+    """
+    Run one episode per seed, spread over `workers` processes
+    workers: number of processes (None uses every core, 1 runs in this process)
+    config: dict of game parameters for every episode (see simulation.DEFAULT_CONFIG)
+    Yields: EpisodeResult for each episode as soon as it finishes
+    """
+    if workers == 1:
+        for seed in seeds:
+            yield run_seeded_episode(seed, controller, max_frames, backend, config)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_seeded_episode, seed, controller, max_frames, backend, config)
+                   for seed in seeds]
+        for future in as_completed(futures):
+            yield future.result()
+
+def summarize(results):
+    """
+    Aggregate episode results
+    The summary only uses seeds, scores and frames, so it is the same for
+    a given seed set no matter how many workers produced the results
+    Returns: dict of statistics (all zero when there are no results)
+    """
+    results = sorted(results, key=lambda result: result.seed)
+    if not results:
+        return {
+            "episodes": 0,
+            "mean_score": 0.0,
+            "stdev_score": 0.0,
+            "min_score": 0,
+            "max_score": 0,
+            "mean_frames": 0.0,
+            "total_frames": 0,
+        }
+    scores = [result.score for result in results]
+    frames = [result.frames for result in results]
+    return {
+        "episodes": len(results),
+        "mean_score": float(statistics.mean(scores)),
+        "stdev_score": statistics.pstdev(scores),
+        "min_score": min(scores),
+        "max_score": max(scores),
+        "mean_frames": float(statistics.mean(frames)),
+        "total_frames": sum(frames),
+    }
+
+def main():
+    """
+    Run seeded episodes in parallel and print results as they stream in
+    """
+    parser = argparse.ArgumentParser(description="Run seeded episodes on several processes")
+    parser.add_argument("--episodes", type=int, default=100, help="number of episodes")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes (default: every core)")
+    parser.add_argument("--max-frames", type=int, default=36000, help="frame limit per episode")
+    parser.add_argument("--controller", choices=sorted(CONTROLLERS), default="dodge",
+                        help="controller that drives the car")
+    parser.add_argument("--backend", choices=BACKENDS, default="list",
+                        help="obstacle storage backend")
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.episodes)
+    results = []
+    start = time.perf_counter()
+
+    for result in iter_episodes(seeds, args.controller, args.max_frames, args.backend, args.workers):
+        results.append(result)
+        print(f"Seed {result.seed}: score {result.score}, frames {result.frames}, "
+              f"{result.wall_time:.2f}s")
+
+    print("=== Summary ===")
+    for name, value in summarize(results).items():
+        print(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+    print(f"Wall time: {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
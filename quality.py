@@ -0,0 +1,170 @@
+"""
+Quality file - contains the rendering quality levels, QualityGovernor, which
+picks a level from measured frame times, and LowResolutionTarget, which
+renders a frame at a lower resolution and scales it up to the window
+"""
+from collections import namedtuple
+
+# What each level draws; every level drops one more detail than the one before
+QualityLevel = namedtuple("QualityLevel", ["name", "building_windows", "trees", "line_smooth",
+                                           "wheel_segments", "resolution_scale"])
+QUALITY_LEVELS = (
+    QualityLevel("full", True, True, True, 20, 1.0),
+    QualityLevel("no building windows", False, True, True, 20, 1.0),
+    QualityLevel("no trees", False, False, True, 20, 1.0),
+    QualityLevel("no line smoothing", False, False, False, 20, 1.0),
+    QualityLevel("simple wheels", False, False, False, 8, 1.0),
+    QualityLevel("half resolution", False, False, False, 8, 0.5),
+)
+
+class QualityGovernor:
+    def __init__(self, budget_ms=1000 / 60, level=0, window=30, lower_above=1.05, raise_below=0.6,
+                 raise_after=180, max_raise_after=3600, settle=5):
+        """
+        Create a governor that lowers quality when frames take too long and
+        raises it again when they are fast
+        budget_ms: frame time to stay within (one frame at 60 FPS)
+        level: starting level (index into QUALITY_LEVELS)
+        window: frames averaged for each decision
+        lower_above: lower quality when a window averages above budget * lower_above
+        raise_below: raise quality after windows average below budget * raise_below
+                     for `raise_after` frames in a row (the gap between the two
+                     thresholds keeps the level from switching back and forth)
+        max_raise_after: when a raised level turns out too slow again, the wait
+                         before the next raise doubles, up to this many frames
+        settle: frames ignored after a change (display lists are rebuilt then)
+        A level that turns out slower than the level above it (possible with
+        software OpenGL, where scaling the small frame up costs more than the
+        pixels it saves) is left again and not picked while it stays slower
+        """
+        self.budget_ms = budget_ms
+        self.level = level
+        self.window = window
+        self.lower_above = lower_above
+        self.raise_below = raise_below
+        self.raise_after = raise_after
+        self.max_raise_after = max_raise_after
+        self.settle = settle
+
+        self.total = 0.0  # frame time of the current window
+        self.count = 0  # frames in the current window
+        self.calm_frames = 0  # frames in a row of fast windows
+        self.ignore = 0  # frames still to ignore after a change
+        self.frames = 0
+        self.raised_frame = None  # frame of the last raise
+        self.averages = {}  # last window average measured at each level
+
+        # Statistics
+        self.changes = 0
+        self.last_average = 0.0
+
+    def update(self, frame_ms):
+        """
+        Add the time of one frame (without waiting for the frame rate limit)
+        Returns: quality level to use from the next frame on
+        """
+        self.frames += 1
+        if self.ignore:
+            self.ignore -= 1
+            return self.level
+        self.total += frame_ms
+        self.count += 1
+        if self.count < self.window:
+            return self.level
+
+        average = self.total / self.count
+        self.last_average = average
+        self.total = 0.0
+        self.count = 0
+        self.averages[self.level] = average
+        if average > self.budget_ms * self.lower_above:
+            self.calm_frames = 0
+            higher = self.averages.get(self.level - 1)
+            lower = self.averages.get(self.level + 1)
+            if higher is not None and higher < average:
+                # Lowering the quality made frames slower: go back
+                self._change(self.level - 1)
+            elif self.level < len(QUALITY_LEVELS) - 1 and (lower is None or lower < average):
+                # Too slow again soon after a raise: wait longer before the next one
+                if self.raised_frame is not None and self.frames - self.raised_frame < 2 * self.raise_after:
+                    self.raise_after = min(self.raise_after * 2, self.max_raise_after)
+                self._change(self.level + 1)
+        elif average < self.budget_ms * self.raise_below:
+            self.calm_frames += self.window
+            if self.calm_frames >= self.raise_after and self.level > 0:
+                self.raised_frame = self.frames
+                self._change(self.level - 1)
+        else:
+            self.calm_frames = 0
+        return self.level
+
+    def _change(self, level):
+        """
+        Switch to a level and start measuring it from scratch
+        """
+        self.level = level
+        self.calm_frames = 0
+        self.ignore = self.settle
+        self.changes += 1
+
+class LowResolutionTarget:
+    def __init__(self, width, height, scale):
+        """
+        Create an offscreen framebuffer `scale` times the window size
+        (needs a current OpenGL context)
+        """
+        from OpenGL.GL import (GL_COLOR_ATTACHMENT0, GL_FRAMEBUFFER, GL_FRAMEBUFFER_COMPLETE,
+                               GL_RENDERBUFFER, GL_RGBA8, glBindFramebuffer, glBindRenderbuffer,
+                               glCheckFramebufferStatus, glFramebufferRenderbuffer,
+                               glGenFramebuffers, glGenRenderbuffers, glRenderbufferStorage)
+
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.scaled_width = max(1, int(width * scale))
+        self.scaled_height = max(1, int(height * scale))
+        self.framebuffer = glGenFramebuffers(1)
+        self.renderbuffer = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.renderbuffer)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.scaled_width, self.scaled_height)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.renderbuffer)
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("Low resolution framebuffer is not complete")
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def begin_frame(self):
+        """
+        Send the following drawing to the small framebuffer
+        """
+        from OpenGL.GL import GL_FRAMEBUFFER, glBindFramebuffer, glViewport
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glViewport(0, 0, self.scaled_width, self.scaled_height)
+
+    def end_frame(self, target=0):
+        """
+        Scale the frame up into the target framebuffer (0 is the window)
+        and draw there again; nearest filtering is the cheapest copy and
+        doubles pixels exactly at half resolution
+        """
+        from OpenGL.GL import (GL_COLOR_BUFFER_BIT, GL_DRAW_FRAMEBUFFER, GL_FRAMEBUFFER, GL_NEAREST,
+                               GL_READ_FRAMEBUFFER, glBindFramebuffer, glBlitFramebuffer, glViewport)
+        from gl_state import render_state
+
+        render_state.flush()
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.framebuffer)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target)
+        glBlitFramebuffer(0, 0, self.scaled_width, self.scaled_height, 0, 0, self.width, self.height,
+                          GL_COLOR_BUFFER_BIT, GL_NEAREST)
+        glBindFramebuffer(GL_FRAMEBUFFER, target)
+        glViewport(0, 0, self.width, self.height)
+
+    def delete(self):
+        """
+        Free the framebuffer
+        """
+        from OpenGL.GL import glDeleteFramebuffers, glDeleteRenderbuffers
+
+        glDeleteFramebuffers(1, [self.framebuffer])
+        glDeleteRenderbuffers(1, [self.renderbuffer])
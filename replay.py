@@ -0,0 +1,342 @@
+"""
+Replay file - records the seed and per-frame left/right actions of each game
+into a compact binary log, and replays logs with state checksums
+
+Log format (little-endian):
+    header:  magic "CRRP", u16 version, u16 checksum interval (frames)
+    then one record per tag byte:
+    "G"  u64 seed                       a new game starts
+    "B"  u32 n, ceil(n/4) bytes, u32 crc  n frames of 2-bit actions (4 per byte,
+                                          lowest bits first) and the CRC32 of the
+                                          simulation state after the last of them
+    "E"  u32 frames, i64 score, u8 over   the game ended (or the session stopped)
+"""
+import argparse
+import struct
+import time
+import zlib
+from array import array
+from headless import BACKENDS, CONTROLLERS, make_obstacle_manager
+from simulation import Simulation
+
+MAGIC = b"CRRP"
+VERSION = 1
+
+# Action bits (same as vector_env): LEFT | RIGHT means both keys are held
+LEFT = 1
+RIGHT = 2
+
+HEADER = struct.Struct("<4sHH")
+SEED = struct.Struct("<Q")
+COUNT = struct.Struct("<I")
+CHECKSUM = struct.Struct("<I")
+END = struct.Struct("<IqB")
+
+class ReplayMismatchError(Exception):
+    """
+    Raised when a replayed game does not reach the recorded state
+    """
+
+def encode_action(left, right):
+    """
+    Turn left/right key state into action bits
+    """
+    return (LEFT if left else 0) | (RIGHT if right else 0)
+
+def pack_actions(actions):
+    """
+    Pack action bits, 4 per byte
+    Returns: bytes
+    """
+    packed = bytearray((len(actions) + 3) // 4)
+    for i, action in enumerate(actions):
+        packed[i >> 2] |= action << ((i & 3) * 2)
+    return bytes(packed)
+
+def unpack_actions(packed, count):
+    """
+    Unpack `count` action bits packed by pack_actions
+    Returns: bytearray with one action per frame
+    """
+    return bytearray((packed[i >> 2] >> ((i & 3) * 2)) & 3 for i in range(count))
+
+def state_checksum(simulation):
+    """
+    CRC32 of everything that decides how the game continues: frame, score,
+    car position, spawn timer and every obstacle's position and scored flag
+    Works with every obstacle storage backend
+    """
+    manager = simulation.obstacle_manager
+    obstacles = manager.obstacles
+    header = struct.pack("<IqBqI", simulation.frame, simulation.score, simulation.game_over,
+                         manager.spawn_timer, len(obstacles))
+    positions = array("d", [simulation.car.x])
+    scored = bytearray(len(obstacles))
+    for i, obstacle in enumerate(obstacles):
+        positions.append(obstacle.x)
+        positions.append(obstacle.y)
+        scored[i] = bool(obstacle.scored)
+    checksum = zlib.crc32(header)
+    checksum = zlib.crc32(positions.tobytes(), checksum)
+    return zlib.crc32(scored, checksum)
+
+class ReplayWriter:
+    def __init__(self, path, checksum_interval=60):
+        """
+        Create a log file for recording games
+        checksum_interval: frames between state checksums (also the block size)
+        """
+        self.file = open(path, "wb")
+        self.checksum_interval = checksum_interval
+        self.file.write(HEADER.pack(MAGIC, VERSION, checksum_interval))
+        self.pending = []  # actions of the current block
+        self.in_game = False
+
+    def start_game(self, seed):
+        """
+        Start recording a game played with Simulation.reset(seed)
+        """
+        if self.in_game:
+            raise RuntimeError("end_game must be called before starting another game")
+        self.file.write(b"G" + SEED.pack(seed))
+        self.in_game = True
+
+    def record(self, left, right, simulation):
+        """
+        Record the actions of a step (call after simulation.step)
+        """
+        self.pending.append(encode_action(left, right))
+        if len(self.pending) >= self.checksum_interval:
+            self._write_block(simulation)
+
+    def _write_block(self, simulation):
+        """
+        Write the pending actions and the checksum of the current state
+        """
+        self.file.write(b"B" + COUNT.pack(len(self.pending)) + pack_actions(self.pending) +
+                        CHECKSUM.pack(state_checksum(simulation)))
+        self.pending = []
+
+    def end_game(self, simulation):
+        """
+        Finish the current game (game over or the player quit)
+        """
+        if not self.in_game:
+            return
+        if self.pending:
+            self._write_block(simulation)
+        self.file.write(b"E" + END.pack(simulation.frame, simulation.score, simulation.game_over))
+        self.in_game = False
+
+    def close(self, simulation=None):
+        """
+        End any game still being recorded and close the file
+        """
+        if self.in_game and simulation is not None:
+            self.end_game(simulation)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.file.close()
+
+class ReplayGame:
+    def __init__(self, seed):
+        """
+        One recorded game
+        """
+        self.seed = seed
+        self.actions = bytearray()  # action bits, one per frame
+        self.checksums = {}  # frame number -> state checksum after that frame
+        self.frames = None  # recorded result (None when the log was cut off)
+        self.score = None
+        self.game_over = None
+
+def read_replay(path):
+    """
+    Read a log written by ReplayWriter
+    Returns: (checksum interval, list of ReplayGame)
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    magic, version, checksum_interval = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a replay log")
+    if version != VERSION:
+        raise ValueError(f"Unsupported replay version {version}")
+
+    games = []
+    game = None
+    offset = HEADER.size
+    while offset < len(data):
+        tag = data[offset:offset + 1]
+        offset += 1
+        if tag == b"G":
+            game = ReplayGame(SEED.unpack_from(data, offset)[0])
+            games.append(game)
+            offset += SEED.size
+        elif tag == b"B":
+            count = COUNT.unpack_from(data, offset)[0]
+            offset += COUNT.size
+            size = (count + 3) // 4
+            game.actions += unpack_actions(data[offset:offset + size], count)
+            offset += size
+            game.checksums[len(game.actions)] = CHECKSUM.unpack_from(data, offset)[0]
+            offset += CHECKSUM.size
+        elif tag == b"E":
+            game.frames, game.score, game_over = END.unpack_from(data, offset)
+            game.game_over = bool(game_over)
+            offset += END.size
+        else:
+            raise ValueError(f"Corrupt replay log at byte {offset - 1}")
+    return checksum_interval, games
+
+class ReplayPlayer:
+    def __init__(self, games):
+        """
+        Feed recorded actions to a simulation, one game after another
+        """
+        self.games = games
+        self.game_index = -1
+        self.game = None
+
+    def next_game(self):
+        """
+        Move to the next recorded game
+        Returns: its seed, or None when every game was played
+        """
+        self.game_index += 1
+        if self.game_index >= len(self.games):
+            self.game = None
+            return None
+        self.game = self.games[self.game_index]
+        return self.game.seed
+
+    def actions(self, frame):
+        """
+        Recorded actions for a frame
+        Returns: (left, right)
+        """
+        action = self.game.actions[frame] if frame < len(self.game.actions) else 0
+        return bool(action & LEFT), bool(action & RIGHT)
+
+    def game_finished(self, simulation):
+        """
+        Whether the simulation has used every recorded action of the game
+        """
+        return simulation.game_over or simulation.frame >= len(self.game.actions)
+
+    def verify(self, simulation):
+        """
+        Compare the state with the recorded checksum, if this frame has one
+        """
+        expected = self.game.checksums.get(simulation.frame)
+        if expected is not None and expected != state_checksum(simulation):
+            raise ReplayMismatchError(f"Game {self.game_index + 1} (seed {self.game.seed}) "
+                                      f"differs from the recording at frame {simulation.frame}")
+
+    def verify_end(self, simulation):
+        """
+        Compare the final frame count, score and game over flag with the recording
+        """
+        game = self.game
+        if game.frames is None:
+            return
+        if (simulation.frame, simulation.score, simulation.game_over) != (game.frames, game.score, game.game_over):
+            raise ReplayMismatchError(f"Game {self.game_index + 1} (seed {game.seed}) ended with "
+                                      f"frame {simulation.frame}, score {simulation.score}; "
+                                      f"recorded frame {game.frames}, score {game.score}")
+
+def replay_headless(games, backend="list", verify=True):
+    """
+    Replay recorded games without a window, as fast as possible
+    verify: check state checksums (raises ReplayMismatchError on a difference)
+    Returns: list of (score, frames), one per game
+    """
+    simulation = Simulation(make_obstacle_manager(backend))
+    player = ReplayPlayer(games)
+    results = []
+    seed = player.next_game()
+    while seed is not None:
+        simulation.reset(seed)
+        actions = player.game.actions
+        checksums = player.game.checksums if verify else {}
+        for action in actions:
+            simulation.step(action & LEFT, action & RIGHT)
+            if simulation.frame in checksums:
+                player.verify(simulation)
+            if simulation.game_over:
+                break
+        if verify:
+            player.verify_end(simulation)
+        results.append((simulation.score, simulation.frame))
+        seed = player.next_game()
+    return results
+
+def record_headless(path, controller, episodes=1, first_seed=0, max_frames=36000,
+                    checksum_interval=60):
+    """
+    Record games played by a headless controller (useful to build a replay corpus)
+    Returns: list of (score, frames), one per game
+    """
+    simulation = Simulation()
+    results = []
+    with ReplayWriter(path, checksum_interval) as writer:
+        for seed in range(first_seed, first_seed + episodes):
+            simulation.reset(seed)
+            writer.start_game(seed)
+            while not simulation.game_over and simulation.frame < max_frames:
+                left, right = controller(simulation)
+                simulation.step(left, right)
+                writer.record(left, right, simulation)
+            writer.end_game(simulation)
+            results.append((simulation.score, simulation.frame))
+    return results
+
+def main():
+    """
+    Record games with a headless controller, or replay a log at maximum speed
+    """
+    parser = argparse.ArgumentParser(description="Record and replay Car Road Simulation games")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    play = commands.add_parser("play", help="replay a log without a window and verify it")
+    play.add_argument("path")
+    play.add_argument("--backend", choices=BACKENDS, default="list",
+                      help="obstacle storage backend")
+    play.add_argument("--no-verify", action="store_true", help="skip state checksums")
+
+    record = commands.add_parser("record", help="record games played by a controller")
+    record.add_argument("path")
+    record.add_argument("--controller", choices=sorted(CONTROLLERS), default="dodge",
+                        help="controller that drives the car")
+    record.add_argument("--episodes", type=int, default=1, help="number of games to record")
+    record.add_argument("--first-seed", type=int, default=0, help="seed of the first game")
+    record.add_argument("--max-frames", type=int, default=36000, help="frame limit per game")
+    record.add_argument("--checksum-interval", type=int, default=60,
+                        help="frames between state checksums")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "record":
+        results = record_headless(args.path, CONTROLLERS[args.controller], args.episodes,
+                                  args.first_seed, args.max_frames, args.checksum_interval)
+    else:
+        _, games = read_replay(args.path)
+        results = replay_headless(games, args.backend, not args.no_verify)
+    elapsed = time.perf_counter() - start
+
+    total_frames = 0
+    for i, (score, frames) in enumerate(results):
+        total_frames += frames
+        print(f"Game {i + 1}: score {score}, frames {frames}")
+    print(f"{len(results)} games, {total_frames} frames in {elapsed:.2f}s "
+          f"({total_frames / max(elapsed, 1e-9):.0f} steps/sec)")
+    if args.command == "play" and not args.no_verify:
+        print("Replay matches the recording")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,95 @@
 """
 Road file - contains Road class for drawing road and background
 """
-from OpenGL.GL import *
+
+def draw_tree(x, y):
+    """
+    Draw a simple tree (trunk at x, y)
+    """
+    from OpenGL.GL import glVertex2f, GL_QUADS, GL_TRIANGLES
+    from gl_state import render_state
+    
+    # Draw tree trunk (brown rectangle)
+    render_state.color3(0.5, 0.3, 0.1)  # brown color
+    render_state.begin(GL_QUADS)
+    glVertex2f(x - 0.1, y - 0.5)
+    glVertex2f(x + 0.1, y - 0.5)
+    glVertex2f(x + 0.1, y + 0.5)
+    glVertex2f(x - 0.1, y + 0.5)
+    render_state.end()
+    
+    # Draw tree leaves (green triangle)
+    render_state.color3(0.1, 0.6, 0.1)  # dark green color
+    render_state.begin(GL_TRIANGLES)
+    glVertex2f(x, y + 1.0)      # top point
+    glVertex2f(x - 0.5, y + 0.3) # left point
+    glVertex2f(x + 0.5, y + 0.3) # right point
+    render_state.end()
+
+def draw_building(x, y, width, height, windows=True):
+    """
+    Draw a simple building with windows (bottom center at x, y)
+    windows: draw the windows (left out at lower quality levels)
+    """
+    from OpenGL.GL import glVertex2f, GL_QUADS
+    from gl_state import render_state
+    
+    # Draw building
+    render_state.color3(0.6, 0.6, 0.7)  # light gray color
+    render_state.begin(GL_QUADS)
+    glVertex2f(x - width/2, y)
+    glVertex2f(x + width/2, y)
+    glVertex2f(x + width/2, y + height)
+    glVertex2f(x - width/2, y + height)
+    render_state.end()
+    if not windows:
+        return
+    
+    # Draw building windows (all in one quad batch)
+    render_state.color3(0.8, 0.8, 0.2)  # yellow color for windows
+    render_state.begin(GL_QUADS)
+    for i in range(int(height)):
+        for j in range(int(width * 2)):
+            window_x = x - width/2 + 0.2 + j * 0.3
+            window_y = y + 0.3 + i * 0.8
+            if window_x < x + width/2 and window_y < y + height:
+                glVertex2f(window_x, window_y)
+                glVertex2f(window_x + 0.15, window_y)
+                glVertex2f(window_x + 0.15, window_y + 0.2)
+                glVertex2f(window_x, window_y + 0.2)
+    render_state.end()
 
 class Road:
-    def __init__(self):
+    def __init__(self, scenery=None):
         """
         Create a road object
+        scenery: World streaming procedural trees and buildings (see world.py);
+                 None draws the fixed scenery
         """
         self.road_width = 6  # road width
         self.line_positions = []  # positions of dashed road lines
         self.line_speed = 0.2  # speed of moving lines to give sense of motion
+        self.distance = 0.0  # how far the road has scrolled (scenery moves with the lines)
+        self.scenery = scenery
+        
+        # Details that lower quality levels leave out (see quality.py)
+        self.building_windows = True
+        self.show_trees = True
         
         # Create dashed line positions
         for i in range(8):
             self.line_positions.append(i * 2 - 8)
+        
+        # Static scenery is compiled once into OpenGL display lists
+        self._display_lists = {}  # name -> display list id
+        self._cache_key = None  # road parameters the display lists were built for
     
     def update(self):
         """
         Update road line positions to give sense of motion
         """
+        self.distance += self.line_speed
+        
         # Move lines downward
         for i in range(len(self.line_positions)):
             self.line_positions[i] -= self.line_speed
@@ -28,74 +98,160 @@ class Road:
             if self.line_positions[i] < -10:
                 self.line_positions[i] = 8
     
-    def draw(self):
+    def get_state(self):
+        """
+        Snapshot of the dashed line positions and scrolled distance
+        Returns: (tuple of positions, distance)
+        """
+        return tuple(self.line_positions), self.distance
+    
+    def set_state(self, state):
+        """
+        Restore a snapshot from get_state
+        """
+        line_positions, self.distance = state
+        self.line_positions[:] = line_positions
+    
+    def invalidate_cache(self):
+        """
+        Delete cached scenery so it is rebuilt on the next draw
+        Call this after changing road parameters (done automatically for road_width)
+        """
+        from OpenGL.GL import glDeleteLists
+        
+        for list_id in self._display_lists.values():
+            glDeleteLists(list_id, 1)
+        self._display_lists = {}
+        self._cache_key = None
+        if self.scenery is not None:
+            self.scenery.building_windows = self.building_windows
+            self.scenery.clear_display_lists()
+    
+    def _call_cached(self, name, draw_function):
+        """
+        Draw static geometry from a display list, compiling it on first use
+        name: cache entry name
+        draw_function: function issuing the OpenGL calls for the geometry
+        """
+        from OpenGL.GL import glGenLists, glNewList, glEndList, glCallList, GL_COMPILE
+        from gl_state import render_state
+        
+        # Rebuild everything when road parameters changed
+        cache_key = (self.road_width, self.building_windows)
+        if cache_key != self._cache_key:
+            self.invalidate_cache()
+            self._cache_key = cache_key
+        
+        render_state.flush()
+        list_id = self._display_lists.get(name)
+        if list_id is None:
+            # The list must set all the state it needs, so compile from unknown state
+            list_id = glGenLists(1)
+            render_state.invalidate()
+            glNewList(list_id, GL_COMPILE)
+            draw_function()
+            render_state.flush()
+            glEndList()
+            self._display_lists[name] = list_id
+        
+        glCallList(list_id)
+        
+        # The list changed state behind the tracker's back
+        render_state.invalidate()
+    
+    def draw(self, alpha=1.0):
         """
         Draw road and background
+        alpha: position between the previous (0) and current (1) update,
+               used to move the dashes smoothly between updates
+        """
+        # Import OpenGL here so the simulation can run without it
+        from OpenGL.GL import glVertex2f, GL_LINES, GL_TEXTURE_2D
+        from gl_state import render_state
+        
+        # Scenery is not textured
+        render_state.disable(GL_TEXTURE_2D)
+        
+        # Draw sky, grass, road and side lines (static)
+        self._call_cached("ground", self._draw_ground)
+        
+        # Draw dashed line in middle of road (the only moving part)
+        render_state.color3(1.0, 1.0, 0.0)  # yellow color for dashed line
+        render_state.line_width(2)
+        
+        offset = self.line_speed * (1 - alpha)
+        render_state.begin(GL_LINES)
+        for line_y in self.line_positions:
+            glVertex2f(0, line_y + offset)
+            glVertex2f(0, line_y + offset + 1)
+        render_state.end()
+        
+        # Draw trees on sides (static, or streamed chunks moving with the lines)
+        if not self.show_trees:
+            return
+        if self.scenery is not None:
+            self.scenery.draw_layer("trees", self.distance - offset)
+        else:
+            self._call_cached("trees", self._draw_trees)
+    
+    def _draw_ground(self):
+        """
+        Draw sky, grass, road surface and road side lines
         """
+        from OpenGL.GL import glVertex2f, GL_QUADS, GL_LINES
+        from gl_state import render_state
+        
         # Draw background (blue sky)
-        glColor3f(0.5, 0.7, 1.0)  # light blue color for sky
-        glBegin(GL_QUADS)
+        render_state.color3(0.5, 0.7, 1.0)  # light blue color for sky
+        render_state.begin(GL_QUADS)
         glVertex2f(-10, -10)
         glVertex2f(10, -10)
         glVertex2f(10, 10)
         glVertex2f(-10, 10)
-        glEnd()
+        render_state.end()
         
         # Draw side ground (green grass)
-        glColor3f(0.2, 0.8, 0.2)  # green color for grass
+        render_state.color3(0.2, 0.8, 0.2)  # green color for grass
         # Left side
-        glBegin(GL_QUADS)
+        render_state.begin(GL_QUADS)
         glVertex2f(-10, -10)
         glVertex2f(-self.road_width/2, -10)
         glVertex2f(-self.road_width/2, 10)
         glVertex2f(-10, 10)
-        glEnd()
+        render_state.end()
         
         # Right side
-        glBegin(GL_QUADS)
+        render_state.begin(GL_QUADS)
         glVertex2f(self.road_width/2, -10)
         glVertex2f(10, -10)
         glVertex2f(10, 10)
         glVertex2f(self.road_width/2, 10)
-        glEnd()
+        render_state.end()
         
         # Draw main road (gray)
-        glColor3f(0.4, 0.4, 0.4)  # gray color for road
-        glBegin(GL_QUADS)
+        render_state.color3(0.4, 0.4, 0.4)  # gray color for road
+        render_state.begin(GL_QUADS)
         glVertex2f(-self.road_width/2, -10)
         glVertex2f(self.road_width/2, -10)
         glVertex2f(self.road_width/2, 10)
         glVertex2f(-self.road_width/2, 10)
-        glEnd()
+        render_state.end()
         
         # Draw road side lines (white)
-        glColor3f(1.0, 1.0, 1.0)  # white color for lines
-        glLineWidth(3)  # line thickness
+        render_state.color3(1.0, 1.0, 1.0)  # white color for lines
+        render_state.line_width(3)  # line thickness
         
         # Left line
-        glBegin(GL_LINES)
+        render_state.begin(GL_LINES)
         glVertex2f(-self.road_width/2, -10)
         glVertex2f(-self.road_width/2, 10)
-        glEnd()
+        render_state.end()
         
         # Right line
-        glBegin(GL_LINES)
+        render_state.begin(GL_LINES)
         glVertex2f(self.road_width/2, -10)
         glVertex2f(self.road_width/2, 10)
-        glEnd()
-        
-        # Draw dashed line in middle of road
-        glColor3f(1.0, 1.0, 0.0)  # yellow color for dashed line
-        glLineWidth(2)
-        
-        for line_y in self.line_positions:
-            glBegin(GL_LINES)
-            glVertex2f(0, line_y)
-            glVertex2f(0, line_y + 1)
-            glEnd()
-        
-        # Draw trees on sides
-        self._draw_trees()
+        render_state.end()
     
     def _draw_trees(self):
         """
@@ -107,26 +263,25 @@ class Road:
         ]
         
         for x, y in tree_positions:
-            # Draw tree trunk (brown rectangle)
-            glColor3f(0.5, 0.3, 0.1)  # brown color
-            glBegin(GL_QUADS)
-            glVertex2f(x - 0.1, y - 0.5)
-            glVertex2f(x + 0.1, y - 0.5)
-            glVertex2f(x + 0.1, y + 0.5)
-            glVertex2f(x - 0.1, y + 0.5)
-            glEnd()
-            
-            # Draw tree leaves (green triangle)
-            glColor3f(0.1, 0.6, 0.1)  # dark green color
-            glBegin(GL_TRIANGLES)
-            glVertex2f(x, y + 1.0)      # top point
-            glVertex2f(x - 0.5, y + 0.3) # left point
-            glVertex2f(x + 0.5, y + 0.3) # right point
-            glEnd()
+            draw_tree(x, y)
     
-    def draw_buildings(self):
+    def draw_buildings(self, alpha=1.0):
         """
-        Draw simple buildings in background
+        Draw simple buildings in background (static, or streamed chunks)
+        alpha: position between the previous (0) and current (1) update
+        """
+        from OpenGL.GL import GL_TEXTURE_2D
+        from gl_state import render_state
+        
+        render_state.disable(GL_TEXTURE_2D)
+        if self.scenery is not None:
+            self.scenery.draw_layer("buildings", self.distance - self.line_speed * (1 - alpha))
+        else:
+            self._call_cached("buildings", self._draw_buildings)
+    
+    def _draw_buildings(self):
+        """
+        Draw building walls and windows
         """
         building_positions = [
             (-8, 2, 1.5, 3), (-7, 1, 1, 2), (-6, 0.5, 0.8, 1.5),
@@ -134,25 +289,4 @@ class Road:
         ]
         
         for x, y, width, height in building_positions:
-            # Draw building
-            glColor3f(0.6, 0.6, 0.7)  # light gray color
-            glBegin(GL_QUADS)
-            glVertex2f(x - width/2, y)
-            glVertex2f(x + width/2, y)
-            glVertex2f(x + width/2, y + height)
-            glVertex2f(x - width/2, y + height)
-            glEnd()
-            
-            # Draw building windows
-            glColor3f(0.8, 0.8, 0.2)  # yellow color for windows
-            for i in range(int(height)):
-                for j in range(int(width * 2)):
-                    window_x = x - width/2 + 0.2 + j * 0.3
-                    window_y = y + 0.3 + i * 0.8
-                    if window_x < x + width/2 and window_y < y + height:
-                        glBegin(GL_QUADS)
-                        glVertex2f(window_x, window_y)
-                        glVertex2f(window_x + 0.15, window_y)
-                        glVertex2f(window_x + 0.15, window_y + 0.2)
-                        glVertex2f(window_x, window_y + 0.2)
-                        glEnd() 
\ No newline at end of file
+            draw_building(x, y, width, height, self.building_windows) 
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""
+Shared state file - runs the simulation in its own process and publishes
+every tick into shared memory, where render processes and headless readers
+take the latest snapshot (see shared_view.py)
+
+The shared block holds a header and two snapshot buffers. The simulation
+writes each tick into the buffer that is not the latest one, with that
+buffer's sequence counter made odd while it writes and even again after,
+then marks the buffer as the latest. Readers take the latest buffer and
+check afterwards that its counter did not change, so a half-written
+snapshot is never mistaken for a consistent one. Keyboard input goes back
+to the simulation over a pipe.
+
+This module imports neither pygame nor OpenGL, so the simulation process
+stays small and never touches the GIL of a render process.
+"""
+import argparse
+import multiprocessing
+import random
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+SIMULATION_RATE = 60  # steps per second, same as main.py
+GAME_STATES = ("menu", "playing", "game_over")
+
+# Header (int64): latest buffer, sequence counter of each buffer,
+# obstacle capacity, whether the simulation is still running, ticks that
+# had more obstacles than the capacity (the extra ones were left out)
+HEADER = ("latest", "sequence0", "sequence1", "max_obstacles", "running", "truncated")
+LATEST, SEQUENCE, MAX_OBSTACLES, RUNNING, TRUNCATED = 0, 1, 3, 4, 5
+
+# Scalars at the start of each snapshot buffer (float64), followed by the
+# dashed line positions and one column per obstacle field
+FIELDS = ("tick", "game_state", "frame", "score", "car_x", "car_previous_x", "car_y",
+          "distance", "lines", "obstacles")
+MAX_LINES = 16
+OBSTACLE_COLUMNS = ("x", "y", "width", "height", "speed")
+
+# Blocks created by this process
+_created = set()
+
+def buffer_size(max_obstacles):
+    """
+    Number of float64 values in one snapshot buffer
+    """
+    return len(FIELDS) + MAX_LINES + len(OBSTACLE_COLUMNS) * max_obstacles
+
+class Snapshot:
+    def __init__(self, buffer, index, sequence, max_obstacles):
+        """
+        One published tick: scalars copied out, lines and obstacle columns as
+        views into the shared buffer (check SharedState.consistent after using them)
+        """
+        self.index = index
+        self.sequence = sequence
+        fields = buffer[:len(FIELDS)].tolist()
+        self.tick = int(fields[0])
+        self.game_state = GAME_STATES[int(fields[1])]
+        self.frame = int(fields[2])
+        self.score = int(fields[3])
+        self.car_x, self.car_previous_x, self.car_y, self.distance = fields[4:8]
+        self.lines = buffer[len(FIELDS):len(FIELDS) + int(fields[8])]
+        self.obstacles = int(fields[9])
+
+        # Full-capacity columns (x, y, width, height, speed); the first
+        # `obstacles` entries are live, like ObstacleArrayManager arrays
+        start = len(FIELDS) + MAX_LINES
+        self.columns = buffer[start:].reshape(len(OBSTACLE_COLUMNS), max_obstacles)
+
+    def copy(self):
+        """
+        Replace the views with copies of the live lines and obstacles, so the
+        snapshot stays valid after the writer reuses its buffer
+        """
+        self.lines = self.lines.copy()
+        self.columns = self.columns[:, :self.obstacles].copy()
+
+class SharedState:
+    def __init__(self, name=None, max_obstacles=256):
+        """
+        Create a shared state block (name None) or attach to an existing one
+        max_obstacles: most obstacles a snapshot holds (when creating)
+        """
+        if name is None:
+            size = (len(HEADER) + 2 * buffer_size(max_obstacles)) * 8
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+            _created.add(self.memory.name)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            self.owner = False
+            # Attaching registers the block with the resource tracker, which
+            # deletes it when the tracker's processes exit; a process that is
+            # neither the creator nor one of its children has its own tracker
+            if multiprocessing.parent_process() is None and name not in _created:
+                resource_tracker.unregister(self.memory._name, "shared_memory")
+        self.name = self.memory.name
+        self.torn_reads = 0  # reads retried because the buffer was rewritten meanwhile
+
+        self.header = np.ndarray((len(HEADER),), dtype=np.int64, buffer=self.memory.buf)
+        if self.owner:
+            self.header[:] = 0
+            self.header[MAX_OBSTACLES] = max_obstacles
+            self.header[RUNNING] = 1
+        self.max_obstacles = int(self.header[MAX_OBSTACLES])
+        self.buffers = np.ndarray((2, buffer_size(self.max_obstacles)), dtype=np.float64,
+                                  buffer=self.memory.buf, offset=len(HEADER) * 8)
+
+    def publish(self, simulation, game_state, tick):
+        """
+        Write one tick into the buffer readers are not using and make it the latest
+        (obstacles beyond max_obstacles are left out and the tick is counted
+        in the header, see truncated)
+        """
+        from obstacle_array import obstacle_arrays
+
+        header = self.header
+        index = 1 - int(header[LATEST])
+        buffer = self.buffers[index]
+        header[SEQUENCE + index] += 1  # odd: being written
+
+        road = simulation.road
+        car = simulation.car
+        lines = road.line_positions[:MAX_LINES]
+        arrays = obstacle_arrays(simulation.obstacle_manager)
+        count = len(arrays[0])
+        if count > self.max_obstacles:
+            count = self.max_obstacles
+            header[TRUNCATED] += 1
+        buffer[:len(FIELDS)] = (tick, GAME_STATES.index(game_state), simulation.frame,
+                                simulation.score, car.x, car.previous_x, car.y,
+                                road.distance, len(lines), count)
+        buffer[len(FIELDS):len(FIELDS) + len(lines)] = lines
+        columns = buffer[len(FIELDS) + MAX_LINES:].reshape(len(OBSTACLE_COLUMNS), self.max_obstacles)
+        for column, values in zip(columns, arrays):
+            column[:count] = values[:count]
+
+        header[SEQUENCE + index] += 1  # even: complete
+        header[LATEST] = index
+
+    def read(self, timeout=1.0, copy=False):
+        """
+        Latest complete snapshot (retries while the writer is switching buffers)
+        timeout: most seconds to retry; a buffer left half-written that long
+                 means the simulation process died or stalled while publishing
+        copy: copy the lines and live obstacles out of the shared buffer
+              before checking it, so the snapshot can be used for as long as
+              needed (else they are views, see consistent)
+        Returns: Snapshot
+        """
+        header = self.header
+        deadline = None
+        while True:
+            index = int(header[LATEST])
+            sequence = int(header[SEQUENCE + index])
+            if sequence % 2 == 0:
+                snapshot = Snapshot(self.buffers[index], index, sequence, self.max_obstacles)
+                if copy:
+                    snapshot.copy()
+                if self.consistent(snapshot):
+                    return snapshot
+                self.torn_reads += 1
+
+            # Give the writer the CPU to finish the buffer, but not forever
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif not self.running() or time.monotonic() > deadline:
+                raise RuntimeError(f"No complete snapshot in shared state {self.name}: "
+                                   f"the simulation process stopped while publishing")
+            time.sleep(0)
+
+    def consistent(self, snapshot):
+        """
+        Whether a snapshot's buffer has not been written since it was read
+        (views taken from it are only valid while this is true)
+        """
+        return int(self.header[SEQUENCE + snapshot.index]) == snapshot.sequence
+
+    def running(self):
+        """
+        Whether the simulation process is still publishing
+        """
+        return bool(self.header[RUNNING])
+
+    def truncated(self):
+        """
+        Number of ticks published with obstacles left out (more than max_obstacles)
+        """
+        return int(self.header[TRUNCATED])
+
+    def close(self):
+        """
+        Detach from the block (and delete it when this object created it)
+        """
+        if self.owner:
+            self.header[RUNNING] = 0
+        # Views must be released before the memory can be closed
+        self.header = None
+        self.buffers = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+            _created.discard(self.name)
+
+def run_simulation(name, connection, seed=None, backend="list", rate=SIMULATION_RATE):
+    """
+    Simulation process: run the game rules at a fixed rate, publish every
+    tick and apply input from the pipe until a viewer asks to quit
+    connection: receiving end of a pipe of ("keys", left, right), ("start",)
+                and ("quit",) messages
+    seed: seed of the sequence of game seeds (None for a random one)
+    """
+    from headless import make_obstacle_manager
+    from simulation import Simulation
+
+    state = SharedState(name)
+    simulation = Simulation(make_obstacle_manager(backend))
+    rng = random.Random(seed)
+    game_state = "menu"
+    left = right = False
+
+    time_step = 1.0 / rate
+    tick = 0
+    state.publish(simulation, game_state, tick)
+    next_tick = time.perf_counter() + time_step
+    running = True
+    while running:
+        # Input that arrived since the last tick
+        try:
+            while connection.poll():
+                message = connection.recv()
+                if message[0] == "keys":
+                    _, left, right = message
+                elif message[0] == "start" and game_state != "playing":
+                    # Every game gets its own seed, like GameWindow.start_game
+                    simulation.reset(rng.randrange(2**63))
+                    game_state = "playing"
+                elif message[0] == "quit":
+                    running = False
+        except EOFError:
+            running = False  # the controlling viewer is gone
+
+        # Same rules as GameWindow.update
+        if game_state == "playing":
+            simulation.step(left, right)
+            if simulation.game_over:
+                game_state = "game_over"
+        tick += 1
+        state.publish(simulation, game_state, tick)
+
+        # Wait for the next tick; a slower machine drops time instead of catching up
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+            next_tick += time_step
+        else:
+            next_tick = time.perf_counter() + time_step
+
+    state.header[RUNNING] = 0
+    state.close()
+
+def watch(name, seconds=None):
+    """
+    Headless reader: print the tick rate, game state and score of a running
+    simulation once a second (needs neither pygame nor OpenGL)
+    seconds: stop after this long (None runs until the simulation stops)
+    """
+    state = SharedState(name)
+    start = time.perf_counter()
+    last_tick = state.read().tick
+    while state.running() and (seconds is None or time.perf_counter() - start < seconds):
+        time.sleep(1.0)
+        snapshot = state.read()
+        print(f"tick {snapshot.tick} ({snapshot.tick - last_tick} per second), "
+              f"{snapshot.game_state}, frame {snapshot.frame}, score {snapshot.score}, "
+              f"{snapshot.obstacles} obstacles")
+        if state.truncated():
+            print(f"  {state.truncated()} ticks had more than {state.max_obstacles} obstacles "
+                  f"(the rest were not shared)")
+        last_tick = snapshot.tick
+    snapshot = None  # release its views before detaching
+    state.close()
+
+def main():
+    """
+    Watch a running shared simulation without a window
+    """
+    parser = argparse.ArgumentParser(description="Print the state of a shared simulation")
+    parser.add_argument("name", help="shared state block name (printed by shared_view.py)")
+    parser.add_argument("--seconds", type=float, default=None, help="stop after this many seconds")
+    args = parser.parse_args()
+    watch(args.name, args.seconds)
+
+if __name__ == "__main__":
+    main()
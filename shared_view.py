@@ -0,0 +1,173 @@
+"""
+Shared view file - contains SharedGameWindow, a GameWindow that draws the
+snapshots a simulation process publishes through shared_state.py, and the
+command that starts the simulation process with one or more viewers
+The simulation and the OpenGL submission run in separate processes, so
+neither waits for the other's GIL
+"""
+import argparse
+import multiprocessing
+import pygame
+from headless import BACKENDS
+from main import GameWindow, RENDER_MODES
+from obstacle_array import ObstacleArrayManager
+from shared_state import SharedState, run_simulation
+
+class SharedGameWindow(GameWindow):
+    def __init__(self, name, connection=None, width=800, height=600, render_mode="capped",
+                 scenery_seed=None):
+        """
+        Create a window that shows a shared simulation
+        name: shared state block to read
+        connection: sending end of the simulation's input pipe (None for a
+                    viewer that only watches)
+        """
+        self.shared_state = SharedState(name)
+        self.connection = connection
+        self.sent_keys = None
+        self.snapshot = None
+        self.truncated = 0  # ticks seen with obstacles left out of the snapshot
+        super().__init__(width, height, render_mode, scenery_seed=scenery_seed)
+
+        # The local simulation only holds what is drawn; obstacle arrays are
+        # the live obstacles copied out of the latest snapshot
+        self.simulation.obstacle_manager = ObstacleArrayManager(capacity=1)
+        self.read_snapshot()
+
+    def send(self, message):
+        """
+        Send input to the simulation process (ignored by watch-only viewers)
+        """
+        if self.connection is None:
+            return
+        try:
+            self.connection.send(message)
+        except OSError:
+            pass  # the simulation already stopped
+
+    def start_game(self):
+        """
+        Ask the simulation to start a new game (SPACE on the menu, R after game over)
+        """
+        self.send(("start",))
+
+    def handle_events(self):
+        """
+        Handle window events; stop when the simulation process stops
+        """
+        return super().handle_events() and self.shared_state.running()
+
+    def update(self):
+        """
+        Send the arrow keys to the simulation (only when they change) and
+        take its latest tick
+        """
+        if self.connection is not None:
+            keys = pygame.key.get_pressed()
+            key_state = (bool(keys[pygame.K_LEFT]), bool(keys[pygame.K_RIGHT]))
+            if key_state != self.sent_keys:
+                self.send(("keys",) + key_state)
+                self.sent_keys = key_state
+        self.read_snapshot()
+
+        # Say in the title when the snapshots could not hold every obstacle
+        truncated = self.shared_state.truncated()
+        if truncated != self.truncated:
+            self.truncated = truncated
+            pygame.display.set_caption(f"Car Road Simulation - {truncated} ticks had more than "
+                                       f"{self.shared_state.max_obstacles} obstacles, raise --max-obstacles")
+
+    def read_snapshot(self):
+        """
+        Set the local car, road and obstacles from the latest snapshot (its
+        obstacles are copied and checked before drawing, so a tick published
+        while the frame is drawn can not tear it)
+        """
+        snapshot = self.shared_state.read(copy=True)
+        self.snapshot = snapshot
+        self.game_state = snapshot.game_state
+
+        simulation = self.simulation
+        simulation.frame = snapshot.frame
+        simulation.score = snapshot.score
+        car = simulation.car
+        car.x, car.previous_x, car.y = snapshot.car_x, snapshot.car_previous_x, snapshot.car_y
+        road = simulation.road
+        road.line_positions[:] = snapshot.lines.tolist()
+        road.distance = snapshot.distance
+
+        manager = simulation.obstacle_manager
+        manager.x, manager.y, manager.width, manager.height, manager.speed = snapshot.columns
+        manager.count = snapshot.obstacles
+
+    def run(self):
+        """
+        Main loop; quitting the controlling viewer stops the simulation
+        """
+        try:
+            super().run()
+        finally:
+            self.send(("quit",))
+            self.snapshot = None
+            self.shared_state.close()
+
+def run_viewer(name, connection=None, render_mode="capped", scenery_seed=None):
+    """
+    Open a window on a shared simulation and run it until it is closed
+    """
+    SharedGameWindow(name, connection, render_mode=render_mode, scenery_seed=scenery_seed).run()
+
+def main():
+    """
+    Start a simulation process and viewers, or attach a viewer to a running one
+    """
+    parser = argparse.ArgumentParser(description="Car Road Simulation with the simulation in its own process")
+    parser.add_argument("--viewers", type=int, default=1,
+                        help="windows showing the game (the first one reads the keyboard)")
+    parser.add_argument("--attach", metavar="NAME",
+                        help="open a watch-only viewer on a running shared simulation")
+    parser.add_argument("--backend", choices=BACKENDS, default="list",
+                        help="obstacle storage backend of the simulation process")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the game seeds")
+    parser.add_argument("--max-obstacles", type=int, default=256,
+                        help="most obstacles a shared snapshot holds")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="capped",
+                        help="frame rate limit of the viewers")
+    parser.add_argument("--scenery-seed", type=int, default=None, metavar="SEED",
+                        help="stream endless procedural scenery made from this seed")
+    args = parser.parse_args()
+
+    if args.attach:
+        run_viewer(args.attach, None, args.render_mode, args.scenery_seed)
+        return
+
+    # Spawned processes start clean (no pygame or OpenGL state copied by fork)
+    context = multiprocessing.get_context("spawn")
+    state = SharedState(max_obstacles=args.max_obstacles)
+    receiver, sender = context.Pipe(duplex=False)
+    simulation_process = context.Process(target=run_simulation, daemon=True,
+                                         args=(state.name, receiver, args.seed, args.backend))
+    simulation_process.start()
+    receiver.close()  # only the simulation process reads input
+    viewers = [context.Process(target=run_viewer, daemon=True,
+                               args=(state.name, None, args.render_mode, args.scenery_seed))
+               for _ in range(args.viewers - 1)]
+    for viewer in viewers:
+        viewer.start()
+    print(f"Shared state {state.name}: attach with "
+          f"'python shared_view.py --attach {state.name}' or 'python shared_state.py {state.name}'")
+
+    try:
+        run_viewer(state.name, sender, args.render_mode, args.scenery_seed)
+    finally:
+        try:
+            sender.send(("quit",))
+        except OSError:
+            pass  # the simulation already stopped
+        simulation_process.join(5)
+        for viewer in viewers:
+            viewer.join(5)
+        state.close()
+
+if __name__ == "__main__":
+    main()
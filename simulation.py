@@ -0,0 +1,245 @@
+"""
+Simulation file - contains the game rules without any window or OpenGL code
+"""
+import random
+from car import Car
+from road import Road
+from obstacle import ObstacleManager
+
+# Game parameters Simulation.configure can change, with their default values
+DEFAULT_CONFIG = {
+    "spawn_interval": 120,   # frames between obstacle spawns
+    "obstacle_speed": 0.15,  # distance obstacles move down per frame
+    "car_speed": 0.1,        # distance the car moves sideways per frame
+    "road_width": 6,         # width of the road obstacles spawn on
+}
+
+class Simulation:
+    def __init__(self, obstacle_manager=None, seed=None, traffic=None):
+        """
+        Create a simulation that owns the car, road, obstacles and score
+        The simulation only knows about abstract left/right actions,
+        so it can run with or without a window
+        obstacle_manager: obstacle storage to use (ObstacleManager by default)
+        seed: seed for obstacle placement, so the same seed and actions replay
+              the same game (the global random module is used when None)
+        traffic: optional TrafficManager with AI vehicles sharing the road
+        """
+        self.car = Car()
+        self.car_speed = self.car.speed  # kept when reset makes a new car
+        self.road = Road()
+        self.obstacle_manager = obstacle_manager if obstacle_manager is not None else ObstacleManager()
+
+        # Give the obstacle manager its own random generator when seeded
+        self.seed = seed
+        if seed is not None:
+            self.obstacle_manager.rng = random.Random(seed)
+
+        # AI vehicles (the car collides with them and scores by passing them)
+        self.traffic = traffic
+        if traffic is not None and seed is not None:
+            traffic.reset(seed)
+
+        # Game state
+        self.score = 0
+        self.game_over = False
+        self.frame = 0  # number of steps since the game started
+
+        # Optional FrameProfiler timing each part of step (None costs nothing)
+        self.profiler = None
+
+        # Count contacts between frame ends too, so obstacles faster than the
+        # car is tall can not pass through it (every step uses swept checks)
+        self.continuous_collision = False
+
+    def reset(self, seed=None):
+        """
+        Start a new game (new car, no obstacles, zero score)
+        seed: new seed for obstacle placement (keeps the current generator when None)
+        """
+        if seed is not None:
+            self.seed = seed
+            self.obstacle_manager.rng = random.Random(seed)
+        self.car = Car()
+        self.car.speed = self.car_speed
+        self.obstacle_manager.reset()
+        if self.traffic is not None:
+            self.traffic.reset(seed)
+        self.score = 0
+        self.game_over = False
+        self.frame = 0
+
+    def configure(self, spawn_interval=None, obstacle_speed=None, car_speed=None, road_width=None):
+        """
+        Change game parameters (see DEFAULT_CONFIG; None keeps a parameter)
+        Obstacles already on the road keep their speed; the new values last
+        across reset
+        """
+        manager = self.obstacle_manager
+        if spawn_interval is not None:
+            manager.spawn_interval = spawn_interval
+        if obstacle_speed is not None:
+            manager.obstacle_speed = obstacle_speed
+        if car_speed is not None:
+            self.car_speed = car_speed
+            self.car.speed = car_speed
+        if road_width is not None:
+            manager.road_width = road_width
+            self.road.road_width = road_width
+
+    def get_state(self):
+        """
+        Snapshot of everything that decides how the game continues: frame,
+        score, car, road lines, obstacles, traffic and the random generators
+        Snapshots are immutable values (or arrays nobody writes to), so one
+        snapshot can be restored many times, e.g. to try different actions
+        Returns: opaque state for set_state
+        """
+        traffic_state = self.traffic.get_state() if self.traffic is not None else None
+        return (self.frame, self.score, self.game_over, self.car.get_state(), self.road.get_state(),
+                self.obstacle_manager.get_state(), self.obstacle_manager.rng.getstate(), traffic_state)
+
+    def set_state(self, state):
+        """
+        Restore a snapshot from get_state
+        """
+        (self.frame, self.score, self.game_over, car_state, road_state,
+         obstacle_state, rng_state, traffic_state) = state
+        self.car.set_state(car_state)
+        self.road.set_state(road_state)
+        self.obstacle_manager.set_state(obstacle_state)
+        self.obstacle_manager.rng.setstate(rng_state)
+        if traffic_state is not None:
+            self.traffic.set_state(traffic_state)
+
+    def step(self, left=False, right=False, frames=1):
+        """
+        Advance the simulation by one frame
+        left, right: actions for the car during this frame
+        frames: number of frames to advance at once with the same actions;
+                coarse steps use swept collision and score checks, so the game
+                ends on the same frame with the same score as single steps
+        Returns: number of points scored during this frame
+        """
+        if self.game_over:
+            return 0
+        if frames > 1 or self.continuous_collision:
+            return self._step_swept(left, right, frames)
+        profiler = self.profiler
+
+        # Update car
+        if profiler is not None:
+            profiler.begin("update.car")
+        self.car.update(left, right)
+
+        # Update road
+        if profiler is not None:
+            profiler.end("update.car")
+            profiler.begin("update.road")
+        self.road.update()
+
+        # Update obstacles
+        if profiler is not None:
+            profiler.end("update.road")
+            profiler.begin("update.obstacles")
+        self.obstacle_manager.update()
+
+        # Update traffic (vehicles react to where the car is now)
+        traffic = self.traffic
+        if profiler is not None:
+            profiler.end("update.obstacles")
+            profiler.begin("update.traffic")
+        if traffic is not None:
+            traffic.update(self.car)
+
+        # Check for collision
+        if profiler is not None:
+            profiler.end("update.traffic")
+            profiler.begin("update.collision")
+        if self.obstacle_manager.check_collision(self.car):
+            self.game_over = True
+        elif traffic is not None and traffic.check_collision(self.car):
+            self.game_over = True
+
+        # Check for score
+        if profiler is not None:
+            profiler.end("update.collision")
+            profiler.begin("update.score")
+        points = self.obstacle_manager.check_score(self.car)
+        if traffic is not None:
+            points += traffic.check_score(self.car)
+        self.score += points
+        if profiler is not None:
+            profiler.end("update.score")
+
+        self.frame += 1
+        return points
+
+    def _step_swept(self, left, right, frames):
+        """
+        Advance `frames` frames at once, checking collisions and score over
+        the whole movement instead of only at its end
+        Returns: number of points scored
+        """
+        traffic = self.traffic
+        if traffic is not None and frames > 1:
+            # Traffic has no swept checks, so it still moves one frame at a time
+            points = 0
+            for _ in range(frames):
+                points += self._step_swept(left, right, 1)
+                if self.game_over:
+                    break
+            return points
+        profiler = self.profiler
+        car = self.car
+        obstacle_manager = self.obstacle_manager
+
+        # Update car (remembers its movement for the swept checks)
+        if profiler is not None:
+            profiler.begin("update.car")
+        car.update(left, right, frames)
+
+        # Update road
+        if profiler is not None:
+            profiler.end("update.car")
+            profiler.begin("update.road")
+        for _ in range(frames):
+            self.road.update()
+
+        # Update obstacles
+        if profiler is not None:
+            profiler.end("update.road")
+            profiler.begin("update.obstacles")
+        obstacle_manager.update(frames)
+
+        # Update traffic (only single frames get here)
+        if profiler is not None:
+            profiler.end("update.obstacles")
+            profiler.begin("update.traffic")
+        if traffic is not None:
+            traffic.update(car)
+
+        # First frame of the step with a collision (0 when there is none)
+        if profiler is not None:
+            profiler.end("update.traffic")
+            profiler.begin("update.collision")
+        contact = obstacle_manager.sweep_collision(car, frames, self.continuous_collision)
+        if not contact and traffic is not None and traffic.check_collision(car):
+            contact = 1
+
+        # Score obstacles passed up to the end of the step, or up to the
+        # collision (the game stops there)
+        if profiler is not None:
+            profiler.end("update.collision")
+            profiler.begin("update.score")
+        points = obstacle_manager.sweep_score(car, frames, contact or frames)
+        if traffic is not None:
+            points += traffic.check_score(car)
+        self.score += points
+        if profiler is not None:
+            profiler.end("update.score")
+
+        if contact:
+            self.game_over = True
+        self.frame += contact or frames
+        return points
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Spatial index file - contains SpatialHash, a uniform grid used as broad phase
+for collision and scoring queries
+"""
+import math
+
+class SpatialHash:
+    def __init__(self, cell_size=1.0):
+        """
+        Create an empty spatial hash
+        cell_size: width and height of one grid cell in road coordinates
+        """
+        self.cell_size = cell_size
+        self.cells = {}  # (cell x, cell y) -> set of items in that cell
+        self.item_cells = {}  # item -> (cx0, cy0, cx1, cy1) cell range it occupies
+        self.extent = None  # cell range that has held items since the last clear
+
+    def _cell(self, value):
+        """
+        Grid coordinate for a road coordinate (infinite values stay infinite)
+        """
+        if math.isinf(value):
+            return value
+        return math.floor(value / self.cell_size)
+
+    def cell_range(self, left, right, top, bottom):
+        """
+        Cell range covered by a rectangle with finite bounds
+        Returns: (cx0, cy0, cx1, cy1)
+        """
+        size = self.cell_size
+        floor = math.floor
+        return floor(left / size), floor(bottom / size), floor(right / size), floor(top / size)
+
+    def _add(self, item, cell_range):
+        """
+        Put item into every cell of a cell range
+        """
+        cx0, cy0, cx1, cy1 = cell_range
+        
+        # Grow the extent so unbounded queries can be clamped to it
+        if self.extent is None:
+            self.extent = cell_range
+        else:
+            ex0, ey0, ex1, ey1 = self.extent
+            if cx0 < ex0 or cy0 < ey0 or cx1 > ex1 or cy1 > ey1:
+                self.extent = (min(cx0, ex0), min(cy0, ey0), max(cx1, ex1), max(cy1, ey1))
+        
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket is None:
+                    bucket = self.cells[(cx, cy)] = set()
+                bucket.add(item)
+
+    def _discard(self, item, cell_range):
+        """
+        Take item out of every cell of a cell range (dropping empty cells)
+        """
+        cx0, cy0, cx1, cy1 = cell_range
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self.cells[(cx, cy)]
+                bucket.discard(item)
+                if not bucket:
+                    del self.cells[(cx, cy)]
+
+    def insert(self, item, left, right, top, bottom):
+        """
+        Add item with its bounds to the index
+        """
+        cell_range = self.cell_range(left, right, top, bottom)
+        self.item_cells[item] = cell_range
+        self._add(item, cell_range)
+
+    def move(self, item, left, right, top, bottom):
+        """
+        Update bounds of an item already in the index
+        Cells are only touched when the item crosses a cell border
+        """
+        self.move_to_cells(item, self.cell_range(left, right, top, bottom))
+
+    def move_to_cells(self, item, new_range):
+        """
+        Move an item already in the index to a cell range from cell_range()
+        (lets several indexes with the same cell size share one computation)
+        """
+        old_range = self.item_cells[item]
+        if new_range == old_range:
+            return
+        self._discard(item, old_range)
+        self._add(item, new_range)
+        self.item_cells[item] = new_range
+
+    def remove(self, item):
+        """
+        Remove item from the index
+        """
+        self._discard(item, self.item_cells.pop(item))
+        if not self.item_cells:
+            self.extent = None
+
+    def clear(self):
+        """
+        Remove all items
+        """
+        self.cells.clear()
+        self.item_cells.clear()
+        self.extent = None
+
+    def query(self, left, right, top, bottom):
+        """
+        Find items whose cells overlap a rectangle (bounds may be infinite)
+        Returns: set of candidate items (callers still run the exact overlap test)
+        """
+        candidates = set()
+        if self.extent is None:
+            return candidates
+
+        # Clamp the rectangle to the cells that can hold items
+        cx0, cy0, cx1, cy1 = self._cell(left), self._cell(bottom), self._cell(right), self._cell(top)
+        ex0, ey0, ex1, ey1 = self.extent
+        cx0, cy0 = max(cx0, ex0), max(cy0, ey0)
+        cx1, cy1 = min(cx1, ex1), min(cy1, ey1)
+
+        # Small rectangle: look up each of its cells
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(self.cells):
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    bucket = self.cells.get((cx, cy))
+                    if bucket:
+                        candidates |= bucket
+            return candidates
+
+        # Large rectangle: walk the occupied cells instead
+        for (cx, cy), bucket in self.cells.items():
+            if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                candidates |= bucket
+        return candidates
+
+    def __len__(self):
+        """
+        Number of items in the index
+        """
+        return len(self.item_cells)
@@ -0,0 +1,211 @@
+"""
+Sprite batch file - contains SpriteBatch, which draws all obstacles and the car
+with a few vertex array draw calls per frame
+"""
+import math
+import numpy as np
+from OpenGL.GL import *
+from gl_state import render_state
+from obstacle_array import obstacle_arrays
+
+# Number of segments in a wheel circle (same as Car._draw_wheel)
+WHEEL_SEGMENTS = 20
+
+def _quad(left, bottom, right, top):
+    """
+    Two triangles covering a rectangle
+    Returns: list of 6 (x, y) points
+    """
+    return [(left, bottom), (right, bottom), (right, top),
+            (left, bottom), (right, top), (left, top)]
+
+def _loop(points):
+    """
+    Line segments joining points into a closed loop (like GL_LINE_LOOP)
+    Returns: list of 2 * len(points) (x, y) points
+    """
+    segments = []
+    for i, point in enumerate(points):
+        segments.append(point)
+        segments.append(points[(i + 1) % len(points)])
+    return segments
+
+def _part(points, color, offsets=None):
+    """
+    Build one colored piece of a template
+    points: vertex positions (scaled by the sprite size for obstacles)
+    offsets: fixed offsets added after scaling (zero when None)
+    Returns: (points, offsets, colors) arrays
+    """
+    points = np.array(points, dtype=np.float32)
+    offsets = np.zeros_like(points) if offsets is None else np.array(offsets, dtype=np.float32)
+    colors = np.tile(np.array(color, dtype=np.float32), (len(points), 1))
+    return points, offsets, colors
+
+def _join(parts):
+    """
+    Concatenate template parts into one (points, offsets, colors) template
+    """
+    return tuple(np.concatenate([part[i] for part in parts]) for i in range(3))
+
+def obstacle_templates():
+    """
+    Obstacle geometry in units of the obstacle size (same look as Obstacle.draw)
+    Returns: dict of layer name -> (points, offsets, colors)
+    """
+    corners = [(-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)]
+
+    # Warning stripes stay 0.1 away from the left and right sides
+    stripes, stripe_offsets = [], []
+    for i in range(3):
+        stripe_y = -0.5 + (i + 1) / 4
+        stripes += [(-0.5, stripe_y), (0.5, stripe_y)]
+        stripe_offsets += [(0.1, 0), (-0.1, 0)]
+
+    return {
+        "body": _part(_quad(-0.5, -0.5, 0.5, 0.5), (0.8, 0.2, 0.2)),
+        "border": _part(_loop(corners), (0.0, 0.0, 0.0)),
+        "stripes": _part(stripes, (1.0, 1.0, 0.0), stripe_offsets),
+    }
+
+def car_templates(car, wheel_segments=WHEEL_SEGMENTS):
+    """
+    Car geometry relative to the car position (same look as Car.draw)
+    Returns: dict of layer name -> (points, offsets, colors)
+    """
+    width, height, radius = car.width, car.height, car.wheel_radius
+
+    # Wheel circle points are computed once here instead of every frame
+    circle = [(radius * math.cos(2 * math.pi * i / wheel_segments),
+               radius * math.sin(2 * math.pi * i / wheel_segments))
+              for i in range(wheel_segments)]
+
+    fills = [
+        _part(_quad(-width/2, -height/2, width/2, height/2), (0.2, 0.4, 0.8)),
+        _part(_quad(-width/3, -height/4, width/3, height/4), (0.8, 0.9, 1.0)),
+    ]
+    rims = []
+    for wheel_x in (-width/2.5, width/2.5):
+        wheel_y = -height/2 - 0.1
+        points = [(wheel_x + x, wheel_y + y) for x, y in circle]
+
+        # Triangle fan around the wheel center, as separate triangles
+        fan = []
+        for i in range(wheel_segments):
+            fan += [(wheel_x, wheel_y), points[i], points[(i + 1) % wheel_segments]]
+        fills.append(_part(fan, (0.1, 0.1, 0.1)))
+        rims.append(_part(_loop(points), (0.3, 0.3, 0.3)))
+
+    return {"fills": _join(fills), "rims": _join(rims)}
+
+class SpriteBatch:
+    # Layers in drawing order: (template name, OpenGL primitive, line width)
+    OBSTACLE_LAYERS = [("body", GL_TRIANGLES, None), ("border", GL_LINES, 2), ("stripes", GL_LINES, 1)]
+    CAR_LAYERS = [("fills", GL_TRIANGLES, None), ("rims", GL_LINES, 1)]
+
+    def __init__(self):
+        """
+        Create sprite batch with reusable vertex and color arrays
+        """
+        self.obstacle_templates = obstacle_templates()
+        self.car_templates = None
+        self.car_key = None  # car size the car templates were built for
+
+        # layer name -> (vertex array, color array, sprite capacity)
+        self.buffers = {}
+
+    def _buffer(self, name, template, count):
+        """
+        Get vertex and color arrays with room for `count` sprites of a template
+        Arrays only grow, so steady-state frames allocate nothing new
+        """
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer[2] < count:
+            capacity = max(count, 2 * buffer[2] if buffer else 64)
+            vertices = np.empty((capacity * len(template[0]), 2), dtype=np.float32)
+            colors = np.tile(template[2], (capacity, 1))  # colors never change
+            buffer = self.buffers[name] = (vertices, colors, capacity)
+        return buffer
+
+    def _begin_arrays(self):
+        """
+        Get ready to draw untextured vertex and color arrays
+        Client arrays stay enabled between draws; only glDrawArrays reads them
+        """
+        render_state.disable(GL_TEXTURE_2D)
+        render_state.enable_client(GL_VERTEX_ARRAY)
+        render_state.enable_client(GL_COLOR_ARRAY)
+        render_state.flush()
+
+    def _end_arrays(self):
+        """
+        Finish drawing arrays (color arrays leave the current color undefined)
+        """
+        render_state.reset_color()
+
+    def _draw_layer(self, vertices, colors, count, primitive, line_width):
+        """
+        Draw `count` vertices from vertex and color arrays in one call
+        """
+        if line_width is not None:
+            render_state.line_width(line_width)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glColorPointer(3, GL_FLOAT, 0, colors)
+        glDrawArrays(primitive, 0, count)
+
+    def draw_obstacles(self, obstacle_manager, alpha=1.0):
+        """
+        Draw every obstacle with one draw call per layer
+        alpha: position between the previous (0) and current (1) update;
+               obstacles move at constant speed, so their previous y is y + speed
+        """
+        x, y, width, height, speed = obstacle_arrays(obstacle_manager)
+        count = len(x)
+        if count == 0:
+            return
+
+        y = y + speed * (1 - alpha)
+        positions = np.stack([x, y], axis=1).astype(np.float32)[:, None, :]
+        sizes = np.stack([width, height], axis=1).astype(np.float32)[:, None, :]
+
+        self._begin_arrays()
+        for name, primitive, line_width in self.OBSTACLE_LAYERS:
+            points, offsets, _ = template = self.obstacle_templates[name]
+            vertices, colors, _ = self._buffer(name, template, count)
+
+            # vertex = obstacle position + template point * obstacle size + offset
+            used = vertices[:count * len(points)].reshape(count, len(points), 2)
+            np.multiply(points[None, :, :], sizes, out=used)
+            used += offsets
+            used += positions
+            self._draw_layer(vertices, colors, count * len(points), primitive, line_width)
+        self._end_arrays()
+
+    def draw_car(self, car, alpha=1.0):
+        """
+        Draw the car from its precomputed geometry
+        alpha: position between the previous (0) and current (1) update
+        """
+        # Build car geometry once (again only if the car size changes)
+        car_key = (car.width, car.height, car.wheel_radius, car.wheel_segments)
+        if car_key != self.car_key:
+            self.car_templates = car_templates(car, car.wheel_segments)
+            self.car_key = car_key
+
+        self._begin_arrays()
+        glPushMatrix()
+        x = car.previous_x + (car.x - car.previous_x) * alpha
+        glTranslatef(x, car.y, 0)
+        for name, primitive, line_width in self.CAR_LAYERS:
+            points, _, colors = self.car_templates[name]
+            self._draw_layer(points, colors, len(points), primitive, line_width)
+        glPopMatrix()
+        self._end_arrays()
+
+    def draw(self, obstacle_manager, car, alpha=1.0):
+        """
+        Draw all obstacles, then the car
+        alpha: position between the previous (0) and current (1) update
+        """
+        self.draw_obstacles(obstacle_manager, alpha)
+        self.draw_car(car, alpha)
@@ -0,0 +1,56 @@
+"""
+Sweep file - swept collision helpers for coarse simulation steps
+Times are measured in frames from the start of a step: during a step of
+`frames` frames every obstacle moves straight down at its speed and the car
+moves sideways at a constant velocity until it reaches the screen edge
+"""
+import math
+
+CAR_LIMIT = 4  # the car stops at x = -4 and x = 4 (same as Car.update)
+
+def overlap_times(start, velocity, low, high, limit=math.inf):
+    """
+    When a point moving from `start` at `velocity` (per frame, stopping at
+    -limit and limit) is strictly between low and high
+    Returns: (enter, leave) times; the interval is empty when leave <= enter
+    """
+    if velocity == 0:
+        if low < start < high:
+            return -math.inf, math.inf
+        return math.inf, -math.inf
+
+    # Mirror a point moving down so it moves up (the limits are symmetric)
+    if velocity < 0:
+        start, velocity, low, high = -start, -velocity, -high, -low
+
+    # Moving up: enters when passing low, leaves when reaching high
+    # (a point stopped by the limit below high never leaves)
+    enter = (low - start) / velocity if limit > low else math.inf
+    leave = (high - start) / velocity if high <= limit else math.inf
+    return enter, leave
+
+def first_contact(enter, leave, frames, continuous=False):
+    """
+    First frame of a step (1 to frames) touched by a contact lasting from
+    time `enter` to time `leave`
+    continuous: False counts contacts only at the end of frames (exactly what
+                stepping one frame at a time sees); True counts any contact
+                during the step, so fast objects can not pass through the car
+    Returns: frame number, or 0 when there is no contact
+    """
+    if enter >= frames or leave <= enter:
+        return 0
+    frame = math.floor(max(enter, 0.0)) + 1
+    if continuous:
+        return frame if leave > max(enter, 0.0) else 0
+    return frame if leave > frame else 0
+
+def passing_frame(top, speed, line, frames):
+    """
+    Frame of a step in which an obstacle top that ends the step at `top`
+    first went below `line` (call only when top < line)
+    Returns: frame number (1 to frames)
+    """
+    if speed <= 0:
+        return 1
+    return max(math.floor(frames - (line - top) / speed) + 1, 1)
@@ -0,0 +1,236 @@
+"""
+Telemetry file - records per-frame simulation events into a columnar trace
+Every column is a fixed-width NumPy array stored in memory-mapped segment
+files of a fixed number of frames, so recording appends without copying,
+memory use stays the same however long the run is, and analysis tools can
+np.memmap the trace while it is still being written
+
+Trace directory layout:
+    meta.json                     columns, dtypes, segment size, frames written
+    <column>.<segment>.bin        raw little-endian values, segment_frames each
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+# Columns of a trace: name -> dtype (little-endian so traces are portable)
+COLUMNS = {
+    "game": "<u4",       # game number since recording started
+    "frame": "<u4",      # frame number within the game
+    "car_x": "<f4",      # car position after the frame
+    "obstacles": "<u4",  # live obstacles after the frame
+    "spawns": "<u2",     # obstacles spawned during the frame
+    "points": "<i2",     # net points of the frame as returned by Simulation.step (signed)
+    "collision": "<u1",  # 1 when the frame ended the game (check_collision)
+}
+
+def segment_path(path, column, segment):
+    """
+    File holding one segment of a column
+    """
+    return os.path.join(path, f"{column}.{segment:06d}.bin")
+
+class TelemetryRecorder:
+    def __init__(self, path, segment_frames=65536, flush_frames=256, meta_interval=1.0,
+                 keep_segments=None):
+        """
+        Create a trace directory and start recording
+        path: trace directory (created if missing, an old trace in it is replaced)
+        segment_frames: frames per segment file (about 1 MB per 65,536 frames)
+        flush_frames: frames buffered before they are written into the segment
+        meta_interval: most seconds between meta.json updates (readers see the
+                       frames written up to the last update)
+        keep_segments: most segment files kept on disk; older ones are deleted
+                       (None keeps the whole run)
+        """
+        self.path = path
+        self.segment_frames = segment_frames
+        self.flush_frames = flush_frames
+        self.meta_interval = meta_interval
+        self.keep_segments = keep_segments
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith(".bin"):
+                os.remove(os.path.join(path, name))
+
+        # Frames are buffered as tuples (one cheap append) and written in blocks
+        self.rows = []
+        self.frames = 0  # frames written into segments
+        self.first_segment = 0  # oldest segment still on disk
+        self.segment = -1
+        self.maps = None  # memmaps of the current segment, by column
+
+        # Previous frame, to find spawns and new games
+        self.game = 0
+        self.last_frame = None
+        self.manager = None
+        self.last_spawns = 0
+        self.meta_time = 0.0
+        self._write_meta()
+
+    def record(self, simulation, points):
+        """
+        Append one frame (call after every single-frame Simulation.step)
+        points: points returned by the step
+        """
+        manager = simulation.obstacle_manager
+        if manager is not self.manager:
+            # New simulation (headless runs make one per game)
+            self.manager = manager
+            self.last_spawns = 0
+        if self.last_frame is not None and simulation.frame <= self.last_frame:
+            self.game += 1
+        self.last_frame = simulation.frame
+        spawns = manager.spawn_count - self.last_spawns
+        self.last_spawns = manager.spawn_count
+
+        # Same order as COLUMNS
+        rows = self.rows
+        rows.append((self.game, simulation.frame, simulation.car.x, len(manager),
+                     spawns, points, simulation.game_over))
+        if len(rows) >= self.flush_frames:
+            self.flush(False)
+
+    def flush(self, meta=True):
+        """
+        Write buffered frames into the segment files
+        meta: update meta.json now (else only when meta_interval has passed)
+        """
+        buffered = len(self.rows)
+        if not buffered:
+            return
+        values = dict(zip(COLUMNS, zip(*self.rows)))
+        written = 0
+        while written < buffered:
+            # Open the next segment when the current one is full
+            offset = self.frames % self.segment_frames
+            if offset == 0:
+                self._open_segment(self.frames // self.segment_frames)
+            count = min(buffered - written, self.segment_frames - offset)
+            for column, column_values in values.items():
+                self.maps[column][offset:offset + count] = column_values[written:written + count]
+            written += count
+            self.frames += count
+        self.rows.clear()
+
+        if meta or time.monotonic() - self.meta_time >= self.meta_interval:
+            self._write_meta()
+
+    def _open_segment(self, segment):
+        """
+        Create the files of a new segment (full size) and map them; the
+        previous segment is unmapped, so only one segment is ever mapped
+        """
+        if self.maps is not None:
+            for array in self.maps.values():
+                array.flush()
+        self.segment = segment
+        self.maps = {column: np.memmap(segment_path(self.path, column, segment), dtype=dtype,
+                                       mode="w+", shape=(self.segment_frames,))
+                     for column, dtype in COLUMNS.items()}
+
+        # Delete the oldest segments beyond the limit
+        if self.keep_segments is not None:
+            while segment - self.first_segment >= self.keep_segments:
+                for column in COLUMNS:
+                    os.remove(segment_path(self.path, column, self.first_segment))
+                self.first_segment += 1
+
+    def _write_meta(self):
+        """
+        Save the trace description (replaced in one step, so readers never
+        see a half-written file)
+        """
+        meta = {
+            "columns": COLUMNS,
+            "segment_frames": self.segment_frames,
+            "first_segment": self.first_segment,
+            "frames": self.frames,
+        }
+        self.meta_time = time.monotonic()
+        temporary = os.path.join(self.path, "meta.json.tmp")
+        with open(temporary, "w") as file:
+            json.dump(meta, file, indent=2)
+        os.replace(temporary, os.path.join(self.path, "meta.json"))
+
+    def close(self):
+        """
+        Write the last frames and unmap the segment
+        """
+        self.flush()
+        if self.maps is not None:
+            for array in self.maps.values():
+                array.flush()
+            self.maps = None
+
+def read_meta(path):
+    """
+    Load meta.json of a trace
+    """
+    with open(os.path.join(path, "meta.json")) as file:
+        return json.load(file)
+
+def open_trace(path):
+    """
+    Map every column of a trace without copying (works while it is recorded;
+    frames written after this call are not included)
+    Returns: (first frame still on disk, dict of column -> list of memmaps,
+             one per segment, cut to the frames written)
+    """
+    meta = read_meta(path)
+    segment_frames = meta["segment_frames"]
+    first = meta["first_segment"] * segment_frames
+    columns = {column: [] for column in meta["columns"]}
+    for start in range(first, meta["frames"], segment_frames):
+        segment = start // segment_frames
+        count = min(meta["frames"] - start, segment_frames)
+        for column, dtype in meta["columns"].items():
+            columns[column].append(np.memmap(segment_path(path, column, segment), dtype=dtype,
+                                             mode="r", shape=(count,)))
+    return first, columns
+
+def load_column(path, column):
+    """
+    One column of a trace as a single array (copies the segments)
+    """
+    _, columns = open_trace(path)
+    segments = columns[column]
+    if not segments:
+        return np.zeros(0, dtype=read_meta(path)["columns"][column])
+    return np.concatenate(segments)
+
+def summarize(path):
+    """
+    Summary of a trace
+    Returns: dict of statistics
+    """
+    first, columns = open_trace(path)
+    frames = sum(len(segment) for segment in columns["frame"])
+    collisions = sum(int(segment.sum()) for segment in columns["collision"])
+    games = int(columns["game"][-1][-1]) - int(columns["game"][0][0]) + 1 if frames else 0
+    return {
+        "frames": frames,
+        "first_frame": first,
+        "games": games,
+        "points": sum(int(segment.sum(dtype=np.int64)) for segment in columns["points"]),
+        "spawns": sum(int(segment.sum(dtype=np.int64)) for segment in columns["spawns"]),
+        "collisions": collisions,
+        "max_obstacles": max((int(segment.max()) for segment in columns["obstacles"] if len(segment)),
+                             default=0),
+    }
+
+def main():
+    """
+    Print a summary of a trace (it may still be recording)
+    """
+    parser = argparse.ArgumentParser(description="Summarize a telemetry trace")
+    parser.add_argument("path", help="trace directory")
+    args = parser.parse_args()
+
+    for name, value in summarize(args.path).items():
+        print(f"{name:>16}: {value}")
+
+if __name__ == "__main__":
+    main()
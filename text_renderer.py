@@ -2,42 +2,86 @@
 Text Renderer file - contains functions for rendering text on screen
 """
 import pygame
+import threading
+from collections import OrderedDict
 from OpenGL.GL import *
+from gl_state import render_state
+
+# Characters stored in the glyph atlas (printable ASCII)
+ATLAS_CHARACTERS = "".join(chr(code) for code in range(32, 127))
+
+# Pixel size of each font
+FONT_SIZES = {"normal": 36, "large": 72}
 
 class TextRenderer:
-    def __init__(self):
+    def __init__(self, cache_budget=8 * 1024 * 1024, background=True):
         """
         Initialize text renderer
+        cache_budget: maximum bytes of cached text textures (oldest are deleted first)
+        background: load fonts and glyph atlases in a background thread, so the
+                    first frames do not wait for them (else on first use)
         """
         pygame.font.init()
-        self.font = pygame.font.Font(None, 36)
-        self.large_font = pygame.font.Font(None, 72)
         
-    def render_text(self, text, x, y, color=(1.0, 1.0, 1.0), font_size="normal"):
+        # Fonts and glyph atlas surfaces by font size, filled by _load_fonts
+        # (the thread only makes pygame surfaces; OpenGL work stays in the main thread)
+        self.fonts = {}
+        self.atlas_surfaces = {}
+        self.loader = None
+        if background:
+            self.loader = threading.Thread(target=self._load_fonts, daemon=True)
+            self.loader.start()
+        
+        # Text textures cached by (text, font_size, color), least recently used first
+        self.texture_cache = OrderedDict()
+        self.cache_budget = cache_budget
+        self.cache_bytes = 0
+        
+        # One glyph atlas texture per font size, built on first use
+        self.atlases = {}
+        
+    def _load_fonts(self):
         """
-        Render text at specified position
-        text: text to render
-        x, y: position on screen (-10 to 10 range)
-        color: RGB color tuple (0.0 to 1.0)
-        font_size: "normal" or "large"
+        Load every font and render its glyph atlas surface
         """
-        # Choose font based on size
-        font = self.large_font if font_size == "large" else self.font
+        fonts = {}
+        atlas_surfaces = {}
+        for font_size, pixels in FONT_SIZES.items():
+            fonts[font_size] = pygame.font.Font(None, pixels)
+            atlas_surfaces[font_size] = self._render_atlas_surface(fonts[font_size])
+        self.atlas_surfaces = atlas_surfaces
+        self.fonts = fonts
         
-        # Create text surface
-        text_surface = font.render(text, True, 
-                                  (int(color[0]*255), int(color[1]*255), int(color[2]*255)))
+    def fonts_loading(self):
+        """
+        Whether the background thread is still loading fonts
+        """
+        return self.loader is not None and self.loader.is_alive()
         
-        # Get text dimensions
-        text_width = text_surface.get_width()
-        text_height = text_surface.get_height()
+    def _get_font(self, font_size):
+        """
+        Font for a font size, waiting for the background thread or loading
+        the fonts now when they are not ready
+        """
+        if self.loader is not None:
+            self.loader.join()
+            self.loader = None
+        if not self.fonts:
+            self._load_fonts()
+        return self.fonts[font_size]
         
+    def _create_texture(self, surface):
+        """
+        Upload a pygame surface into a new OpenGL texture
+        Returns: texture id
+        """
         # Convert surface to OpenGL texture
-        text_data = pygame.image.tostring(text_surface, "RGBA", True)
+        data = pygame.image.tostring(surface, "RGBA", True)
         
-        # Generate texture
+        # Generate texture (not allowed inside a glBegin block)
+        render_state.flush()
         texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture_id)
+        render_state.bind_texture(texture_id)
         
         # Set texture parameters
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
@@ -46,22 +90,82 @@ class TextRenderer:
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
         
         # Upload texture data
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, text_width, text_height, 0, 
-                    GL_RGBA, GL_UNSIGNED_BYTE, text_data)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, surface.get_width(), surface.get_height(), 0, 
+                    GL_RGBA, GL_UNSIGNED_BYTE, data)
+        return texture_id
+        
+    def _get_text_texture(self, text, color, font_size):
+        """
+        Find the texture for a text, rendering and caching it when missing
+        Returns: (texture id, width, height)
+        """
+        key = (text, font_size, tuple(color))
+        entry = self.texture_cache.get(key)
+        if entry is not None:
+            # Mark as most recently used
+            self.texture_cache.move_to_end(key)
+            return entry[:3]
+        
+        # Choose font based on size
+        font = self._get_font("large" if font_size == "large" else "normal")
+        
+        # Create text surface
+        text_surface = font.render(text, True, 
+                                  (int(color[0]*255), int(color[1]*255), int(color[2]*255)))
+        texture_id = self._create_texture(text_surface)
+        width, height = text_surface.get_width(), text_surface.get_height()
+        size = width * height * 4
+        
+        # Delete least recently used textures until the new one fits the budget
+        while self.texture_cache and self.cache_bytes + size > self.cache_budget:
+            _, (old_id, _, _, old_size) = self.texture_cache.popitem(last=False)
+            glDeleteTextures([old_id])
+            render_state.reset_texture(old_id)
+            self.cache_bytes -= old_size
         
-        # Enable texturing
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, texture_id)
+        self.texture_cache[key] = (texture_id, width, height, size)
+        self.cache_bytes += size
+        return texture_id, width, height
+        
+    def clear_cache(self):
+        """
+        Delete all cached text textures and glyph atlases
+        """
+        render_state.flush()
+        for texture_id, _, _, _ in self.texture_cache.values():
+            glDeleteTextures([texture_id])
+            render_state.reset_texture(texture_id)
+        for atlas in self.atlases.values():
+            glDeleteTextures([atlas["texture"]])
+            render_state.reset_texture(atlas["texture"])
+        self.texture_cache.clear()
+        self.atlases.clear()
+        self.cache_bytes = 0
+        
+    def render_text(self, text, x, y, color=(1.0, 1.0, 1.0), font_size="normal"):
+        """
+        Render text at specified position
+        text: text to render
+        x, y: position on screen (-10 to 10 range)
+        color: RGB color tuple (0.0 to 1.0)
+        font_size: "normal" or "large"
+        """
+        # Get cached texture (rendered and uploaded only the first time)
+        texture_id, text_width, text_height = self._get_text_texture(text, color, font_size)
+        
+        # Enable texturing (left on afterwards; untextured drawing turns it off)
+        render_state.enable(GL_TEXTURE_2D)
+        render_state.bind_texture(texture_id)
         
         # Set color to white (texture will provide color)
-        glColor3f(1.0, 1.0, 1.0)
+        render_state.color3(1.0, 1.0, 1.0)
         
         # Calculate display size (scale down for game coordinates)
         display_width = text_width * 0.01
         display_height = text_height * 0.01
         
         # Draw textured quad
-        glBegin(GL_QUADS)
+        render_state.begin(GL_QUADS)
         glTexCoord2f(0, 0)
         glVertex2f(x, y)
         glTexCoord2f(1, 0)
@@ -70,33 +174,109 @@ class TextRenderer:
         glVertex2f(x + display_width, y + display_height)
         glTexCoord2f(0, 1)
         glVertex2f(x, y + display_height)
-        glEnd()
+        render_state.end()
+        
+    def _get_atlas(self, font_size):
+        """
+        Find the glyph atlas of a font, uploading it on first use
+        Returns: dict with texture id, glyph texture coordinates and sizes
+        """
+        atlas = self.atlases.get(font_size)
+        if atlas is not None:
+            return atlas
+        
+        font_size = "large" if font_size == "large" else "normal"
+        self._get_font(font_size)
+        atlas_surface, glyphs = self.atlas_surfaces[font_size]
+        atlas = {"texture": self._create_texture(atlas_surface), "glyphs": glyphs}
+        self.atlases[font_size] = atlas
+        return atlas
+        
+    @staticmethod
+    def _render_atlas_surface(font):
+        """
+        Render every character of ATLAS_CHARACTERS in white into one surface,
+        so any color can be applied with glColor (needs no OpenGL)
+        Returns: (surface, glyph texture coordinates and sizes)
+        """
+        glyph_surfaces = [font.render(char, True, (255, 255, 255)) for char in ATLAS_CHARACTERS]
+        
+        # Place glyphs left to right in one row
+        atlas_width = sum(surface.get_width() for surface in glyph_surfaces)
+        atlas_height = max(surface.get_height() for surface in glyph_surfaces)
+        atlas_surface = pygame.Surface((atlas_width, atlas_height), pygame.SRCALPHA)
+        atlas_surface.fill((255, 255, 255, 0))
+        
+        glyphs = {}
+        pen_x = 0
+        for char, surface in zip(ATLAS_CHARACTERS, glyph_surfaces):
+            width, height = surface.get_width(), surface.get_height()
+            atlas_surface.blit(surface, (pen_x, 0))
+            # Texture is uploaded upside down, so v = 1 is the top of the surface
+            glyphs[char] = (pen_x / atlas_width, 1 - height / atlas_height,
+                            (pen_x + width) / atlas_width, 1.0, width, height)
+            pen_x += width
+        return atlas_surface, glyphs
+        
+    def render_text_atlas(self, text, x, y, color=(1.0, 1.0, 1.0), font_size="normal"):
+        """
+        Render text from the glyph atlas (no texture upload, good for text that
+        changes every frame); falls back to render_text for other characters
+        text: text to render
+        x, y: position on screen (-10 to 10 range)
+        color: RGB color tuple (0.0 to 1.0)
+        font_size: "normal" or "large"
+        """
+        atlas = self._get_atlas(font_size)
+        glyphs = atlas["glyphs"]
+        if any(char not in glyphs for char in text):
+            self.render_text(text, x, y, color, font_size)
+            return
+        
+        # Enable texturing with the atlas (consecutive lines share one glBegin block)
+        render_state.enable(GL_TEXTURE_2D)
+        render_state.bind_texture(atlas["texture"])
         
-        # Disable texturing
-        glDisable(GL_TEXTURE_2D)
+        # Atlas glyphs are white, so the color comes from glColor
+        render_state.color3(color[0], color[1], color[2])
         
-        # Delete texture
-        glDeleteTextures([texture_id])
+        # Draw one textured quad per character
+        render_state.begin(GL_QUADS)
+        for char in text:
+            u0, v0, u1, v1, width, height = glyphs[char]
+            display_width = width * 0.01
+            display_height = height * 0.01
+            glTexCoord2f(u0, v0)
+            glVertex2f(x, y)
+            glTexCoord2f(u1, v0)
+            glVertex2f(x + display_width, y)
+            glTexCoord2f(u1, v1)
+            glVertex2f(x + display_width, y + display_height)
+            glTexCoord2f(u0, v1)
+            glVertex2f(x, y + display_height)
+            x += display_width
+        render_state.end()
         
     def render_score(self, score):
         """
         Render score in top-left corner
         """
         score_text = f"Score: {score}"
-        self.render_text(score_text, -9, 5, (1.0, 1.0, 1.0), "normal")
+        self.render_text_atlas(score_text, -9, 5, (1.0, 1.0, 1.0), "normal")
         
     def render_game_over(self, score):
         """
         Render game over screen
         """
         # Draw semi-transparent overlay
-        glColor4f(0.0, 0.0, 0.0, 0.7)
-        glBegin(GL_QUADS)
+        render_state.disable(GL_TEXTURE_2D)
+        render_state.color4(0.0, 0.0, 0.0, 0.7)
+        render_state.begin(GL_QUADS)
         glVertex2f(-10, -6)
         glVertex2f(10, -6)
         glVertex2f(10, 6)
         glVertex2f(-10, 6)
-        glEnd()
+        render_state.end()
         
         # Render game over text
         self.render_text("GAME OVER", -3, 1, (1.0, 0.2, 0.2), "large")
@@ -106,8 +286,11 @@ class TextRenderer:
         
     def render_instructions(self):
         """
-        Render game instructions at startup
+        Render game instructions at startup (left out until the fonts are
+        loaded, so the menu shows without waiting for them)
         """
+        if self.fonts_loading():
+            return
         self.render_text("Avoid the obstacles!", -2.5, 3, (1.0, 1.0, 1.0), "normal")
         self.render_text("Use LEFT/RIGHT arrows", -2.5, 2, (1.0, 1.0, 0.0), "normal")
         self.render_text("Press SPACE to start", -2.5, 1, (1.0, 1.0, 0.0), "normal") 
\ No newline at end of file
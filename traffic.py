@@ -0,0 +1,425 @@
+"""
+Traffic file - contains TrafficManager, which drives many AI vehicles around a
+multi-lane ring road, with every vehicle field stored in a NumPy array
+Vehicles follow the vehicle ahead with the Intelligent Driver Model (IDM) and
+change lanes with MOBIL; the player car is part of the traffic, so vehicles
+brake behind it and do not cut in front of it
+"""
+import argparse
+import time
+import numpy as np
+from obstacle import Obstacle
+
+# Vehicle colors (picked by vehicle number)
+COLORS = [(0.9, 0.6, 0.1), (0.6, 0.2, 0.7), (0.1, 0.6, 0.6), (0.9, 0.9, 0.9)]
+
+class TrafficManager:
+    def __init__(self, count=100, lanes=2, length=None, seed=None):
+        """
+        Create traffic on a ring road
+        count: number of AI vehicles
+        lanes: lanes across the road (2 lanes meet at the yellow center line)
+        length: ring road length (by default about 10 units of lane per vehicle)
+        seed: seed for vehicle placement and desired speeds
+        """
+        self.count = count
+        self.lanes = lanes
+        self.road_width = 6  # same as road width
+        self.lane_width = self.road_width / lanes
+        self.lane_centers = -self.road_width/2 + (np.arange(lanes) + 0.5) * self.lane_width
+        self.length = float(length) if length is not None else max(count / lanes * 10.0, 50.0)
+
+        # Vehicle size (x across the road, y along it)
+        self.vehicle_width = 1.4
+        self.vehicle_length = 0.9
+
+        # The player drives as fast as obstacles fall (obstacles stand still on the road)
+        self.player_speed = Obstacle(0, 0).speed
+
+        # Car following (IDM), units per frame: desired speeds are spread around
+        # the player speed, so the player passes some vehicles and others pass it
+        self.min_speed_factor = 0.6
+        self.max_speed_factor = 1.4
+        self.max_accel = 0.002  # acceleration on a free road
+        self.comfort_decel = 0.004  # usual braking
+        self.headway = 40  # time gap to the vehicle ahead (frames)
+        self.min_gap = 0.5  # distance kept when standing
+
+        # Lane changes (MOBIL)
+        self.politeness = 0.3  # weight of the braking forced on the new follower
+        self.change_threshold = 0.0002  # acceleration gain needed to change lanes
+        self.safe_decel = 0.008  # hardest braking a change may force on the new follower
+        self.change_cooldown = 60  # frames between lane changes of a vehicle
+        self.lateral_speed = 0.05  # sideways speed while changing lanes
+
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self, seed=None):
+        """
+        Place the vehicles again, evenly spread around the ring with a free
+        stretch of road around the player
+        seed: new seed (keeps the current generator when None)
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        count, rng = self.count, self.rng
+
+        # Vehicles go round robin over the lanes, evenly spaced in each lane,
+        # between 10 units ahead of the player and 3 units behind it
+        clear_behind, clear_ahead = 3.0, 10.0
+        usable = self.length - clear_behind - clear_ahead
+        per_lane = max(-(-count // self.lanes), 1)
+        spacing = usable / per_lane
+        jitter = max(min(spacing / 4, (spacing - self.vehicle_length - self.min_gap) / 2), 0.0)
+        slot = np.arange(count) // self.lanes
+        self.lane = np.arange(count) % self.lanes
+        self.position = clear_ahead + (slot + 0.5) * spacing + rng.uniform(-jitter, jitter, count)
+
+        self.desired_speed = self.player_speed * rng.uniform(self.min_speed_factor,
+                                                             self.max_speed_factor, count)
+        self.speed = self.desired_speed.copy()
+        self.x = self.lane_centers[self.lane]
+        self.previous_x = self.x.copy()
+        self.cooldown = np.zeros(count, dtype=np.int64)
+
+        self.player_position = 0.0
+        self.relative = self._relative(self.position, self.player_position)
+        self.frame = 0
+        self.points = 0  # vehicles passed during the last update
+        self.scored = np.zeros(count, dtype=bool)  # passed since the player last met them
+        self.overtaken = 0  # times a vehicle passed the player
+        self.flow = 0  # vehicles that crossed the start of the ring
+        self.lane_changes = 0
+
+    def get_state(self):
+        """
+        Snapshot of the traffic (array copies, never written to)
+        Returns: opaque state for set_state
+        """
+        return (self.frame, self.player_position, self.points, self.overtaken, self.flow, self.lane_changes,
+                self.position.copy(), self.lane.copy(), self.speed.copy(), self.desired_speed.copy(),
+                self.x.copy(), self.previous_x.copy(), self.cooldown.copy(), self.scored.copy(),
+                self.rng.bit_generator.state)
+
+    def set_state(self, state):
+        """
+        Restore a snapshot from get_state
+        """
+        (self.frame, self.player_position, self.points, self.overtaken, self.flow, self.lane_changes,
+         position, lane, speed, desired_speed, x, previous_x, cooldown, scored, rng_state) = state
+        self.position = position.copy()
+        self.lane = lane.copy()
+        self.speed = speed.copy()
+        self.desired_speed = desired_speed.copy()
+        self.x = x.copy()
+        self.previous_x = previous_x.copy()
+        self.cooldown = cooldown.copy()
+        self.scored = scored.copy()
+        self.rng.bit_generator.state = rng_state
+        self.relative = self._relative(self.position, self.player_position)
+
+    def player_lanes(self, car):
+        """
+        Lanes the car body touches (the same lane twice when it is inside one)
+        Returns: (lane, lane)
+        """
+        left = int((car.x - car.width/2 + self.road_width/2) // self.lane_width)
+        right = int((car.x + car.width/2 + self.road_width/2) // self.lane_width)
+        last = self.lanes - 1
+        return min(max(left, 0), last), min(max(right, 0), last)
+
+    def _acceleration(self, speed, desired_speed, gap, leader_speed):
+        """
+        IDM acceleration for vehicles (arrays or numbers)
+        gap: free distance to the vehicle ahead
+        """
+        closing_speed = speed - leader_speed
+        wanted_gap = self.min_gap + np.maximum(
+            0.0, speed * self.headway + speed * closing_speed / (2 * np.sqrt(self.max_accel * self.comfort_decel)))
+        # Powers written as products (much faster than ** on arrays)
+        free = speed / desired_speed
+        free *= free
+        interaction = wanted_gap / np.maximum(gap, 1e-3)
+        return self.max_accel * (1 - free * free - interaction * interaction)
+
+    def update(self, car=None):
+        """
+        Move all vehicles one frame (call after the car moved)
+        car: the player car (None runs the traffic without a player)
+        """
+        count, length = self.count, self.length
+
+        # The player joins the arrays as two extra vehicles (one per lane it
+        # touches) that others react to; it is never moved by the traffic model
+        players = self.player_lanes(car) if car is not None else ()
+        total = count + len(players)
+        lanes = np.concatenate([self.lane, players]).astype(np.int64)
+        position = np.append(self.position, [self.player_position] * len(players))
+        speed = np.append(self.speed, [self.player_speed] * len(players))
+        desired = np.append(self.desired_speed, [self.player_speed] * len(players))
+        half_length = np.full(total, self.vehicle_length / 2)
+        if car is not None:
+            half_length[count:] = car.height / 2
+
+        # Sort by lane, then position around the ring (timsort is fast on the
+        # nearly sorted order left by the last frame)
+        keys = lanes * length + position
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        sorted_lanes = lanes[order]
+        starts = np.searchsorted(sorted_lanes, np.arange(self.lanes), side="left")
+        ends = np.searchsorted(sorted_lanes, np.arange(self.lanes), side="right")
+
+        # Leader of each vehicle: the next one in its lane, wrapping around the ring
+        following = np.arange(1, total + 1)
+        last_in_lane = following == ends[sorted_lanes]
+        leader = np.empty(total, dtype=np.int64)
+        leader[order] = order[np.where(last_in_lane, starts[sorted_lanes], following)]
+        alone = leader == np.arange(total)
+        gap = np.where(alone, length,
+                       self._wrap(position[leader] - position) - half_length - half_length[leader])
+        acceleration = self._acceleration(speed, desired, gap, speed[leader])
+
+        # Lane changes, towards one side per frame so two vehicles never move
+        # into the same lane from both sides; only vehicles held back by the
+        # vehicle ahead look for a better lane
+        direction = 1 if self.frame % 2 == 0 else -1
+        target = self.lane + direction
+        free = self.speed / self.desired_speed
+        free *= free
+        held_back = acceleration[:count] < self.max_accel * (1 - free * free) - self.change_threshold
+        movers = np.flatnonzero(held_back & (self.cooldown == 0) & (target >= 0) & (target < self.lanes))
+        if len(movers):
+            self._change_lanes(movers, target[movers], position, speed, desired, half_length,
+                               acceleration, order, sorted_keys, starts, ends)
+
+        # Move along the ring (vehicles never drive backwards)
+        old_position = self.position
+        self.speed = np.maximum(self.speed + acceleration[:count], 0.0)
+        self.position = self._wrap(old_position + self.speed)
+        self.flow += int(np.count_nonzero(self.position < old_position))
+
+        # Slide sideways towards the lane centers
+        self.previous_x = self.x
+        self.x = self.x + np.clip(self.lane_centers[self.lane] - self.x,
+                                  -self.lateral_speed, self.lateral_speed)
+        np.maximum(self.cooldown - 1, 0, out=self.cooldown)
+
+        # Vehicles passed by the player: a vehicle is passed when it is
+        # completely below the car and scores once, as obstacles do; vehicles
+        # that get ahead again are only counted, so the score never goes down.
+        # A vehicle that wraps half the ring away from the player (lapped, or
+        # lapping the player) is a new vehicle to pass
+        old_relative = self.relative
+        self.player_position = (self.player_position + self.player_speed) % length
+        self.relative = self._relative(self.position, self.player_position)
+        self.scored[np.abs(self.relative - old_relative) > length / 2] = False
+        if car is not None:
+            line = -(self.vehicle_length + car.height) / 2
+            before = self.relative - self.speed < line - self.player_speed
+            after = self.relative < line
+            passed = after & ~before & ~self.scored
+            self.scored |= passed
+            self.points = int(np.count_nonzero(passed))
+            self.overtaken += int(np.count_nonzero(before & ~after))
+        self.frame += 1
+
+    def _change_lanes(self, movers, target, position, speed, desired, half_length,
+                      acceleration, order, sorted_keys, starts, ends):
+        """
+        MOBIL lane changes: a vehicle changes lane when it gains acceleration
+        and its new follower does not have to brake hard
+        Arrays include the player entries; target: lane each mover looks at
+        """
+        length = self.length
+
+        # New leader and follower in the target lane, from the sorted keys
+        insert = np.searchsorted(sorted_keys, target * length + position[movers])
+        first, end = starts[target], ends[target]
+        empty = first == end
+        new_leader = order[np.where(insert < end, insert, first) % len(order)]
+        new_follower = order[np.where(insert > first, insert - 1, end - 1) % len(order)]
+
+        leader_gap = (self._wrap(position[new_leader] - position[movers]) -
+                      half_length[movers] - half_length[new_leader])
+        follower_gap = (self._wrap(position[movers] - position[new_follower]) -
+                        half_length[movers] - half_length[new_follower])
+        leader_gap[empty] = length
+        follower_gap[empty] = length
+
+        # Accelerations after the change
+        new_acceleration = self._acceleration(speed[movers], desired[movers], leader_gap,
+                                              speed[new_leader])
+        follower_after = self._acceleration(speed[new_follower], desired[new_follower],
+                                            follower_gap, speed[movers])
+        follower_after[empty] = 0.0
+        follower_before = np.where(empty, 0.0, acceleration[new_follower])
+
+        safe = ((leader_gap > self.min_gap) & (follower_gap > self.min_gap) &
+                (follower_after > -self.safe_decel))
+        gain = (new_acceleration - acceleration[movers] +
+                self.politeness * (follower_after - follower_before))
+        chosen = np.flatnonzero(safe & (gain > self.change_threshold))
+        if len(chosen) == 0:
+            return
+
+        # Only one vehicle moves into each gap per frame
+        gaps = np.where(empty[chosen], -1 - target[chosen], new_leader[chosen])
+        _, unique = np.unique(gaps, return_index=True)
+        chosen = chosen[unique]
+        changed = movers[chosen]
+        self.lane[changed] = target[chosen]
+        self.cooldown[changed] = self.change_cooldown
+        self.lane_changes += len(changed)
+
+    def _wrap(self, distance):
+        """
+        Move distances between -length and 2 * length into 0 to length, in place
+        (much faster than % on float arrays)
+        """
+        distance -= self.length * (distance >= self.length)
+        distance += self.length * (distance < 0)
+        return distance
+
+    def _relative(self, position, player_position):
+        """
+        Distance of vehicles ahead of the player (negative behind it), in
+        -length/2 to length/2
+        """
+        half = self.length / 2
+        return self._wrap(position - player_position + half) - half
+
+    def vehicle_arrays(self, car, distance=None):
+        """
+        Vehicles in screen coordinates in the same form as obstacle_arrays
+        (speed is how fast they move down the screen, negative when they pull away)
+        distance: only vehicles at most this far ahead or behind (all when None)
+        Returns: (x, y, width, height, speed)
+        """
+        relative = self.relative
+        near = slice(None) if distance is None else np.abs(relative) <= distance
+        relative = relative[near]
+        count = len(relative)
+        return (self.x[near], car.y + relative, np.full(count, self.vehicle_width),
+                np.full(count, self.vehicle_length), self.player_speed - self.speed[near])
+
+    def check_collision(self, car):
+        """
+        Check collision between car and any vehicle (same rectangle test as obstacles)
+        Returns: True if collision detected, False otherwise
+        """
+        relative = self.relative
+        return bool(np.any((np.abs(relative) < (self.vehicle_length + car.height) / 2) &
+                           (np.abs(self.x - car.x) < (self.vehicle_width + car.width) / 2)))
+
+    def check_score(self, car):
+        """
+        Points for the vehicles passed during the last update (vehicles that
+        pass the player are counted in statistics, not subtracted)
+        Returns: number of points scored
+        """
+        points = self.points
+        self.points = 0
+        return points
+
+    def statistics(self):
+        """
+        Throughput figures since the last reset
+        Returns: dict with mean speed, flow (vehicles per 1000 frames past
+                 one point of the ring, all lanes), density, lane changes and
+                 vehicles that passed the player
+        """
+        frames = max(self.frame, 1)
+        return {
+            "vehicles": self.count,
+            "mean_speed": float(self.speed.mean()) if self.count else 0.0,
+            "flow_per_1000_frames": self.flow * 1000 / frames,
+            "density_per_lane_unit": self.count / (self.length * self.lanes),
+            "lane_changes_per_1000_frames": self.lane_changes * 1000 / frames,
+            "overtaken_player": self.overtaken,
+        }
+
+    def draw(self, car, alpha=1.0):
+        """
+        Draw lane lines and the vehicles on screen
+        alpha: position between the previous (0) and current (1) update
+        """
+        from OpenGL.GL import glVertex2f, GL_QUADS, GL_LINES, GL_TEXTURE_2D
+        from gl_state import render_state
+
+        render_state.disable(GL_TEXTURE_2D)
+
+        # Dashed white lines between lanes (the road already draws the center line)
+        dash_offset = -((self.player_position - self.player_speed * (1 - alpha)) % 2)
+        render_state.color3(1.0, 1.0, 1.0)
+        render_state.line_width(2)
+        render_state.begin(GL_LINES)
+        for boundary in range(1, self.lanes):
+            line_x = -self.road_width/2 + boundary * self.lane_width
+            if abs(line_x) < 1e-9:
+                continue
+            for i in range(8):
+                line_y = dash_offset + i * 2 - 6
+                glVertex2f(line_x, line_y)
+                glVertex2f(line_x, line_y + 1)
+        render_state.end()
+
+        # Vehicles between the previous and current update (the screen is 12 units high)
+        relative = self.relative - (1 - alpha) * (self.speed - self.player_speed)
+        screen_y = car.y + relative
+        visible = np.flatnonzero(np.abs(screen_y) < 6 + self.vehicle_length)
+        x = self.previous_x + (self.x - self.previous_x) * alpha
+
+        half_width = self.vehicle_width / 2
+        half_length = self.vehicle_length / 2
+        render_state.begin(GL_QUADS)
+        for i in visible:
+            vehicle_x, vehicle_y = float(x[i]), float(screen_y[i])
+
+            # Body
+            render_state.color3(*COLORS[i % len(COLORS)])
+            glVertex2f(vehicle_x - half_width, vehicle_y - half_length)
+            glVertex2f(vehicle_x + half_width, vehicle_y - half_length)
+            glVertex2f(vehicle_x + half_width, vehicle_y + half_length)
+            glVertex2f(vehicle_x - half_width, vehicle_y + half_length)
+
+            # Rear window (dark)
+            render_state.color3(0.2, 0.2, 0.3)
+            glVertex2f(vehicle_x - half_width * 0.7, vehicle_y - half_length * 0.6)
+            glVertex2f(vehicle_x + half_width * 0.7, vehicle_y - half_length * 0.6)
+            glVertex2f(vehicle_x + half_width * 0.7, vehicle_y - half_length * 0.1)
+            glVertex2f(vehicle_x - half_width * 0.7, vehicle_y - half_length * 0.1)
+        render_state.end()
+
+def main():
+    """
+    Throughput study: run traffic without a player and print update times and
+    traffic statistics
+    """
+    parser = argparse.ArgumentParser(description="Run ring road traffic without a window")
+    parser.add_argument("--vehicles", type=int, default=10000, help="number of vehicles")
+    parser.add_argument("--lanes", type=int, default=3, help="number of lanes")
+    parser.add_argument("--length", type=float, default=None,
+                        help="ring road length (default: 10 units of lane per vehicle)")
+    parser.add_argument("--frames", type=int, default=3600, help="frames to simulate")
+    parser.add_argument("--seed", type=int, default=0, help="seed for placement and speeds")
+    args = parser.parse_args()
+
+    traffic = TrafficManager(args.vehicles, args.lanes, args.length, args.seed)
+    times = []
+    for _ in range(args.frames):
+        start = time.perf_counter()
+        traffic.update()
+        times.append((time.perf_counter() - start) * 1000)
+
+    times.sort()
+    print(f"{args.vehicles} vehicles, {args.lanes} lanes, ring length {traffic.length:.0f}, "
+          f"{args.frames} frames")
+    print(f"update: mean {sum(times) / len(times):.3f} ms, p50 {times[len(times) // 2]:.3f} ms, "
+          f"p99 {times[min(len(times) - 1, len(times) * 99 // 100)]:.3f} ms")
+    for name, value in traffic.statistics().items():
+        print(f"{name:>30}: {value:.4f}" if isinstance(value, float) else f"{name:>30}: {value}")
+
+if __name__ == "__main__":
+    main()
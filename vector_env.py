@@ -0,0 +1,156 @@
+"""
+Vector environment file - contains VectorEnv, which steps many independent
+copies of the game at once using NumPy arrays
+"""
+import math
+import numpy as np
+from car import Car
+from obstacle import Obstacle, ObstacleManager
+
+# Action bits: an action is LEFT, RIGHT, both (LEFT | RIGHT) or neither (0)
+LEFT = 1
+RIGHT = 2
+
+class VectorEnv:
+    def __init__(self, num_envs, seed=None):
+        """
+        Create `num_envs` independent games
+        seed: seed for the random generator that places obstacles
+        """
+        self.num_envs = num_envs
+        self.rng = np.random.default_rng(seed)
+
+        # Game constants come from the normal game classes so the rules match
+        car = Car()
+        obstacle = Obstacle(0, 0)
+        manager = ObstacleManager()
+        self.car_y = car.y
+        self.car_width = car.width
+        self.car_height = car.height
+        self.car_speed = car.speed
+        self.obstacle_width = obstacle.width
+        self.obstacle_height = obstacle.height
+        self.obstacle_speed = obstacle.speed
+        self.spawn_interval = manager.spawn_interval
+        self.road_left = -manager.road_width/2 + 0.5
+        self.road_right = manager.road_width/2 - 0.5
+
+        # Obstacle slots per game: enough for every obstacle that can be alive at once
+        lifetime = math.ceil(12 / self.obstacle_speed) + 1  # frames from y=6 to y<-6
+        capacity = lifetime // self.spawn_interval + 2
+
+        # Game state, one row per game
+        self.car_x = np.zeros(num_envs)
+        self.spawn_timer = np.zeros(num_envs, dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.frames = np.zeros(num_envs, dtype=np.int64)
+        self.obstacle_x = np.zeros((num_envs, capacity))
+        self.obstacle_y = np.zeros((num_envs, capacity))
+        self.alive = np.zeros((num_envs, capacity), dtype=bool)
+        self.scored = np.zeros((num_envs, capacity), dtype=bool)
+
+        # Results of the last finished episode of each game
+        self.final_score = np.zeros(num_envs, dtype=np.int64)
+        self.final_frames = np.zeros(num_envs, dtype=np.int64)
+
+    @property
+    def capacity(self):
+        """
+        Number of obstacle slots per game
+        """
+        return self.alive.shape[1]
+
+    def reset(self):
+        """
+        Reset every game
+        Returns: observations
+        """
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.observations()
+
+    def _reset_envs(self, mask):
+        """
+        Start a new game in every row where mask is True
+        """
+        self.car_x[mask] = 0
+        self.spawn_timer[mask] = 0
+        self.score[mask] = 0
+        self.frames[mask] = 0
+        self.alive[mask] = False
+        self.scored[mask] = False
+
+    def _grow(self):
+        """
+        Double the number of obstacle slots (only needed for custom spawn settings)
+        """
+        for name in ("obstacle_x", "obstacle_y", "alive", "scored"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)], axis=1))
+
+    def observations(self):
+        """
+        Current state of every game
+        Returns: array of shape (num_envs, 1 + 3 * capacity) with car x followed by
+                 x, y and alive flag of every obstacle slot
+        """
+        slots = np.stack([self.obstacle_x, self.obstacle_y, self.alive], axis=2)
+        return np.concatenate([self.car_x[:, None], slots.reshape(self.num_envs, -1)], axis=1)
+
+    def step(self, actions):
+        """
+        Advance every game by one frame
+        actions: integer array of LEFT/RIGHT bits, one per game
+        Returns: (observations, rewards, dones)
+                 rewards are the points scored this frame, dones mark games that
+                 ended this frame (those games are already reset)
+        """
+        actions = np.asarray(actions)
+
+        # Update cars (same order as Car.update: left, right, then screen limits)
+        self.car_x = np.where(actions & LEFT, self.car_x - self.car_speed, self.car_x)
+        self.car_x = np.where(actions & RIGHT, self.car_x + self.car_speed, self.car_x)
+        np.clip(self.car_x, -4, 4, out=self.car_x)
+
+        # Spawn new obstacles where the spawn timer ran out
+        self.spawn_timer += 1
+        spawning = np.flatnonzero(self.spawn_timer >= self.spawn_interval)
+        if spawning.size:
+            if self.alive[spawning].all(axis=1).any():
+                self._grow()
+            slots = np.argmin(self.alive[spawning], axis=1)  # first free slot
+            self.obstacle_x[spawning, slots] = self.rng.uniform(self.road_left, self.road_right,
+                                                                spawning.size)
+            self.obstacle_y[spawning, slots] = 6
+            self.alive[spawning, slots] = True
+            self.scored[spawning, slots] = False
+            self.spawn_timer[spawning] = 0
+
+        # Move obstacles downward and remove those that are off screen
+        self.obstacle_y -= self.obstacle_speed
+        self.alive &= ~(self.obstacle_y < -6)
+
+        # Check for collision (same rectangle test as ObstacleManager.check_collision)
+        car_left = (self.car_x - self.car_width/2)[:, None]
+        car_right = (self.car_x + self.car_width/2)[:, None]
+        car_top = self.car_y + self.car_height/2
+        car_bottom = self.car_y - self.car_height/2
+        overlap = ((car_left < self.obstacle_x + self.obstacle_width/2) &
+                   (car_right > self.obstacle_x - self.obstacle_width/2) &
+                   (car_top > self.obstacle_y - self.obstacle_height/2) &
+                   (car_bottom < self.obstacle_y + self.obstacle_height/2))
+        dones = (overlap & self.alive).any(axis=1)
+
+        # Check for score (same rule as ObstacleManager.check_score)
+        passed = (self.obstacle_y + self.obstacle_height/2 < car_bottom) & ~self.scored & self.alive
+        self.scored |= passed
+        rewards = passed.sum(axis=1)
+        self.score += rewards
+        self.frames += 1
+
+        # Remember finished episodes and start new games for them
+        if dones.any():
+            self.final_score[dones] = self.score[dones]
+            self.final_frames[dones] = self.frames[dones]
+            self._reset_envs(dones)
+
+        return self.observations(), rewards, dones
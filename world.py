@@ -0,0 +1,236 @@
+"""
+World file - contains World, which splits the scenery beside the road into
+chunks generated from a seed as the road scrolls
+Chunk data is prefetched by a background thread, and both the data and the
+OpenGL display lists of the chunks are kept in bounded least recently used
+caches, so memory and work per frame stay the same however long the game runs
+"""
+import math
+import queue
+import random
+import threading
+from collections import OrderedDict
+
+CHUNK_HEIGHT = 4.0  # world units of road per chunk
+LAYERS = ("trees", "buildings")
+
+# Scenery can reach this far above its chunk (tall buildings), so chunks
+# slightly below the screen are still drawn
+MAX_OVERHANG = 3.5
+
+def generate_chunk(seed, index):
+    """
+    Create the scenery of one chunk (the same seed and index always give the
+    same chunk, whichever thread builds it and in whichever order)
+    Returns: dict of layer name -> list of objects, with y measured from the
+             bottom of the chunk: trees are (x, y), buildings (x, y, width, height)
+    """
+    rng = random.Random(f"{seed}:{index}")
+    trees = []
+    buildings = []
+    for side in (-1, 1):
+        # Trees on the grass next to the road
+        for _ in range(rng.randint(0, 2)):
+            trees.append((side * rng.uniform(3.8, 6.5), rng.uniform(0, CHUNK_HEIGHT)))
+
+        # A building further out every other chunk or so
+        if rng.random() < 0.6:
+            width = rng.uniform(0.8, 1.6)
+            height = rng.uniform(1.5, 3.2)
+            buildings.append((side * rng.uniform(6.2, 9.2), rng.uniform(0, CHUNK_HEIGHT), width, height))
+    return {"trees": trees, "buildings": buildings}
+
+class World:
+    def __init__(self, seed=0, cache_size=16, prefetch=2, background=True):
+        """
+        Create streamed scenery
+        seed: scenery seed (the same seed always gives the same world)
+        cache_size: chunks kept in memory (must cover the screen and the prefetched chunks)
+        prefetch: chunks built ahead of the top of the screen
+        background: build prefetched chunks in a background thread (else on request)
+        """
+        self.seed = seed
+        self.cache_size = max(cache_size, self.visible_chunks() + prefetch + 1)
+        self.prefetch = prefetch
+
+        # index -> chunk data, least recently used first (shared with the thread)
+        self.chunks = OrderedDict()
+        self.lock = threading.Lock()
+
+        # (index, layer) -> display list id, least recently used first (main thread only)
+        self.display_lists = OrderedDict()
+        self.building_windows = True  # set by Road (lists are cleared when it changes)
+
+        # Statistics
+        self.chunks_generated = 0  # by either thread
+        self.chunks_missed = 0  # needed for drawing before the prefetch built them
+        self.lists_compiled = 0
+        self.lists_evicted = 0
+
+        # Prefetch thread (generation is pure Python; OpenGL work stays in the main thread)
+        self.requests = None
+        self.requested = set()  # indexes queued and not built yet
+        self.thread = None
+        if background:
+            self.requests = queue.Queue()
+            self.thread = threading.Thread(target=self._prefetch_chunks, daemon=True)
+            self.thread.start()
+
+    @staticmethod
+    def visible_chunks():
+        """
+        Most chunks on screen at once (the screen is 12 units high)
+        """
+        return math.ceil((12 + MAX_OVERHANG) / CHUNK_HEIGHT) + 1
+
+    def _store(self, index, chunk):
+        """
+        Put a chunk into the cache and drop the least recently used ones
+        (call with the lock held)
+        """
+        self.chunks[index] = chunk
+        self.chunks.move_to_end(index)
+        while len(self.chunks) > self.cache_size:
+            self.chunks.popitem(last=False)
+
+    def get_chunk(self, index):
+        """
+        Chunk data, built now if the prefetch has not built it yet
+        """
+        with self.lock:
+            chunk = self.chunks.get(index)
+            if chunk is not None:
+                self.chunks.move_to_end(index)
+                return chunk
+
+        chunk = generate_chunk(self.seed, index)
+        with self.lock:
+            self.chunks_generated += 1
+            self.chunks_missed += 1
+            self._store(index, chunk)
+        return chunk
+
+    def request(self, indexes):
+        """
+        Ask for chunks that will be needed soon
+        """
+        for index in indexes:
+            with self.lock:
+                if index in self.chunks or index in self.requested:
+                    continue
+                self.requested.add(index)
+            if self.requests is not None:
+                self.requests.put(index)
+            else:
+                self._build(index)
+
+    def _build(self, index):
+        """
+        Generate a requested chunk and cache it
+        """
+        chunk = generate_chunk(self.seed, index)
+        with self.lock:
+            self.requested.discard(index)
+            self.chunks_generated += 1
+            if index not in self.chunks:
+                self._store(index, chunk)
+
+    def _prefetch_chunks(self):
+        """
+        Background thread: build requested chunks until the None sentinel arrives
+        """
+        while True:
+            index = self.requests.get()
+            if index is None:
+                break
+            self._build(index)
+
+    def chunk_range(self, distance):
+        """
+        Indexes of the chunks on screen when the road has scrolled `distance`
+        Returns: range of chunk indexes
+        """
+        first = math.floor((distance - 6 - MAX_OVERHANG) / CHUNK_HEIGHT)
+        last = math.floor((distance + 6) / CHUNK_HEIGHT)
+        return range(first, last + 1)
+
+    def draw_layer(self, layer, distance):
+        """
+        Draw one scenery layer of the chunks on screen from cached display lists
+        distance: how far the road has scrolled (world y at the screen center)
+        """
+        from OpenGL.GL import glPushMatrix, glPopMatrix, glTranslatef, glCallList
+        from gl_state import render_state
+
+        chunks = self.chunk_range(distance)
+        render_state.flush()
+        for index in chunks:
+            list_id = self._display_list(index, layer)
+            glPushMatrix()
+            glTranslatef(0, index * CHUNK_HEIGHT - distance, 0)
+            glCallList(list_id)
+            glPopMatrix()
+
+        # The lists changed state behind the tracker's back
+        render_state.invalidate()
+
+        # Build the next chunks before they scroll into view
+        self.request(range(chunks.stop, chunks.stop + self.prefetch))
+
+    def _display_list(self, index, layer):
+        """
+        Display list of a chunk layer, compiled on first use; the least
+        recently used lists are deleted when there are too many
+        """
+        from OpenGL.GL import glGenLists, glNewList, glEndList, glDeleteLists, GL_COMPILE
+        from gl_state import render_state
+        from road import draw_tree, draw_building
+
+        key = (index, layer)
+        list_id = self.display_lists.get(key)
+        if list_id is not None:
+            self.display_lists.move_to_end(key)
+            return list_id
+
+        chunk = self.get_chunk(index)
+
+        # The list must set all the state it needs, so compile from unknown state
+        list_id = glGenLists(1)
+        render_state.invalidate()
+        glNewList(list_id, GL_COMPILE)
+        if layer == "trees":
+            for x, y in chunk["trees"]:
+                draw_tree(x, y)
+        else:
+            for x, y, width, height in chunk["buildings"]:
+                draw_building(x, y, width, height, self.building_windows)
+        render_state.flush()
+        glEndList()
+        render_state.invalidate()
+        self.lists_compiled += 1
+
+        self.display_lists[key] = list_id
+        while len(self.display_lists) > self.cache_size * len(LAYERS):
+            _, old_id = self.display_lists.popitem(last=False)
+            glDeleteLists(old_id, 1)
+            self.lists_evicted += 1
+        return list_id
+
+    def clear_display_lists(self):
+        """
+        Delete every display list (needs the OpenGL context)
+        """
+        from OpenGL.GL import glDeleteLists
+
+        for list_id in self.display_lists.values():
+            glDeleteLists(list_id, 1)
+        self.display_lists.clear()
+
+    def close(self):
+        """
+        Stop the prefetch thread
+        """
+        if self.thread is not None:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None